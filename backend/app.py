@@ -1,18 +1,21 @@
 """
 Main Flask application for Credit Risk Assessment System
 """
+import time
+_import_start = time.perf_counter()
+
 from flask import Flask
 from flask_cors import CORS
-import os
-from dotenv import load_dotenv
-from app.api.routes import register_routes
+from app.config.settings import Config  # loads .env once for the whole app
+from app.utils.logger import configure_logging, begin_request_trace
+from app.utils.startup import startup_report, warm_up
 
-# Load environment variables
-load_dotenv()
+startup_report.record('imports', time.perf_counter() - _import_start)
 
 def create_app():
     """Create and configure Flask application"""
     app = Flask(__name__)
+    configure_logging()
     
     # Enable CORS
     CORS(app)
@@ -20,14 +23,29 @@ def create_app():
     # Note: Database initialization (table creation) must be done via database/scripts/seed.py
     # This application only performs read operations on existing database
     
+    # Decide per request whether the detailed pipeline trace is emitted
+    @app.before_request
+    def _begin_request_trace():
+        begin_request_trace()
+    
+    # Load the model first so it is reported as its own phase; the route
+    # modules then reuse the loaded singleton (shap is imported on first use)
+    from app.services.predict_service import PredictService
+    PredictService()
+    
     # Register routes
-    register_routes(app)
+    with startup_report.phase('routes'):
+        from app.api.routes import register_routes
+        register_routes(app)
+    
+    if Config.WARMUP_ON_START:
+        warm_up()
+    from app.services.model_manager import ModelManager
+    ModelManager().start_watcher()
+    startup_report.log()
     
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
-
+    app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
@@ -0,0 +1,64 @@
+"""
+Admin endpoints - model status and hot reload
+
+Disabled (404) unless Config.ADMIN_TOKEN is set; requests must then send
+'Authorization: Bearer <ADMIN_TOKEN>'. Each server process (every prefork
+worker) serves its own model, so a reload request only reloads the process
+that receives it; use MODEL_WATCH_INTERVAL to roll a new version out to all
+workers.
+"""
+import hmac
+from flask import Blueprint, jsonify, request
+from app.config.settings import Config
+from app.services.model_manager import ModelManager
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def check_token(headers):
+    """
+    Authorize an admin request from its headers
+
+    Returns:
+        tuple: (error payload, status) to send back, or None when authorized
+    """
+    if not Config.ADMIN_TOKEN:
+        return {'error': 'Not found'}, 404
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip(), Config.ADMIN_TOKEN):
+        return {'error': 'Unauthorized'}, 401
+    return None
+
+
+def model_status():
+    """Payload for GET /admin/model"""
+    return ModelManager().status(), 200
+
+
+def reload_model():
+    """
+    Start a background reload of the configured model (POST /admin/model/reload)
+
+    Returns:
+        tuple: (payload, status) - 202 when started, 409 if a reload is running
+    """
+    manager = ModelManager()
+    if not manager.reload_async(reason='admin'):
+        return {'error': 'A model reload is already running', 'status': manager.status()}, 409
+    return {'message': 'Model reload started', 'status': manager.status()}, 202
+
+
+@admin_bp.route('/model', methods=['GET'])
+def get_model():
+    """Served model version and the outcome of the last reload"""
+    denied = check_token(request.headers)
+    payload, status = denied or model_status()
+    return jsonify(payload), status
+
+
+@admin_bp.route('/model/reload', methods=['POST'])
+def post_model_reload():
+    """Load, validate and swap in the configured model version in the background"""
+    denied = check_token(request.headers)
+    payload, status = denied or reload_model()
+    return jsonify(payload), status
@@ -1,8 +1,9 @@
 """
 Health check endpoint
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, Response
 from app.services.predict_service import PredictService
+from app.utils.metrics import metrics
 
 health_bp = Blueprint('health', __name__)
 
@@ -13,6 +14,11 @@ def health_check():
     return jsonify({
         'status': 'ok',
         'message': 'Backend service is running',
-        'model_loaded': predict_service.is_model_loaded()
+        'model_loaded': predict_service.is_model_loaded(),
+        'model_version': predict_service.model_version
     })
 
+@health_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage latency metrics in Prometheus text format"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,13 +1,20 @@
 """
 Records API endpoints - Read Only
 """
-from flask import Blueprint, jsonify
+import json
+from flask import Blueprint, jsonify, request
+from app.config.settings import Config
+from app.models.explanation_model import ExplanationModel
 from app.models.record_model import RecordModel
 from app.services.predict_service import PredictService
-from app.services.shap_service import ShapService
+from app.services.shap_service import ShapService, METHODS as SHAP_METHODS
+from app.utils.logger import get_logger, trace_enabled, trace_logger
+
+logger = get_logger(__name__)
 
 records_bp = Blueprint('records', __name__)
 record_model = RecordModel()
+explanation_model = ExplanationModel()
 predict_service = PredictService()
 shap_service = ShapService()
 
@@ -55,43 +62,191 @@ shap_service = ShapService()
 #     except Exception as e:
 #         return jsonify({'error': str(e)}), 500
 
+def score_record(record):
+    """
+    Risk prediction for a stored record
+    
+    Serves the score precomputed by app.jobs.score_records when it came from
+    the loaded model, then a result-cache hit; otherwise preprocesses once
+    and scores live.
+    
+    Returns:
+        tuple: (prediction, features) where features is the PreparedFeatures
+               to share with SHAP, or None for a stored or cached score
+    """
+    features = None
+    prediction = predict_service.stored_prediction(record)
+    if prediction is None:
+        prediction = predict_service.cached_prediction(record)
+    if prediction is None:
+        # Without a model, predict() reports the load error instead of raising
+        if predict_service.is_model_loaded():
+            features = predict_service.prepare(record)
+        prediction = predict_service.predict(features if features is not None else record)
+    if trace_enabled():
+        trace_logger.debug("Prediction for customer %s: %s", record.get('customer_id'), prediction)
+    return prediction, features
+
+def attach_prediction(record, prediction):
+    """
+    Add a prediction to the record response
+    
+    Returns:
+        bool: True if the record was scored (and should get a SHAP explanation)
+    """
+    if isinstance(prediction, dict) and prediction.get('error'):
+        record['risk_prediction_error'] = prediction.get('error')
+        record['risk_prediction'] = prediction
+        return False
+    record['risk_prediction'] = prediction
+    record['risk_score'] = prediction.get('risk_score')
+    record['risk_category'] = prediction.get('risk_category')
+    return True
+
+def attach_stored_risk(record):
+    """Fall back to the risk data already stored with the record, if any"""
+    if record.get('risk_score'):
+        record['risk_prediction'] = {
+            'risk_score': record.get('risk_score'),
+            'risk_category': record.get('risk_category'),
+            'probability_default': record.get('risk_score', 0)
+        }
+
+def explanation_options(args):
+    """
+    Explanation method and latency budget requested with ?shap_method= and ?shap_budget_ms=
+    
+    Returns:
+        tuple: (method, budget_ms), None where not given
+    
+    Raises:
+        ValueError: For an unknown method or a budget that is not a positive number
+    """
+    method = args.get('shap_method') or None
+    if method is not None and method not in SHAP_METHODS:
+        raise ValueError(f"shap_method must be one of {', '.join(SHAP_METHODS)}")
+    budget_ms = args.get('shap_budget_ms') or None
+    if budget_ms is not None:
+        try:
+            budget_ms = float(budget_ms)
+        except ValueError:
+            budget_ms = -1.0
+        if not budget_ms > 0:
+            raise ValueError("shap_budget_ms must be a positive number")
+    return method, budget_ms
+
+def attach_explanation(record, features, method=None, budget_ms=None):
+    """
+    Add the SHAP explanation, and the method that produced it, to a scored record
+    
+    Serves the explanation precomputed by app.jobs.explain_records when it came
+    from the loaded model (and the requested method, if any); otherwise explains live.
+    """
+    try:
+        explanations = None
+        if record.get('customer_id') is not None:
+            explanations = shap_service.stored_explanation(
+                explanation_model.get_by_id(record['customer_id']), method)
+        if explanations is None:
+            explanations = shap_service.explain_many(features if features is not None else [record],
+                                                     method=method, budget_ms=budget_ms)
+    except Exception as e:
+        logger.warning("✗ SHAP explanation failed for customer %s: %s", record.get('customer_id'), e)
+        record['shap_explanation'] = []
+        return
+    record['shap_explanation'] = explanations.to_list(0)
+    record['shap_method'] = explanations.method
+
 @records_bp.route('/<int:customer_id>', methods=['GET'])
 def get_record_by_id(customer_id):
     """Get record by customer_id with fresh risk assessment"""
+    try:
+        method, budget_ms = explanation_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
         record = record_model.get_by_id(customer_id)
         if not record:
             return jsonify({'error': 'Record not found'}), 404
         
         # Get fresh risk prediction
-        # print(record)
         try:
-            prediction = predict_service.predict(record)
-            print("pridiction:", prediction)
-            if isinstance(prediction, dict) and prediction.get('error'):
-                record['risk_prediction_error'] = prediction.get('error')
-                record['risk_prediction'] = prediction
-            else:
-                record['risk_prediction'] = prediction
-                record['risk_score'] = prediction.get('risk_score')
-                record['risk_category'] = prediction.get('risk_category')
-                
-                # Get SHAP explanation
-                try:
-                    shap_explanation = shap_service.explain(record)
-                    record['shap_explanation'] = shap_explanation
-                except Exception as se:
-                    print(f"Warning: Could not get SHAP explanation: {se}")
+            prediction, features = score_record(record)
+            if attach_prediction(record, prediction):
+                # Get SHAP explanation (sharing the prediction's feature matrix)
+                attach_explanation(record, features, method, budget_ms)
         except Exception as e:
-            print(f"Warning: Could not get prediction: {e}")
+            logger.warning("Could not get prediction for customer %s: %s", customer_id, e)
             # Use existing risk data if available
-            if record.get('risk_score'):
-                record['risk_prediction'] = {
-                    'risk_score': record.get('risk_score'),
-                    'risk_category': record.get('risk_category'),
-                    'probability_default': record.get('risk_score', 0)
-                }
+            attach_stored_risk(record)
         
         return jsonify(record), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+def _parse_score_payload(body):
+    """
+    Parse a batch scoring payload (JSON array or NDJSON)
+    
+    Returns:
+        list: Parsed rows; NDJSON lines that are not valid JSON become an
+              error string so they can be reported per row
+    """
+    text = body.decode('utf-8').strip()
+    if not text:
+        return []
+    if text.startswith('['):
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError('Expected a JSON array of records')
+        return rows
+    
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError as e:
+            rows.append(f"Invalid JSON on line {line_number}: {e}")
+    return rows
+
+def score_payload(body):
+    """
+    Parse and score a batch scoring request body
+    
+    Returns:
+        tuple: (response payload, HTTP status)
+    """
+    try:
+        rows = _parse_score_payload(body)
+    except ValueError as e:
+        return {'error': f'Invalid payload: {e}'}, 400
+    
+    if len(rows) > Config.BATCH_MAX_ROWS:
+        return {'error': f'Batch too large: {len(rows)} rows (max {Config.BATCH_MAX_ROWS})'}, 413
+    
+    if not predict_service.is_model_loaded():
+        return {'error': 'Model not loaded'}, 503
+    
+    try:
+        results = predict_service.predict_batch(rows)
+        for row, result in zip(rows, results):
+            if isinstance(row, str):
+                result['error'] = row
+        failed = sum(1 for result in results if result.get('error'))
+        return {
+            'count': len(results),
+            'scored': len(results) - failed,
+            'failed': failed,
+            'results': results
+        }, 200
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+@records_bp.route('/score', methods=['POST'])
+def score_records():
+    """Score a batch of applicant payloads (JSON array or NDJSON, one object per line)"""
+    payload, status = score_payload(request.get_data())
+    return jsonify(payload), status
@@ -0,0 +1,155 @@
+"""
+ASGI entry point - the Flask API's routes on an async event loop
+
+Serves the same /health, /metrics, /api/records and /admin routes as app.py. The
+event loop only parses requests and builds responses; SQLite reads, model
+inference and SHAP run in separate bounded thread pools (app/utils/stages.py)
+sized by Config.ASGI_*_CONCURRENCY, so many slow SHAP requests cannot block
+cheap record lookups.
+
+Run from the 'backend' directory:
+    uvicorn app.asgi:app --host 0.0.0.0 --port 5000
+or:
+    python -m app.asgi
+"""
+import time
+_import_start = time.perf_counter()
+
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+
+from app.config.settings import Config
+from app.utils.logger import configure_logging, begin_request_trace, get_logger
+from app.utils.metrics import metrics
+from app.utils.stages import Stage
+from app.utils.startup import startup_report, warm_up
+
+startup_report.record('imports', time.perf_counter() - _import_start)
+
+# Loading the model is reported as its own phase (shap is imported on first use)
+from app.services.predict_service import PredictService  # noqa: E402
+PredictService()
+with startup_report.phase('routes'):
+    from app.api import admin, records  # noqa: E402
+from app.services.model_manager import ModelManager  # noqa: E402
+
+logger = get_logger(__name__)
+
+
+class FlaskJSONResponse(JSONResponse):
+    """JSON body encoded like Flask's jsonify (NaN allowed, sorted keys)"""
+
+    def render(self, content):
+        return json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def create_stages():
+    """One bounded executor per blocking stage"""
+    return {
+        'db': Stage('db', Config.ASGI_DB_CONCURRENCY),
+        'inference': Stage('inference', Config.ASGI_INFERENCE_CONCURRENCY),
+        'shap': Stage('shap', Config.ASGI_SHAP_CONCURRENCY),
+    }
+
+
+def create_asgi_app():
+    """Create and configure the FastAPI application"""
+    configure_logging()
+    stages = create_stages()
+    for stage in stages.values():
+        metrics.register_collector(stage.collect_metrics)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if Config.WARMUP_ON_START:
+            warm_up()
+        ModelManager().start_watcher()
+        startup_report.log()
+        logger.info("✓ ASGI app ready (db=%d, inference=%d, shap=%d concurrent calls)",
+                    stages['db'].concurrency, stages['inference'].concurrency, stages['shap'].concurrency)
+        yield
+        ModelManager().stop_watcher()
+        for stage in stages.values():
+            stage.shutdown()
+
+    app = FastAPI(title='Credit Risk Assessment API', lifespan=lifespan,
+                  default_response_class=FlaskJSONResponse)
+    app.state.stages = stages
+    app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+
+    @app.middleware('http')
+    async def begin_trace(request, call_next):
+        # Decide per request whether the detailed pipeline trace is emitted
+        begin_request_trace()
+        return await call_next(request)
+
+    @app.get('/health')
+    async def health_check():
+        return {
+            'status': 'ok',
+            'message': 'Backend service is running',
+            'model_loaded': records.predict_service.is_model_loaded(),
+            'model_version': records.predict_service.model_version
+        }
+
+    @app.get('/metrics')
+    async def metrics_endpoint():
+        return Response(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+    @app.get('/api/records/{customer_id}')
+    async def get_record_by_id(customer_id: int, request: Request):
+        """Get record by customer_id with fresh risk assessment"""
+        try:
+            method, budget_ms = records.explanation_options(request.query_params)
+        except ValueError as e:
+            return FlaskJSONResponse({'error': str(e)}, status_code=400)
+        try:
+            record = await stages['db'].run(records.record_model.get_by_id, customer_id)
+            if not record:
+                return FlaskJSONResponse({'error': 'Record not found'}, status_code=404)
+
+            try:
+                prediction, features = await stages['inference'].run(records.score_record, record)
+                if records.attach_prediction(record, prediction):
+                    await stages['shap'].run(records.attach_explanation, record, features, method, budget_ms)
+            except Exception as e:
+                logger.warning("Could not get prediction for customer %s: %s", customer_id, e)
+                records.attach_stored_risk(record)
+
+            return record
+        except Exception as e:
+            return FlaskJSONResponse({'error': str(e)}, status_code=500)
+
+    @app.post('/api/records/score')
+    async def score_records(request: Request):
+        """Score a batch of applicant payloads (JSON array or NDJSON, one object per line)"""
+        body = await request.body()
+        payload, status = await stages['inference'].run(records.score_payload, body)
+        return FlaskJSONResponse(payload, status_code=status)
+
+    @app.get('/admin/model')
+    async def get_model(request: Request):
+        """Served model version and the outcome of the last reload"""
+        payload, status = admin.check_token(request.headers) or admin.model_status()
+        return FlaskJSONResponse(payload, status_code=status)
+
+    @app.post('/admin/model/reload')
+    async def post_model_reload(request: Request):
+        """Load, validate and swap in the configured model version in the background"""
+        payload, status = admin.check_token(request.headers) or admin.reload_model()
+        return FlaskJSONResponse(payload, status_code=status)
+
+    return app
+
+
+app = create_asgi_app()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=Config.HOST, port=Config.PORT)
@@ -3,32 +3,79 @@ Database configuration for read-only operations
 """
 import sqlite3
 import os
+import threading
 from pathlib import Path
-from dotenv import load_dotenv
-
-load_dotenv()
+from urllib.parse import quote
+from app.config import settings  # noqa: F401  (loads .env once)
 
 # Get database path from environment or use default
 # Calculate path relative to project root (go up from backend/app/config to project root)
 _project_root = Path(__file__).parent.parent.parent.parent
 DB_PATH = os.getenv('DB_PATH', str(_project_root / 'database' / 'credit_risk.db'))
 
+# Connection tuning (applied once per pooled connection)
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 64 * 1024))
+DB_CACHED_STATEMENTS = int(os.getenv('DB_CACHED_STATEMENTS', 128))
+
+# One connection per thread; the pid guards against reusing a parent's
+# connection in a forked worker
+_pool = threading.local()
+
+
+def _connect():
+    """Open a tuned read-only connection to DB_PATH"""
+    uri = f"file:{quote(str(Path(DB_PATH).resolve()))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=DB_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+
+    # WAL itself is a persistent property of the database file, switched on
+    # by database/scripts/seed.py; read-only connections only benefit from it
+    conn.execute('PRAGMA query_only = ON')
+    conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+    conn.execute(f'PRAGMA cache_size = {-DB_CACHE_SIZE_KB}')
+    return conn
+
+
 def get_db_connection():
     """
     Get database connection for read-only operations.
-    
+
+    Connections are pooled per thread and opened read-only, so callers must
+    not close them. SQLite's per-connection statement cache means repeated
+    queries reuse their prepared statements.
+
     Note: Database and tables must be initialized using database/scripts/seed.py
     This function only provides connection functionality.
     """
-    # Ensure database directory exists (creates dir if missing, but won't create DB file)
-    db_dir = os.path.dirname(DB_PATH)
-    if db_dir and not os.path.exists(db_dir):
-        os.makedirs(db_dir, exist_ok=True)
-    
+    conn = getattr(_pool, 'conn', None)
+    if conn is None or _pool.pid != os.getpid():
+        conn = _connect()
+        _pool.conn = conn
+        _pool.pid = os.getpid()
+    return conn
+
+
+def close_db_connection():
+    """Close the current thread's pooled connection (a new one is opened on next use)"""
+    conn = getattr(_pool, 'conn', None)
+    if conn is not None and _pool.pid == os.getpid():
+        conn.close()
+    _pool.conn = None
+
+
+def get_write_connection():
+    """
+    Open a writable connection for offline jobs (e.g. batch scoring).
+
+    The API never writes; jobs own this connection and must close it.
+    """
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
     return conn
 
 # Note: Database initialization (table creation) is handled by database/scripts/seed.py
-# This file only provides connection functionality for read-only operations
+# The API only uses the read-only pooled connections; offline jobs use get_write_connection()
 # To initialize the database, run: python database/scripts/seed.py
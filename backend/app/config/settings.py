@@ -16,9 +16,94 @@ class Config:
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
     HOST = os.getenv('HOST', '0.0.0.0')
     
+    # Startup: import shap, build the SHAP explainer and run one prediction
+    # before serving, instead of on the first request
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'False').lower() == 'true'
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # Trace the full prediction pipeline for one request in N (0 = follow LOG_LEVEL)
+    LOG_TRACE_SAMPLE_RATE = int(os.getenv('LOG_TRACE_SAMPLE_RATE', 0))
+    
     # ML Model
     # Allow MODEL_PATH to be a registered model name (e.g. 'CreditRiskModel_BgC')
     MODEL_PATH = os.getenv('MODEL_PATH', os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../mlruns/models/CreditRiskModel_RF/version-11/meta.yaml')))
     SCALER_MODEL_PATH = os.getenv('SCALER_MODEL_PATH', os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/scaler.pkl')))
     # E:\BITS\Dissertation\Credit risk predictor\mlruns\models\CreditRiskModel_KN\version-9\meta.yaml
-
+    
+    # Hot model reload (app/services/model_manager.py): seconds between checks of
+    # MODEL_PATH for a rewritten meta.yaml or a newer version-N directory (0 = off)
+    MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 0))
+    # Records (credit_risk_records schema) a new model must score before it is swapped in
+    MODEL_VALIDATION_PATH = os.getenv('MODEL_VALIDATION_PATH', os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/shap_background.csv')))
+    # Bearer token for the /admin endpoints (unset = endpoints disabled)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN') or None
+    
+    # Shadow scoring (app/services/shadow_scorer.py): a challenger model version
+    # (meta.yaml, version or registered model directory) that also scores every
+    # live prediction in a background thread; unset = off. Submissions beyond
+    # SHADOW_QUEUE_SIZE are dropped, never waited for. Rows are scored and
+    # written to SHADOW_LOG_DIR in batches of SHADOW_BATCH_ROWS, or after
+    # SHADOW_FLUSH_INTERVAL seconds
+    SHADOW_MODEL_PATH = os.getenv('SHADOW_MODEL_PATH') or None
+    SHADOW_QUEUE_SIZE = int(os.getenv('SHADOW_QUEUE_SIZE', 1000))
+    SHADOW_BATCH_ROWS = int(os.getenv('SHADOW_BATCH_ROWS', 1000))
+    SHADOW_FLUSH_INTERVAL = float(os.getenv('SHADOW_FLUSH_INTERVAL', 10))
+    SHADOW_LOG_DIR = os.getenv('SHADOW_LOG_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '../../logs/shadow')))
+    
+    # Probability of default at which a record is labelled 1; unset keeps the
+    # model's own rule (most probable class)
+    DECISION_THRESHOLD = float(os.getenv('DECISION_THRESHOLD')) if os.getenv('DECISION_THRESHOLD') else None
+    
+    # Inference engine: 'sklearn' calls the model's predict_proba; 'compiled'
+    # evaluates forest/bagging/tree models from flat NumPy arrays built at load
+    # (app/services/compiled_forest.py) and falls back to sklearn for other models
+    INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'sklearn').lower()
+    # Batches larger than this always use sklearn, which is faster on many rows
+    COMPILED_ENGINE_MAX_ROWS = int(os.getenv('COMPILED_ENGINE_MAX_ROWS', 256))
+    
+    # Directory where model versions are converted once into memory-mappable
+    # files (app/services/artifact_cache.py) that all worker processes map
+    # read-only instead of unpickling private copies; unset = load model.pkl directly
+    ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR') or None
+    
+    # SHAP explanations: default method - 'exact' (path-dependent TreeSHAP),
+    # 'interventional' (TreeSHAP over a small background sample) or 'saabas'
+    # (fast path attribution). With a latency budget (ms, per request; the API
+    # also takes ?shap_budget_ms=) the most faithful method that fits is used
+    SHAP_METHOD = os.getenv('SHAP_METHOD', 'exact').lower()
+    SHAP_LATENCY_BUDGET_MS = float(os.getenv('SHAP_LATENCY_BUDGET_MS')) if os.getenv('SHAP_LATENCY_BUDGET_MS') else None
+    # Background rows for interventional SHAP (credit_risk_records schema)
+    SHAP_BACKGROUND_PATH = os.getenv('SHAP_BACKGROUND_PATH', os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/shap_background.csv')))
+    SHAP_BACKGROUND_SIZE = int(os.getenv('SHAP_BACKGROUND_SIZE', 20))
+    
+    # Micro-batching (app/services/micro_batcher.py): concurrent single-record
+    # predictions arriving within MICRO_BATCH_WINDOW_MS of each other (up to
+    # MICRO_BATCH_MAX_SIZE rows) are scored with one model call. Worth enabling
+    # when many requests are scored at once (e.g. raise ASGI_INFERENCE_CONCURRENCY);
+    # a lone request waits up to the window
+    MICRO_BATCH_ENABLED = os.getenv('MICRO_BATCH_ENABLED', 'False').lower() == 'true'
+    MICRO_BATCH_WINDOW_MS = float(os.getenv('MICRO_BATCH_WINDOW_MS', 2))
+    MICRO_BATCH_MAX_SIZE = int(os.getenv('MICRO_BATCH_MAX_SIZE', 32))
+    # Seconds predict() waits for its batch before scoring the row on its own
+    MICRO_BATCH_TIMEOUT = float(os.getenv('MICRO_BATCH_TIMEOUT', 1.0))
+    
+    # Batch scoring
+    BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', 1000))
+    BATCH_MAX_ROWS = int(os.getenv('BATCH_MAX_ROWS', 100000))
+    
+    # Prediction / SHAP result caches (keyed by input fingerprint and model version)
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() == 'true'
+    RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 300))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # ASGI server (app/asgi.py): worker threads per blocking stage. Each stage
+    # runs at most this many calls at once, so slow SHAP requests queue on
+    # their own limit instead of holding up database lookups
+    ASGI_DB_CONCURRENCY = int(os.getenv('ASGI_DB_CONCURRENCY', 8))
+    ASGI_INFERENCE_CONCURRENCY = int(os.getenv('ASGI_INFERENCE_CONCURRENCY', 4))
+    ASGI_SHAP_CONCURRENCY = int(os.getenv('ASGI_SHAP_CONCURRENCY', 2))
+    
+    # Production launcher (app/server.py): worker processes forked after the
+    # model, scaler and SHAP explainer are loaded once in the parent
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1))
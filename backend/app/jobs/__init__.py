@@ -0,0 +1,3 @@
+"""
+Offline jobs package
+"""
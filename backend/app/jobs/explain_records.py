@@ -0,0 +1,201 @@
+"""
+Batch job: precompute SHAP explanations for every row of credit_risk_records
+
+Streams the table in customer_id order, explains each chunk in a pool of
+worker processes (each builds the SHAP explainer once and explains the whole
+chunk with one explain_many call) and writes the top-k feature indices
+(uint8) and impacts (float32) with the model version and method to the
+record_explanations side table. The records endpoint serves these stored
+explanations with a single primary-key read while model_version matches the
+loaded model.
+
+Run from the 'backend' directory:
+    python -m app.jobs.explain_records [--workers 4] [--chunk-size 2000] [--method exact] [--force]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from app.config.database import get_write_connection
+from app.config.settings import Config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Chunks queued per worker: enough to keep workers busy, few enough to bound memory
+CHUNKS_PER_WORKER = 2
+
+_shap_service = None
+
+
+def ensure_explanation_table(conn):
+    """Create record_explanations in databases seeded before it existed"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS record_explanations (
+            customer_id INTEGER PRIMARY KEY,
+            model_version TEXT NOT NULL,
+            method TEXT NOT NULL,
+            feature_indices BLOB NOT NULL,
+            impacts BLOB NOT NULL,
+            computed_at DATETIME
+        )
+    ''')
+    conn.commit()
+
+
+def iter_chunks(conn, model_version, method, chunk_size, force=False):
+    """
+    Yield lists of record dicts, chunk_size at a time, by ascending customer_id
+
+    Rows already explained by model_version with method are skipped unless force is set.
+    """
+    query = '''
+        SELECT r.* FROM credit_risk_records r
+        LEFT JOIN record_explanations e ON e.customer_id = r.customer_id
+        WHERE r.customer_id > ?
+    '''
+    if not force:
+        query += ' AND (e.customer_id IS NULL OR e.model_version IS NOT ? OR e.method IS NOT ?)'
+    query += ' ORDER BY r.customer_id LIMIT ?'
+
+    last_id = -1
+    while True:
+        params = (last_id, chunk_size) if force else (last_id, model_version, method, chunk_size)
+        rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['customer_id']
+
+
+def _init_worker():
+    """Load the model and build the SHAP explainer once per worker process"""
+    global _shap_service
+    from app.services.shap_service import ShapService
+    _shap_service = ShapService()
+    _shap_service._get_explainer()
+
+
+def _explain_chunk(records, method, top_k):
+    """
+    Explain one chunk in a worker
+
+    Returns:
+        tuple: (rows, failed_ids, error) where rows are (customer_id,
+               feature_indices, impacts) tuples ready to store
+    """
+    from app.services.feature_pipeline import PreparedFeatures
+    from app.services.predict_service import PredictService
+
+    customer_ids = [record['customer_id'] for record in records]
+    try:
+        # Rows the API could not score either (e.g. missing inputs) are left out
+        matrix, errors = PredictService()._get_pipeline().transform_with_errors(records)
+        valid = [row for row in range(len(records)) if row not in errors]
+        rows = []
+        if valid:
+            explanations = _shap_service.explain_many(PreparedFeatures(matrix[valid]), top_k, method=method)
+            rows = [(customer_ids[row], *explanations.pack(i)) for i, row in enumerate(valid)]
+    except Exception as e:
+        return [], customer_ids, str(e)
+    error = f"{len(errors)} rows not explainable, e.g. {next(iter(errors.values()))}" if errors else None
+    return rows, [customer_ids[row] for row in errors], error
+
+
+def explain_records(workers=None, chunk_size=2000, method=None, top_k=None, force=False):
+    """
+    Explain the stored portfolio and persist the top-k explanations
+
+    Args:
+        workers (int): Worker processes (defaults to the CPU count); 0 explains in-process
+        chunk_size (int): Rows read, explained and written per chunk
+        method (str): Explanation method (defaults to Config.SHAP_METHOD)
+        top_k (int): Features stored per record (defaults to the API's top 10)
+        force (bool): Recompute rows already explained by the loaded model version
+
+    Returns:
+        dict: Counts of explained and failed rows
+    """
+    from app.services.predict_service import PredictService
+    from app.services.shap_service import METHODS, TOP_K
+
+    predict_service = PredictService()
+    if not predict_service.is_model_loaded():
+        raise RuntimeError(f"Model not loaded: {predict_service._model_load_error or 'not found'}")
+    model_version = predict_service.model_version
+    method = method or Config.SHAP_METHOD
+    if method not in METHODS:
+        raise ValueError(f"Unknown explanation method '{method}' (expected one of {', '.join(METHODS)})")
+    top_k = top_k or TOP_K
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    conn = get_write_connection()
+    explained = failed = 0
+    start = time.perf_counter()
+
+    def write(result):
+        nonlocal explained, failed
+        rows, failed_ids, error = result
+        if failed_ids:
+            failed += len(failed_ids)
+            logger.warning("Could not explain customers in %s-%s: %s", failed_ids[0], failed_ids[-1], error)
+        computed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany('''
+            INSERT OR REPLACE INTO record_explanations
+                (customer_id, model_version, method, feature_indices, impacts, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(customer_id, model_version, method, indices, impacts, computed_at)
+              for customer_id, indices, impacts in rows])
+        conn.commit()
+
+        explained += len(rows)
+        elapsed = time.perf_counter() - start
+        logger.info("Explained %d records (%d failed), %.0f rows/sec", explained, failed,
+                    (explained + failed) / elapsed if elapsed else 0.0)
+
+    try:
+        ensure_explanation_table(conn)
+        chunks = iter_chunks(conn, model_version, method, chunk_size, force)
+        if workers == 0:
+            _init_worker()
+            for records in chunks:
+                write(_explain_chunk(records, method, top_k))
+        else:
+            # Chunks are read ahead of the writes; customer_id paging keeps that consistent
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                pending = deque()
+                for records in chunks:
+                    pending.append(pool.submit(_explain_chunk, records, method, top_k))
+                    while len(pending) >= workers * CHUNKS_PER_WORKER:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info("✓ Explanations complete with model %s (%s SHAP): %d explained, %d failed in %.1fs",
+                model_version, method, explained, failed, elapsed)
+    return {'explained': explained, 'failed': failed, 'model_version': model_version, 'method': method}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute SHAP explanations for credit_risk_records')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count, 0 = explain in this process)')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per read/explain/write chunk')
+    parser.add_argument('--method', default=None,
+                        help='Explanation method: exact, interventional or saabas (default: SHAP_METHOD)')
+    parser.add_argument('--force', action='store_true', help='Recompute rows already explained by this model version')
+    args = parser.parse_args()
+
+    try:
+        explain_records(workers=args.workers, chunk_size=args.chunk_size, method=args.method, force=args.force)
+    except Exception as e:
+        logger.error("✗ Explanation job failed: %s", e)
+        sys.exit(1)
@@ -0,0 +1,174 @@
+"""
+Batch job: score a CSV of applicants outside the web server
+
+Reads the input (credit_risk_records / large_test_data.csv schema) in chunks,
+scores the chunks in a pool of worker processes that each load the model once
+and writes the results in input order to CSV or Parquet. At most a few chunks
+per worker are in flight, so memory stays bounded whatever the file size.
+
+Run from the 'backend' directory:
+    python -m app.jobs.score_csv applicants.csv scores.parquet [--workers 4] [--chunk-size 50000]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from app.services.feature_pipeline import CATEGORICAL_INPUTS
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Input columns copied to the output so scores can be joined back
+ID_COLUMNS = ('customer_id', 'index')
+
+# Chunks queued per worker: enough to keep workers busy, few enough to bound memory
+CHUNKS_PER_WORKER = 2
+
+_predict_service = None
+
+
+def _init_worker():
+    """Load the model once per worker process"""
+    global _predict_service
+    from app.services.predict_service import PredictService
+    _predict_service = PredictService()
+
+
+def _score_chunk(chunk):
+    """Score one input chunk in a worker; returns the output columns for it"""
+    # predict_frame raises if this worker could not load the model
+    scores = _predict_service.predict_frame(chunk)
+    scores.index = chunk.index
+    ids = [col for col in ID_COLUMNS if col in chunk]
+    scores.insert(0, 'row', chunk.index)
+    return pd.concat([chunk[ids], scores], axis=1) if ids else scores
+
+
+class _CsvWriter:
+    """Appends chunks to one CSV file, header first"""
+
+    def __init__(self, path):
+        self.path = path
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    """Appends chunks to one Parquet file as row groups (requires pyarrow)"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self._writer = None
+
+    def write(self, frame):
+        # Text columns as strings even when a chunk holds only None, so every row group shares one schema
+        frame = frame.astype({col: 'string' for col in frame.columns if frame[col].dtype == object})
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_writer(path, output_format=None):
+    output_format = output_format or ('parquet' if Path(path).suffix.lower() in ('.parquet', '.pq') else 'csv')
+    if output_format == 'parquet':
+        return _ParquetWriter(path)
+    return _CsvWriter(path)
+
+
+def score_csv(input_path, output_path, workers=None, chunk_size=50000, output_format=None):
+    """
+    Score every row of a CSV file and write the results in input order
+
+    Args:
+        input_path (str): CSV in the credit_risk_records schema
+        output_path (str): Destination file (.csv or .parquet)
+        workers (int): Worker processes (defaults to the CPU count); 0 scores in-process
+        chunk_size (int): Rows read and scored per chunk
+        output_format (str): 'csv' or 'parquet', inferred from output_path if omitted
+
+    Returns:
+        dict: Counts of scored and failed rows
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    reader = pd.read_csv(input_path, chunksize=chunk_size,
+                         dtype={col: str for col in CATEGORICAL_INPUTS})
+    writer = _open_writer(output_path, output_format)
+
+    rows = failed = 0
+    start = time.perf_counter()
+
+    def write(scores):
+        nonlocal rows, failed
+        writer.write(scores)
+        rows += len(scores)
+        failed += int(scores['error'].notna().sum())
+        elapsed = time.perf_counter() - start
+        logger.info("Scored %d rows (%d failed), %.0f rows/sec", rows, failed,
+                    rows / elapsed if elapsed else 0.0)
+
+    try:
+        if workers == 0:
+            _init_worker()
+            for chunk in reader:
+                write(_score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(_score_chunk, chunk))
+                    # Results are written in submission order, which is input order
+                    while len(pending) >= workers * CHUNKS_PER_WORKER:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info("✓ Scored %s -> %s: %d rows (%d failed) in %.1fs, %.0f rows/sec with %d workers",
+                input_path, output_path, rows, failed, elapsed, rows / elapsed if elapsed else 0.0, workers)
+    return {'rows': rows, 'failed': failed, 'seconds': elapsed}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a CSV of applicants with the configured model')
+    parser.add_argument('input', help='Input CSV in the credit_risk_records schema')
+    parser.add_argument('output', help='Output file (.csv or .parquet)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count, 0 = score in this process)')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per chunk')
+    parser.add_argument('--format', choices=('csv', 'parquet'), default=None,
+                        help='Output format (default: from the output file extension)')
+    args = parser.parse_args()
+
+    try:
+        score_csv(args.input, args.output, workers=args.workers,
+                  chunk_size=args.chunk_size, output_format=args.format)
+    except Exception as e:
+        logger.error("✗ CSV scoring failed: %s", e)
+        sys.exit(1)
@@ -0,0 +1,127 @@
+"""
+Batch job: precompute risk scores for every row of credit_risk_records
+
+Streams the table in customer_id order, scores each chunk with the loaded
+model (one predict_proba call per chunk) and bulk-writes risk_score,
+risk_category, prediction, model_version and scored_at. The records
+endpoint serves these stored scores while model_version matches the
+loaded model.
+
+Run from the 'backend' directory:
+    python -m app.jobs.score_records [--chunk-size 5000] [--force]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.config.database import get_write_connection
+from app.services.predict_service import PredictService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Columns the job writes, added to databases created before they existed
+SCORE_COLUMNS = {
+    'prediction': 'INTEGER',
+    'model_version': 'TEXT',
+    'scored_at': 'DATETIME',
+}
+
+
+def ensure_score_columns(conn):
+    """Add any missing score columns to credit_risk_records"""
+    existing = {row['name'] for row in conn.execute('PRAGMA table_info(credit_risk_records)')}
+    for column, column_type in SCORE_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE credit_risk_records ADD COLUMN {column} {column_type}')
+            logger.info("Added column credit_risk_records.%s", column)
+    conn.commit()
+
+
+def iter_chunks(conn, model_version, chunk_size, force=False):
+    """
+    Yield lists of record dicts, chunk_size at a time, by ascending customer_id
+
+    Rows already scored by model_version are skipped unless force is set.
+    """
+    query = 'SELECT * FROM credit_risk_records WHERE customer_id > ?'
+    if not force:
+        query += ' AND (model_version IS NOT ? OR risk_score IS NULL)'
+    query += ' ORDER BY customer_id LIMIT ?'
+
+    last_id = -1
+    while True:
+        params = (last_id, chunk_size) if force else (last_id, model_version, chunk_size)
+        rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['customer_id']
+
+
+def score_records(chunk_size=5000, force=False):
+    """
+    Score the stored portfolio and persist the results
+
+    Args:
+        chunk_size (int): Rows read, scored and written per transaction
+        force (bool): Rescore rows already scored by the loaded model version
+
+    Returns:
+        dict: Counts of scored and failed rows
+    """
+    predict_service = PredictService()
+    if not predict_service.is_model_loaded():
+        raise RuntimeError(f"Model not loaded: {predict_service._model_load_error or 'not found'}")
+    model_version = predict_service.model_version
+
+    conn = get_write_connection()
+    try:
+        ensure_score_columns(conn)
+        scored = failed = 0
+        start = time.perf_counter()
+
+        for records in iter_chunks(conn, model_version, chunk_size, force):
+            results = predict_service.predict_batch(records, chunk_size=chunk_size)
+            scored_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+            updates = []
+            for record, result in zip(records, results):
+                if result.get('error'):
+                    failed += 1
+                    logger.warning("Could not score customer %s: %s", record['customer_id'], result['error'])
+                    continue
+                updates.append((result['risk_score'], result['risk_category'], result['prediction'],
+                                model_version, scored_at, record['customer_id']))
+
+            conn.executemany('''
+                UPDATE credit_risk_records
+                SET risk_score = ?, risk_category = ?, prediction = ?,
+                    model_version = ?, scored_at = ?
+                WHERE customer_id = ?
+            ''', updates)
+            conn.commit()
+
+            scored += len(updates)
+            elapsed = time.perf_counter() - start
+            logger.info("Scored %d records (%d failed), %.0f rows/sec", scored, failed,
+                        (scored + failed) / elapsed if elapsed else 0.0)
+
+        logger.info("✓ Batch scoring complete with model %s: %d scored, %d failed", model_version, scored, failed)
+        return {'scored': scored, 'failed': failed, 'model_version': model_version}
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute risk scores for credit_risk_records')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per read/score/write chunk')
+    parser.add_argument('--force', action='store_true', help='Rescore rows already scored by this model version')
+    args = parser.parse_args()
+
+    try:
+        score_records(chunk_size=args.chunk_size, force=args.force)
+    except Exception as e:
+        logger.error("✗ Batch scoring failed: %s", e)
+        sys.exit(1)
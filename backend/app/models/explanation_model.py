@@ -0,0 +1,32 @@
+"""
+Explanation model - SHAP explanations precomputed by app.jobs.explain_records
+"""
+import sqlite3
+
+from app.config.database import get_db_connection
+from app.utils.metrics import metrics
+
+
+class ExplanationModel:
+    """Read access to record_explanations (connections are pooled; do not close them)"""
+    
+    def get_by_id(self, customer_id):
+        """
+        Get the stored explanation for a customer
+        
+        Returns:
+            dict: model_version, method, feature_indices and impacts (packed
+                  blobs), or None when there is none (or no such table yet)
+        """
+        with metrics.timer('explanation_fetch'):
+            try:
+                row = get_db_connection().execute('''
+                    SELECT model_version, method, feature_indices, impacts
+                    FROM record_explanations
+                    WHERE customer_id = ?
+                ''', (customer_id,)).fetchone()
+            except sqlite3.OperationalError:
+                # Database seeded before the table existed and never explained
+                return None
+        
+        return dict(row) if row else None
@@ -2,13 +2,14 @@
 Record model for database operations
 """
 from app.config.database import get_db_connection
+from app.utils.metrics import metrics
 from datetime import datetime
 
 # Starting customer ID (6 digits)
 START_CUSTOMER_ID = 100000
 
 class RecordModel:
-    """Model for credit risk records"""
+    """Model for credit risk records (connections are pooled; do not close them)"""
     
     def _get_next_customer_id(self, conn):
         """Get next 6-digit customer ID starting from 100000"""
@@ -34,21 +35,20 @@ class RecordModel:
         ''')
         
         records = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         return records
     
     def get_by_id(self, customer_id):
         """Get record by customer_id"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM credit_risk_records 
-            WHERE customer_id = ?
-        ''', (customer_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with metrics.timer('db_fetch'):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT * FROM credit_risk_records 
+                WHERE customer_id = ?
+            ''', (customer_id,))
+            
+            row = cursor.fetchone()
         
         return dict(row) if row else None
     
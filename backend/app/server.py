@@ -0,0 +1,174 @@
+"""
+Prefork production launcher
+
+Loads the model, scaler and SHAP TreeExplainer once in the parent process,
+binds the listening socket and then forks Config.SERVER_WORKERS workers that
+serve the ASGI app (app/asgi.py) with uvicorn on that shared socket. The
+workers share the parent's model pages copy-on-write instead of each
+unpickling its own copy, and none of them pays the model load on its first
+request. Dead workers are replaced; SIGTERM/SIGINT stop all workers gracefully.
+
+Each worker keeps its own /metrics registry and result caches, and its own
+model: with MODEL_WATCH_INTERVAL set, every worker watches MODEL_PATH and
+swaps in new model versions by itself (app/services/model_manager.py).
+
+Run from the 'backend' directory:
+    python -m app.server [--workers 4] [--host 0.0.0.0] [--port 5000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+from app.config.settings import Config
+from app.utils.logger import configure_logging, get_logger
+from app.utils.startup import startup_report, warm_up
+
+logger = get_logger(__name__)
+
+# A worker that exits sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def preload():
+    """
+    Load everything a request needs, in the current (parent) process
+
+    Each step is recorded in app.utils.startup.startup_report.
+    """
+    from app.services.predict_service import PredictService
+    from app.services.shap_service import ShapService
+
+    predict_service = PredictService()
+    if not predict_service.is_model_loaded():
+        raise RuntimeError(f"Model not loaded: {predict_service._model_load_error or 'not found'}")
+    ShapService()._get_explainer()
+    import app.asgi  # noqa: F401  (builds the app and its route singletons)
+
+
+def bind_socket(host, port, backlog=2048):
+    """Listening socket created in the parent and inherited by every worker"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(sock):
+    """Worker body: serve the preloaded ASGI app on the inherited socket"""
+    import uvicorn
+    from app.asgi import app
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Warm up after the fork: native thread pools must not be started in the parent
+    warm_up()
+    config = uvicorn.Config(app, fd=sock.fileno(), log_config=None, access_log=False)
+    uvicorn.Server(config).run()
+
+
+def _flush_logs():
+    for handler in get_logger('app').handlers:
+        handler.flush()
+
+
+class PreforkServer:
+    """Forks and supervises workers that share one listening socket"""
+
+    def __init__(self, sock, workers):
+        self.sock = sock
+        self.workers = max(1, int(workers))
+        self.children = {}  # pid -> start time
+        self._stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve(self.sock)
+            except BaseException as e:
+                logger.error("✗ Worker %d failed: %s", os.getpid(), e)
+                code = 1
+            finally:
+                _flush_logs()
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def stop(self, signum=None, frame=None):
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Fork the workers and keep them running until SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning("Worker %d exited with status %d, restarting it", pid, code)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+        self.sock.close()
+        logger.info("✓ All workers stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the API with preloaded prefork workers')
+    parser.add_argument('--workers', type=int, default=Config.SERVER_WORKERS,
+                        help=f'Worker processes (default: Config.SERVER_WORKERS = {Config.SERVER_WORKERS})')
+    parser.add_argument('--host', default=Config.HOST)
+    parser.add_argument('--port', type=int, default=Config.PORT)
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    try:
+        preload()
+    except Exception as e:
+        logger.error("✗ Preload failed: %s", e)
+        return 1
+    startup_report.log('Preloaded')
+
+    if not hasattr(os, 'fork'):
+        # No fork (Windows): a single in-process server
+        import uvicorn
+        from app.asgi import app
+        uvicorn.run(app, host=args.host, port=args.port)
+        return 0
+
+    sock = bind_socket(args.host, args.port)
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collection in the workers does not touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    PreforkServer(sock, args.workers).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
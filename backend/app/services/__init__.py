@@ -1,4 +1,10 @@
 """
 Services package
-"""
 
+The feature pipeline (and the compiled model evaluator) are exported here so
+evaluation scripts and offline scorers preprocess and score exactly like the API.
+"""
+from app.services.compiled_forest import CompiledForest, compile_model
+from app.services.feature_pipeline import (
+    FeaturePipeline, PreparedFeatures, EXPECTED_FEATURES, MODEL_INPUT_FIELDS
+)
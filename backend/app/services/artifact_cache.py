@@ -0,0 +1,135 @@
+"""
+Memory-mapped model artifacts shared across worker processes
+
+With Config.ARTIFACT_CACHE_DIR set, the first process to load a model
+version converts its model.pkl and the scaler into joblib files (NumPy arrays
+stored raw, uncompressed) and, with INFERENCE_ENGINE=compiled, writes the
+compiled evaluator's arrays as .npy files. Every later load memory-maps those
+files read-only, so all workers on a node share one page-cache copy of the
+arrays instead of each holding its own.
+
+What is shared depends on the model: arrays that stay NumPy arrays after
+unpickling (k-NN training data, linear coefficients, histogram gradient
+boosting predictors, the scaler and the compiled evaluator) are mapped.
+scikit-learn decision trees copy their node arrays into private memory
+when unpickled, so for tree ensembles the saving comes from the compiled
+evaluator, and the prefork server (app/server.py) remains the way to share
+the trees themselves.
+
+Cache entries are keyed by model version, the size and modification time of
+model.pkl and the scaler, and the scikit-learn and NumPy versions, and are
+written to a temporary directory that is renamed into place, so concurrent
+workers never read a half-written entry.
+"""
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from app.services.compiled_forest import CompiledForest, compile_model
+from app.utils.logger import get_logger
+from app.utils.startup import startup_report
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+logger = get_logger(__name__)
+
+# Bumped when the layout of a cache entry changes
+CACHE_FORMAT = 1
+
+
+def cache_key(version, model_file, scaler_file):
+    """Short digest identifying one conversion of a model version and scaler"""
+    import numpy
+    import sklearn
+
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (CACHE_FORMAT, version, sklearn.__version__, numpy.__version__):
+        digest.update(str(part).encode())
+    for path in (model_file, scaler_file):
+        stat = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+def _publish(build, destination):
+    """Run build(tmp_dir) and rename the result to destination, unless another process got there first"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=destination.parent, prefix=f'.{destination.name}-'))
+    try:
+        build(staging)
+        os.rename(staging, destination)
+    except OSError:
+        if not destination.exists():
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _convert(model_file, scaler_file, directory):
+    """Write model.joblib and scaler.joblib into directory"""
+    import joblib
+
+    with open(model_file, 'rb') as f:
+        model = pickle.load(f)
+    joblib.dump(model, directory / 'model.joblib')
+    joblib.dump(joblib.load(scaler_file), directory / 'scaler.joblib')
+
+
+def _cached_engine(entry, model):
+    """Compiled evaluator from the cache entry, compiling and saving it on first use"""
+    engine_dir = entry / 'compiled'
+    if not engine_dir.exists():
+        with startup_report.phase('engine_compile'):
+            engine = compile_model(model)
+        if engine is None:
+            return None
+
+        def build(staging):
+            engine.save(staging)
+
+        try:
+            _publish(build, engine_dir)
+        except Exception as e:
+            logger.warning("✗ Could not cache the compiled model in %s: %s", engine_dir, e)
+            return engine
+    return CompiledForest.load(engine_dir)
+
+
+def load_cached(model_file, scaler_file, version, cache_dir=None):
+    """
+    Load a model version and its scaler through the artifact cache
+
+    Args:
+        model_file (str): model.pkl of the version
+        scaler_file (str): Scaler file
+        version (str): 'name:version' label
+        cache_dir (str): Cache root (defaults to Config.ARTIFACT_CACHE_DIR)
+
+    Returns:
+        tuple: (model, scaler, engine) with arrays memory-mapped; engine is
+               None unless Config.INFERENCE_ENGINE is 'compiled' and the model compiles
+    """
+    import joblib
+
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', version)
+    entry = Path(cache_dir or Config.ARTIFACT_CACHE_DIR) / f'{name}-{cache_key(version, model_file, scaler_file)}'
+    if not entry.exists():
+        with startup_report.phase('artifact_convert'):
+            _publish(lambda staging: _convert(model_file, scaler_file, staging), entry)
+        logger.info("✓ Converted model %s to memory-mappable artifacts in %s", version, entry)
+
+    with startup_report.phase('model_load'):
+        model = joblib.load(entry / 'model.joblib', mmap_mode='r')
+    with startup_report.phase('scaler_load'):
+        scaler = joblib.load(entry / 'scaler.joblib', mmap_mode='r')
+    engine = None
+    if Config and Config.INFERENCE_ENGINE == 'compiled':
+        engine = _cached_engine(entry, model)
+    return model, scaler, engine
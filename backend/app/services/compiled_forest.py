@@ -0,0 +1,267 @@
+"""
+Compiled tree-ensemble evaluator - scikit-learn forests as flat NumPy arrays
+
+At model load every tree of a random forest, extra-trees, bagging ensemble of
+trees or single decision tree is copied into one set of contiguous node
+arrays (split feature, threshold, children, leaf class probabilities). A batch
+is then scored by walking all rows through all trees at once, one array
+operation per tree level, instead of going through sklearn's per-call input
+validation and per-estimator joblib dispatch.
+
+Splits are evaluated exactly as sklearn does (input cast to float32, compared
+with the float64 threshold, missing values sent to the child recorded in
+missing_go_to_left), so probabilities match predict_proba. compile_model()
+checks that on sample inputs and returns None for anything it cannot
+reproduce, in which case callers keep using the model itself.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rows walked through the trees at once (bounds the (rows, trees) work arrays)
+ROW_BLOCK = 4096
+
+# Maximum absolute difference in class probability accepted by the parity check
+PARITY_TOLERANCE = 1e-9
+
+# Arrays written by CompiledForest.save() (the rest is a small JSON header)
+ARRAYS = ('classes_', 'roots', 'feature', 'threshold', 'missing_right', 'next_slot', 'leaf_proba')
+
+
+class UnsupportedModel(Exception):
+    """The model is not a single-output ensemble of sklearn classification trees"""
+
+
+def _tree_members(model):
+    """
+    Trees of the ensemble with the input columns and output classes of each
+
+    Returns:
+        list: (tree_, feature_columns or None, class_columns) per tree
+    """
+    from sklearn.ensemble import BaggingClassifier, ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    n_classes = len(getattr(model, 'classes_', ()))
+    if getattr(model, 'n_outputs_', 1) != 1 or n_classes < 1:
+        raise UnsupportedModel('only single-output classifiers are supported')
+    all_classes = np.arange(n_classes)
+
+    if isinstance(model, DecisionTreeClassifier):
+        return [(model.tree_, None, all_classes)]
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return [(tree.tree_, None, all_classes) for tree in model.estimators_]
+
+    if isinstance(model, BaggingClassifier):
+        members = []
+        for tree, features in zip(model.estimators_, model.estimators_features_):
+            if not isinstance(tree, DecisionTreeClassifier):
+                raise UnsupportedModel(f'bagged {type(tree).__name__} is not a decision tree')
+            # Bagging trains each member on encoded labels, so a member that saw
+            # only some classes reports their indices in classes_
+            members.append((tree.tree_, np.asarray(features), np.asarray(tree.classes_, dtype=np.intp)))
+        return members
+
+    raise UnsupportedModel(f'{type(model).__name__} is not a supported tree ensemble')
+
+
+class CompiledForest:
+    """Flat-array form of a tree ensemble with a predict_proba like the model's"""
+
+    def __init__(self, model):
+        """
+        Args:
+            model: Fitted RandomForestClassifier, ExtraTreesClassifier,
+                BaggingClassifier of decision trees or DecisionTreeClassifier
+
+        Raises:
+            UnsupportedModel: For any other model
+        """
+        members = _tree_members(model)
+        self.classes_ = model.classes_
+        self.n_features = model.n_features_in_
+        self.n_trees = len(members)
+        n_classes = len(self.classes_)
+
+        sizes = [tree.node_count for tree, _, _ in members]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        n_nodes = int(sum(sizes))
+
+        # Each node owns two consecutive slots (2 * node and 2 * node + 1) and
+        # rows walk the trees slot by slot: from slot s a row moves to
+        # next_slot[s + go_right]. Node attributes are stored once per slot so a
+        # level costs a handful of np.take calls and no index arithmetic.
+        # Leaves point back at their own slot, so rows that reach one early stay there.
+        self.roots = 2 * offsets
+        self.feature = np.zeros(2 * n_nodes, dtype=np.intp)
+        self.threshold = np.zeros(2 * n_nodes, dtype=np.float64)
+        self.missing_right = np.zeros(2 * n_nodes, dtype=bool)
+        self.next_slot = np.zeros(2 * n_nodes, dtype=np.intp)
+        self.leaf_proba = np.zeros((2 * n_nodes, n_classes), dtype=np.float64)
+        self.n_nodes = n_nodes
+        self.depth = 0
+        self.handles_missing = True
+
+        for (tree, features, class_columns), offset in zip(members, offsets):
+            slots = 2 * (offset + np.arange(tree.node_count))
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            feature = features[feature] if features is not None else feature
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+            missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+            if missing_go_to_left is None:
+                self.handles_missing = False
+                missing_right = np.zeros(tree.node_count, dtype=bool)
+            else:
+                missing_right = ~np.asarray(missing_go_to_left, dtype=bool) & ~is_leaf
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :len(class_columns)].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer
+
+            for side, child in ((0, tree.children_left), (1, tree.children_right)):
+                self.feature[slots + side] = feature
+                self.threshold[slots + side] = threshold
+                self.missing_right[slots + side] = missing_right
+                self.next_slot[slots + side] = np.where(is_leaf, slots, 2 * (offset + child))
+            self.leaf_proba[np.ix_(slots, class_columns)] = proba
+
+            self.depth = max(self.depth, int(tree.max_depth))
+
+    def save(self, directory):
+        """
+        Write the arrays as .npy files (plus a small JSON header) so load() can memory-map them
+
+        Args:
+            directory (str): Existing directory to write into
+        """
+        directory = Path(directory)
+        for name in ARRAYS:
+            np.save(directory / f'{name}.npy', getattr(self, name))
+        header = {name: getattr(self, name) for name in ('n_features', 'n_trees', 'n_nodes', 'depth', 'handles_missing')}
+        (directory / 'compiled_forest.json').write_text(json.dumps({name: int(value) for name, value in header.items()}))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Evaluator written by save(), with its arrays memory-mapped
+
+        Every process that loads the same directory shares the arrays through
+        the page cache instead of holding its own copy.
+        """
+        directory = Path(directory)
+        engine = cls.__new__(cls)
+        for name in ARRAYS:
+            setattr(engine, name, np.load(directory / f'{name}.npy', mmap_mode=mmap_mode))
+        header = json.loads((directory / 'compiled_forest.json').read_text())
+        for name, value in header.items():
+            setattr(engine, name, bool(value) if name == 'handles_missing' else value)
+        return engine
+
+    def _apply(self, X):
+        """Leaf slot reached in every tree, as an (n_rows, n_trees) array"""
+        n_rows = X.shape[0]
+        flat = X.ravel()
+        slots = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        row_start = np.arange(0, n_rows * self.n_features, self.n_features)[:, None] if n_rows > 1 else 0
+        check_missing = self.handles_missing and np.isnan(flat).any()
+        for _ in range(self.depth):
+            values = flat.take(self.feature.take(slots) + row_start)
+            go_right = values > self.threshold.take(slots)
+            if check_missing:
+                go_right |= np.isnan(values) & self.missing_right.take(slots)
+            slots = self.next_slot.take(slots + go_right)
+        return slots
+
+    def predict_proba(self, X):
+        """
+        Class probabilities, averaged over the trees as the model does
+
+        Args:
+            X (np.ndarray): (n_rows, n_features) feature matrix
+
+        Returns:
+            np.ndarray: (n_rows, n_classes) probabilities in classes_ order
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f'X has {X.shape[-1]} features, but the model expects {self.n_features}')
+        # sklearn trees compare float32 inputs against float64 thresholds; the
+        # float32 values are widened back (exactly) so comparisons need no casting
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        if np.isinf(X).any():
+            raise ValueError("Input X contains infinity or a value too large for dtype('float32')")
+        if not self.handles_missing and np.isnan(X).any():
+            raise ValueError('Input X contains NaN')
+
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_BLOCK):
+            block = X[start:start + ROW_BLOCK]
+            proba[start:start + ROW_BLOCK] = self.leaf_proba.take(self._apply(block), axis=0).sum(axis=1)
+        proba /= self.n_trees
+        return proba
+
+
+def parity_inputs(n_features, n_rows=256, seed=0):
+    """
+    Deterministic sample inputs for the load-time parity check
+
+    Standard-normal rows (the numeric features are standardized and one-hot
+    thresholds sit at 0.5, so both sides of most splits are exercised); every
+    seventh row is all zeros and ones like a one-hot block.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_rows, n_features))
+    X[::7] = rng.integers(0, 2, size=X[::7].shape)
+    return X
+
+
+def compile_model(model, tolerance=PARITY_TOLERANCE):
+    """
+    Compile a model and verify it against the model's own predict_proba
+
+    Args:
+        model: Fitted sklearn model
+        tolerance (float): Maximum absolute probability difference accepted
+
+    Returns:
+        CompiledForest: The compiled evaluator, or None when the model type is
+                        unsupported or the compiled output does not match
+    """
+    try:
+        engine = CompiledForest(model)
+    except UnsupportedModel as e:
+        logger.info("Compiled inference not available for this model (%s), using sklearn", e)
+        return None
+
+    X = parity_inputs(engine.n_features)
+    difference = np.abs(engine.predict_proba(X) - model.predict_proba(X)).max()
+
+    if engine.handles_missing:
+        X_missing = X[:32].copy()
+        X_missing[:, ::3] = np.nan
+        try:
+            expected = model.predict_proba(X_missing)
+        except ValueError:
+            # The model rejects missing values; the compiled form must as well
+            engine.handles_missing = False
+        else:
+            difference = max(difference, np.abs(engine.predict_proba(X_missing) - expected).max())
+
+    if difference > tolerance:
+        logger.warning("✗ Compiled model differs from sklearn by %.3g, using sklearn", difference)
+        return None
+
+    logger.info("✓ Compiled %d trees (%d nodes, depth %d) for inference",
+                engine.n_trees, engine.n_nodes, engine.depth)
+    return engine
@@ -0,0 +1,373 @@
+"""
+Vectorized feature pipeline - turns raw applicant records into the model matrix
+
+Produces exactly the same values as the original pandas/OneHotEncoder
+preprocessing in PredictService, but writes straight into a preallocated
+float64 matrix in EXPECTED_FEATURES order so that one record and 100k
+records go through the same handful of NumPy operations.
+"""
+from collections.abc import Mapping
+import hashlib
+import numpy as np
+from app.utils.metrics import metrics
+
+# Categorical columns used in the training data
+CATEGORICAL_COLS = [
+    'cb_person_default_on_file',
+    'loan_grade',
+    'person_home_ownership',
+    'loan_intent',
+    'age_group',
+    'income_group',
+    'loan_amount_group'
+]
+
+# These are the numeric columns to scale
+NUMERIC_COLS = [
+    'index',
+    'person_age',
+    'person_income',
+    'person_emp_length',
+    'loan_amnt',
+    'loan_int_rate',
+    'cb_person_cred_hist_length',
+    'loan_percent_income',
+    'loan_to_income_ratio',
+    'loan_to_emp_length_ratio',
+    'int_rate_to_loan_amt_ratio'
+]
+
+# Column order after one-hot encoding (MUST match your training data exactly)
+EXPECTED_FEATURES = ['cb_person_default_on_file_N', 'cb_person_default_on_file_Y',
+   'loan_grade_A', 'loan_grade_B', 'loan_grade_C', 'loan_grade_D',
+   'loan_grade_E', 'loan_grade_F', 'loan_grade_G',
+   'person_home_ownership_MORTGAGE', 'person_home_ownership_OTHER',
+   'person_home_ownership_OWN', 'person_home_ownership_RENT',
+   'loan_intent_DEBTCONSOLIDATION', 'loan_intent_EDUCATION',
+   'loan_intent_HOMEIMPROVEMENT', 'loan_intent_MEDICAL',
+   'loan_intent_PERSONAL', 'loan_intent_VENTURE', 'income_group_high',
+   'income_group_high-middle', 'income_group_low',
+   'income_group_low-middle', 'income_group_middle', 'age_group_20-25',
+   'age_group_26-35', 'age_group_36-45', 'age_group_46-55',
+   'age_group_56-65', 'age_group_nan', 'loan_amount_group_large',
+   'loan_amount_group_medium', 'loan_amount_group_small',
+   'loan_amount_group_very large', 'index', 'person_age', 'person_income',
+   'person_emp_length', 'loan_amnt', 'loan_int_rate',
+   'loan_percent_income', 'cb_person_cred_hist_length',
+   'loan_to_income_ratio', 'loan_to_emp_length_ratio',
+   'int_rate_to_loan_amt_ratio']
+
+# Valid categories for each categorical column (anything else encodes as all zeros)
+CATEGORIES = {
+    'cb_person_default_on_file': ['N', 'Y'],
+    'loan_grade': ['A', 'B', 'C', 'D', 'E', 'F', 'G'],
+    'person_home_ownership': ['MORTGAGE', 'OTHER', 'OWN', 'RENT'],
+    'loan_intent': ['DEBTCONSOLIDATION', 'EDUCATION', 'HOMEIMPROVEMENT', 'MEDICAL', 'PERSONAL', 'VENTURE'],
+    'income_group': ['high', 'high-middle', 'low', 'low-middle', 'middle'],
+    'age_group': ['20-25', '26-35', '36-45', '46-55', '56-65', 'nan'],
+    'loan_amount_group': ['large', 'medium', 'small', 'very large']
+}
+
+# Binned groups: (source column, group column, bin edges, labels); bins are right-closed
+# with the lowest edge included, as pd.cut(..., include_lowest=True) does
+GROUP_BINS = [
+    ('person_age', 'age_group',
+     [20, 26, 36, 46, 56, 66],
+     ['20-25', '26-35', '36-45', '46-55', '56-65']),
+    ('person_income', 'income_group',
+     [0, 25000, 50000, 75000, 100000, float('inf')],
+     ['low', 'low-middle', 'middle', 'high-middle', 'high']),
+    ('loan_amnt', 'loan_amount_group',
+     [0, 5000, 10000, 15000, float('inf')],
+     ['small', 'medium', 'large', 'very large']),
+]
+
+# CORRECT order - NO 'index' (order the scaler was fitted with)
+SCALER_NUMERIC_COLS = [
+    'person_income',
+    'person_age',
+    'person_emp_length',
+    'loan_amnt',
+    'loan_int_rate',
+    'cb_person_cred_hist_length',
+    'loan_percent_income',
+    'loan_to_emp_length_ratio',
+    'int_rate_to_loan_amt_ratio'
+]
+
+# Raw numeric inputs every record must provide
+REQUIRED_NUMERIC_INPUTS = [
+    'person_age',
+    'person_income',
+    'person_emp_length',
+    'loan_amnt',
+    'loan_int_rate',
+    'cb_person_cred_hist_length',
+    'loan_percent_income'
+]
+
+# Raw categorical inputs (missing or unknown values encode as all zeros)
+CATEGORICAL_INPUTS = [
+    'cb_person_default_on_file',
+    'loan_grade',
+    'person_home_ownership',
+    'loan_intent'
+]
+
+# Every raw field that influences the feature matrix
+MODEL_INPUT_FIELDS = REQUIRED_NUMERIC_INPUTS + CATEGORICAL_INPUTS + ['index']
+
+_FEATURE_INDEX = {name: i for i, name in enumerate(EXPECTED_FEATURES)}
+
+# One-hot columns come first in EXPECTED_FEATURES, numeric columns after them
+N_ONE_HOT = _FEATURE_INDEX['index']
+
+
+class FeaturePipeline:
+    """Batch transformer from raw records to the model feature matrix"""
+
+    def __init__(self, scaler=None):
+        """
+        Args:
+            scaler: Fitted StandardScaler over SCALER_NUMERIC_COLS, or None to skip scaling
+        """
+        self.feature_names = list(EXPECTED_FEATURES)
+        self.n_features = len(EXPECTED_FEATURES)
+
+        # Scale step: (x - mean) / scale, same operations StandardScaler.transform performs
+        self._mean = None
+        self._scale = None
+        if scaler is not None:
+            fitted_cols = getattr(scaler, 'feature_names_in_', None)
+            if fitted_cols is not None and list(fitted_cols) != SCALER_NUMERIC_COLS:
+                raise ValueError(f"Scaler was fitted on {list(fitted_cols)}, expected {SCALER_NUMERIC_COLS}")
+            if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None:
+                self._mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, 'with_std', True) and scaler.scale_ is not None:
+                self._scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self._scaled_positions = np.array([_FEATURE_INDEX[col] for col in SCALER_NUMERIC_COLS])
+
+        # One-hot lookups: category value -> output column
+        self._onehot_lookup = {
+            col: {cat: _FEATURE_INDEX[f'{col}_{cat}'] for cat in cats}
+            for col, cats in CATEGORIES.items()
+        }
+        self._bin_specs = [
+            (source, np.asarray(bins, dtype=np.float64),
+             np.array([_FEATURE_INDEX[f'{group}_{label}'] for label in labels]))
+            for source, group, bins, labels in GROUP_BINS
+        ]
+
+    def transform(self, records):
+        """
+        Transform records into the model feature matrix
+
+        Args:
+            records: List of dicts, or a columnar mapping / DataFrame of equal-length columns
+
+        Returns:
+            np.ndarray: float64 matrix of shape (n_records, len(EXPECTED_FEATURES))
+
+        Raises:
+            ValueError: If a required numeric input is missing for any record
+        """
+        matrix, errors = self.transform_with_errors(records)
+        if errors:
+            row, message = next(iter(errors.items()))
+            raise ValueError(message if len(errors) == 1 else f"Row {row}: {message} ({len(errors)} invalid rows)")
+        return matrix
+
+    def transform_with_errors(self, records):
+        """
+        Transform records, reporting invalid rows instead of raising
+
+        Args:
+            records: List of dicts, or a columnar mapping / DataFrame of equal-length columns
+
+        Returns:
+            tuple: (matrix, errors) where errors maps row position -> message.
+                   Rows listed in errors hold unusable values and must not be scored.
+        """
+        timer = metrics.stage_timer()
+
+        # ========== STEP 1: Input Columns & Missing Values ==========
+        get_column, n_rows = _column_reader(records)
+        out = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        errors = {}
+
+        raw = {}
+        for col in REQUIRED_NUMERIC_INPUTS:
+            values, missing, invalid = _numeric_column(get_column(col), n_rows)
+            if missing is not None:
+                for row in np.flatnonzero(missing):
+                    errors.setdefault(int(row), f"Missing value for '{col}'")
+            if invalid is not None:
+                for row in np.flatnonzero(invalid):
+                    errors.setdefault(int(row), f"Invalid value for '{col}': expected a number")
+            raw[col] = values
+        timer.lap('preprocess_1_input')
+
+        # ========== STEP 2: Feature Engineering ==========
+        income = raw['person_income']
+        loan = raw['loan_amnt']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, _FEATURE_INDEX['loan_to_income_ratio']] = np.where(income > 0, loan / income, 0)
+            raw['loan_to_emp_length_ratio'] = np.where(loan > 0, raw['person_emp_length'] / loan, 0)
+            raw['int_rate_to_loan_amt_ratio'] = np.where(loan > 0, raw['loan_int_rate'] / loan, 0)
+
+        index_values = get_column('index')
+        if index_values is not None:
+            out[:, _FEATURE_INDEX['index']], _, invalid = _numeric_column(index_values, n_rows)
+            if invalid is not None:
+                for row in np.flatnonzero(invalid):
+                    errors.setdefault(int(row), "Invalid value for 'index': expected a number")
+        timer.lap('preprocess_2_feature_engineering')
+
+        # ========== STEP 3: Binned Groups ==========
+        # Values outside the bins (or NaN) fall into no group, like 'unknown' did before
+        rows = np.arange(n_rows)
+        for source, bins, positions in self._bin_specs:
+            x = raw[source]
+            ids = np.searchsorted(bins, x, side='left')
+            ids[x == bins[0]] = 1
+            valid = ~np.isnan(x) & (ids > 0) & (ids < len(bins))
+            out[rows[valid], positions[ids[valid] - 1]] = 1.0
+        timer.lap('preprocess_3_binning')
+
+        # ========== STEP 4: One-Hot Encoding ==========
+        for col in CATEGORICAL_INPUTS:
+            values = get_column(col)
+            if values is None:
+                continue
+            lookup = self._onehot_lookup[col]
+            positions = np.fromiter((_lookup(lookup, v) for v in values), dtype=np.intp, count=n_rows)
+            hit = positions >= 0
+            out[rows[hit], positions[hit]] = 1.0
+        timer.lap('preprocess_4_one_hot')
+
+        # ========== STEP 5: Scaling ==========
+        block = np.empty((n_rows, len(SCALER_NUMERIC_COLS)), dtype=np.float64)
+        for j, col in enumerate(SCALER_NUMERIC_COLS):
+            block[:, j] = raw[col]
+        if self._mean is not None:
+            np.subtract(block, self._mean, out=block)
+        if self._scale is not None:
+            np.divide(block, self._scale, out=block)
+        timer.lap('preprocess_5_scaling')
+
+        # ========== STEP 6: Feature Ordering ==========
+        out[:, self._scaled_positions] = block
+        timer.lap('preprocess_6_ordering')
+        return out, errors
+
+
+class PreparedFeatures:
+    """
+    Feature matrix computed once per request and shared by every consumer
+    (PredictService scoring, ShapService explanations) so they see exactly
+    the same values.
+    """
+
+    __slots__ = ('matrix', 'feature_names', 'fingerprint', '_frame')
+
+    def __init__(self, matrix, feature_names=None, fingerprint=None):
+        """
+        Args:
+            matrix (np.ndarray): Preprocessed float64 matrix, one row per record
+            feature_names (list): Column names (defaults to EXPECTED_FEATURES)
+            fingerprint (bytes): record_fingerprint() of the source record, if known
+        """
+        self.matrix = matrix
+        self.feature_names = feature_names or EXPECTED_FEATURES
+        self.fingerprint = fingerprint
+        self._frame = None
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def frame(self):
+        """The matrix as a DataFrame with feature-name columns (built on first access)"""
+        if self._frame is None:
+            import pandas as pd
+            self._frame = pd.DataFrame(self.matrix, columns=self.feature_names)
+        return self._frame
+
+
+def record_fingerprint(data):
+    """
+    Hash of the model-relevant fields of a record
+
+    Records that differ only in other fields (customer_id, timestamps, stored
+    scores) share a fingerprint, because they produce the same features.
+
+    Returns:
+        bytes: 16-byte digest
+    """
+    values = tuple(data.get(field) for field in MODEL_INPUT_FIELDS)
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).digest()
+
+
+def _lookup(mapping, value):
+    """Output column for a categorical value, -1 when unknown"""
+    try:
+        return mapping.get(value, -1)
+    except TypeError:
+        return -1
+
+
+def _column_reader(records):
+    """Return (get_column, n_rows) for a list of dicts or a columnar input"""
+    if isinstance(records, Mapping) or hasattr(records, 'columns'):
+        columns = records
+        names = set(columns.keys())
+        lengths = {len(columns[name]) for name in names}
+        if len(lengths) > 1:
+            raise ValueError("Columnar input has columns of different lengths")
+        n_rows = lengths.pop() if lengths else 0
+
+        def get_column(name):
+            if name not in names:
+                return None
+            values = columns[name]
+            return values.to_numpy() if hasattr(values, 'to_numpy') else values
+        return get_column, n_rows
+
+    rows = records if isinstance(records, list) else list(records)
+
+    def get_column(name):
+        values = [row.get(name) for row in rows]
+        return values if any(name in row for row in rows) else None
+    return get_column, len(rows)
+
+
+def _numeric_column(values, n_rows):
+    """
+    Convert a column to float64
+
+    Returns:
+        tuple: (values, missing, invalid) where missing is a boolean mask of absent
+               (None) entries and invalid a mask of entries that are not numbers
+               (e.g. 'abc' or a list); each is None when no row is affected.
+               Both kinds of entry become NaN. NaN counts as a value.
+    """
+    if values is None:
+        return np.full(n_rows, np.nan), np.ones(n_rows, dtype=bool), None
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiub':
+        return values.astype(np.float64, copy=False), None, None
+    objects = np.asarray(values, dtype=object)
+    if objects.ndim != 1:
+        # List values make np.asarray build a 2-D array; keep one object per row
+        objects = np.empty(n_rows, dtype=object)
+        objects[:] = list(values)
+    missing = np.equal(objects, None)
+    filled = np.where(missing, np.nan, objects) if missing.any() else objects
+    try:
+        converted, invalid = filled.astype(np.float64), None
+    except (TypeError, ValueError):
+        # Convert element by element so one bad value only invalidates its own row
+        import pandas as pd
+        converted = pd.to_numeric(filled, errors='coerce').astype(np.float64)
+        was_nan = np.fromiter((isinstance(v, float) and v != v for v in filled), dtype=bool, count=len(filled))
+        invalid = np.isnan(converted) & ~was_nan
+    return converted, (missing if missing.any() else None), invalid
@@ -0,0 +1,187 @@
+"""
+Micro-batching of concurrent single-record predictions
+
+Each prediction request scores a 1 x 45 matrix, and most of the cost of a
+predict_proba call on one row is fixed per call (input validation, per-tree
+dispatch). With Config.MICRO_BATCH_ENABLED, PredictService.predict() hands
+its row to a MicroBatcher instead: a background thread takes the first
+waiting row, collects whatever else arrives within Config.MICRO_BATCH_WINDOW_MS
+(or until Config.MICRO_BATCH_MAX_SIZE rows), scores them with one call and
+resolves each caller's Future with its own row of the result. Under load,
+rows that queue up while a batch is being scored are picked up without
+waiting for the window at all.
+
+Rows are only batched with rows for the same model bundle, so a model swap
+never mixes versions inside a batch. Exported metrics: the time rows wait
+in the queue ('micro_batch_wait' stage), batches and rows scored, mean batch
+size and the model calls saved.
+"""
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+logger = get_logger(__name__)
+
+# Queued in place of a row to stop the batching thread
+_STOP = object()
+
+# Live batchers; closed ones are dropped as soon as nothing references them
+_batchers = weakref.WeakSet()
+
+
+def _restart_after_fork():
+    """Threads do not survive fork(): give every batcher in the child a fresh queue"""
+    for batcher in list(_batchers):
+        batcher._start()
+
+
+# One hook for the process; per-instance hooks could never be unregistered
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class MicroBatcher:
+    """Collects rows from concurrent callers and scores them in one call"""
+
+    def __init__(self, run_batch, window_ms=None, max_batch_size=None):
+        """
+        Args:
+            run_batch (callable): run_batch(matrix, key) -> (labels, proba) with one
+                entry per matrix row
+            window_ms (float): How long to wait for more rows after the first
+                (defaults to Config.MICRO_BATCH_WINDOW_MS)
+            max_batch_size (int): Rows that end the wait early (defaults to Config.MICRO_BATCH_MAX_SIZE)
+        """
+        self.run_batch = run_batch
+        self.window = (window_ms if window_ms is not None else Config.MICRO_BATCH_WINDOW_MS) / 1000.0
+        self.max_batch_size = max_batch_size or Config.MICRO_BATCH_MAX_SIZE
+        self.counts = {'requests': 0, 'batches': 0, 'rows': 0, 'largest': 0}
+        self._start()
+        _batchers.add(self)
+
+    def _start(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, matrix, key=None):
+        """
+        Queue rows for the next batch
+
+        Args:
+            matrix (np.ndarray): Feature rows (usually one)
+            key: Rows are only batched with rows of the same key (the model bundle)
+
+        Returns:
+            Future: Resolves to (labels, proba) for these rows, or the exception the batch raised
+        """
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                    self._thread.start()
+        future = Future()
+        self._queue.put((time.perf_counter(), matrix, key, future))
+        return future
+
+    def close(self):
+        """Stop the batching thread once the rows already queued are scored"""
+        _batchers.discard(self)
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                stop = self._collect(batch)
+                if batch:
+                    self._execute(batch)
+            except Exception as e:
+                # Never leave a caller waiting on a row the thread gave up on
+                logger.error("✗ Micro-batch of %d requests failed: %s", len(batch), e)
+                for item in batch:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+                stop = False
+            if stop:
+                return
+
+    def _collect(self, batch):
+        """
+        Fill batch with the next waiting rows
+
+        Returns:
+            bool: True when the thread was asked to stop
+        """
+        first = self._queue.get()
+        if first is _STOP:
+            return True
+        batch.append(first)
+        rows = first[1].shape[0]
+        deadline = first[0] + self.window
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the window only what is already queued is taken
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is _STOP:
+                return True
+            batch.append(item)
+            rows += item[1].shape[0]
+        return False
+
+    def _execute(self, batch):
+        """Score a batch, one run_batch call per key, and resolve the callers' futures"""
+        start = time.perf_counter()
+        groups = {}
+        for submitted, matrix, key, future in batch:
+            metrics.observe('micro_batch_wait', start - submitted)
+            groups.setdefault(id(key), []).append((matrix, key, future))
+
+        for items in groups.values():
+            try:
+                matrix = items[0][0] if len(items) == 1 else np.concatenate([item[0] for item in items])
+                labels, proba = self.run_batch(matrix, items[0][1])
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for rows, _, future in items:
+                n = rows.shape[0]
+                future.set_result((labels[offset:offset + n], proba[offset:offset + n]))
+                offset += n
+
+            counts = self.counts
+            counts['requests'] += len(items)
+            counts['batches'] += 1
+            counts['rows'] += offset
+            counts['largest'] = max(counts['largest'], offset)
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        counts = dict(self.counts)
+        return [
+            ('micro_batch_batches_total', 'counter', {}, counts['batches']),
+            ('micro_batch_rows_total', 'counter', {}, counts['rows']),
+            ('micro_batch_model_calls_saved_total', 'counter', {}, counts['requests'] - counts['batches']),
+            ('micro_batch_mean_size', 'gauge', {}, counts['rows'] / counts['batches'] if counts['batches'] else 0.0),
+            ('micro_batch_max_size', 'gauge', {}, counts['largest']),
+        ]
@@ -0,0 +1,190 @@
+"""
+Model bundles - everything one model version needs to serve requests
+
+A ModelBundle holds the unpickled model, its scaler and feature pipeline, the
+optional compiled evaluator and (built on first use) its SHAP explainers.
+PredictService serves from exactly one bundle at a time and replaces it with
+a single reference assignment, so a request that picked up a bundle keeps
+using it to the end even if a new model is swapped in meanwhile.
+"""
+import itertools
+import os
+import pickle
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from app.services.compiled_forest import compile_model
+from app.services.feature_pipeline import FeaturePipeline
+from app.utils.logger import get_logger
+from app.utils.memory import format_memory, memory_usage
+from app.utils.startup import startup_report
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+logger = get_logger(__name__)
+
+_VERSION_DIR = re.compile(r'^version-(\d+)$')
+
+# Default for ModelBundle(engine=...): build the evaluator from the model
+_BUILD_ENGINE = object()
+
+# Numbers every bundle created in this process
+_GENERATIONS = itertools.count(1)
+
+
+class ModelBundle:
+    """One loaded model version with everything derived from it"""
+
+    def __init__(self, model, scaler, version, meta_path=None, engine=_BUILD_ENGINE):
+        """
+        Args:
+            model: Fitted classifier
+            scaler: Fitted StandardScaler used by the feature pipeline
+            version (str): 'name:version' label used in caches and metrics
+            meta_path (str): meta.yaml the model was loaded from, if any
+            engine (CompiledForest): Compiled evaluator already loaded for the
+                model, or None for none (built from the model per
+                Config.INFERENCE_ENGINE if not given)
+        """
+        self.model = model
+        self.scaler = scaler
+        self.pipeline = FeaturePipeline(scaler)
+        self.version = version
+        self.meta_path = meta_path
+        self.engine = build_engine(model) if engine is _BUILD_ENGINE else engine
+        self.loaded_at = time.time()
+        # Result caches are tied to this rather than the version string, so
+        # reloading a retrained model registered under the same name:version
+        # never serves the previous model's cached results
+        self.generation = next(_GENERATIONS)
+        # SHAP explainers by kind ('tree', 'interventional'), built on first use
+        self.explainers = {}
+        self._explainer_lock = threading.Lock()
+
+    def explainer(self, kind, build):
+        """Return the explainer of this kind, building it once with build(bundle)"""
+        explainer = self.explainers.get(kind)
+        if explainer is None:
+            with self._explainer_lock:
+                explainer = self.explainers.get(kind)
+                if explainer is None:
+                    explainer = self.explainers[kind] = build(self)
+        return explainer
+
+
+def build_engine(model):
+    """
+    Compiled evaluator for a model when Config.INFERENCE_ENGINE asks for it
+
+    Returns:
+        CompiledForest: Evaluator verified against model.predict_proba, or
+                        None to call the model directly
+    """
+    if not Config or Config.INFERENCE_ENGINE != 'compiled':
+        return None
+    with startup_report.phase('engine_compile'):
+        return compile_model(model)
+
+
+def resolve_meta_path(path):
+    """
+    meta.yaml to load for Config.MODEL_PATH
+
+    Args:
+        path (str): A meta.yaml file, a version directory, or a registered
+            model directory (mlruns/models/<name>) whose highest version-N wins
+
+    Returns:
+        str: Path of the meta.yaml file
+    """
+    path = Path(path)
+    if path.is_dir():
+        if (path / 'meta.yaml').exists():
+            return str(path / 'meta.yaml')
+        versions = [(int(match.group(1)), child) for child in path.iterdir()
+                    if (match := _VERSION_DIR.match(child.name)) and (child / 'meta.yaml').exists()]
+        if not versions:
+            raise FileNotFoundError(f"No version-N/meta.yaml under {path}")
+        return str(max(versions)[1] / 'meta.yaml')
+    return str(path)
+
+
+def storage_path(storage_location):
+    """
+    Local directory for a meta.yaml storage_location
+
+    Accepts plain paths and file: URIs; 'file:///home/...' stays absolute on
+    POSIX and 'file:///C:/...' becomes 'C:/...' on Windows.
+    """
+    if not storage_location.startswith('file:'):
+        return Path(storage_location)
+    path = unquote(urlparse(storage_location).path)
+    if re.match(r'^/[A-Za-z]:', path):
+        path = path[1:]
+    return Path(path)
+
+
+def load_bundle(meta_path=None, scaler_path=None):
+    """
+    Load a model version described by an mlruns meta.yaml
+
+    Args:
+        meta_path (str): meta.yaml, version or registered model directory
+            (defaults to MODEL_META_PATH / Config.MODEL_PATH)
+        scaler_path (str): Scaler file (defaults to SCALER_MODEL_PATH / Config.SCALER_MODEL_PATH)
+
+    Returns:
+        ModelBundle: The loaded model, scaler and pipeline
+
+    Raises:
+        Exception: If the metadata, model or scaler cannot be loaded
+    """
+    import yaml
+    import joblib
+
+    meta_path = resolve_meta_path(meta_path or os.getenv('MODEL_META_PATH',
+        Config.MODEL_PATH if Config else 'mlruns/models/CreditRiskModel_BgC/version-1/meta.yaml'))
+    logger.info("Loading model from %s", meta_path)
+    with open(meta_path, 'r') as meta_file:
+        meta_data = yaml.safe_load(meta_file)
+    storage_location = meta_data.get('storage_location')
+    if not storage_location:
+        raise FileNotFoundError("Storage location not found in meta.yaml")
+
+    model_file = storage_path(storage_location) / 'model.pkl'
+    if not model_file.exists():
+        raise FileNotFoundError(f"Model file not found at {model_file}")
+
+    version = f"{meta_data.get('name', 'model')}:{meta_data.get('version', 'unknown')}"
+    scaler_path = scaler_path or os.getenv('SCALER_MODEL_PATH',
+        Config.SCALER_MODEL_PATH if Config else 'app/models/scaler.pkl')
+    memory_before = memory_usage()
+
+    if Config and Config.ARTIFACT_CACHE_DIR:
+        # Memory-mapped copies shared by every process on the node
+        from app.services.artifact_cache import load_cached
+        model, scaler, engine = load_cached(model_file, scaler_path, version)
+        logger.info("✓ Model %s and scaler memory-mapped from the artifact cache", version)
+    else:
+        start = time.perf_counter()
+        with open(model_file, 'rb') as f:
+            model = pickle.load(f)
+        startup_report.record('model_load', time.perf_counter() - start)
+        logger.info("✓ Model %s loaded successfully from %s", version, model_file)
+
+        with startup_report.phase('scaler_load'):
+            scaler = joblib.load(scaler_path)
+        logger.info("✓ Scaler loaded successfully from %s", scaler_path)
+        engine = build_engine(model)
+
+    bundle = ModelBundle(model, scaler, version, meta_path=meta_path, engine=engine)
+    if memory_before:
+        logger.info("Memory before loading %s: %s; after: %s",
+                    version, format_memory(memory_before), format_memory(memory_usage()))
+    return bundle
@@ -0,0 +1,302 @@
+"""
+Model manager - replace the served model without restarting
+
+A reload loads the new model version into a fresh ModelBundle next to the one
+being served, builds its SHAP TreeExplainer, warms both on the golden inputs
+(Config.MODEL_VALIDATION_PATH) and validates the results. Only then is the
+bundle swapped into PredictService with a single reference assignment:
+requests already running finish on the old model, new requests get the new
+one, and nothing is dropped. A model that fails to load or validate is
+discarded and the current one keeps serving.
+
+Reloads are triggered by the watcher (Config.MODEL_WATCH_INTERVAL, polling
+Config.MODEL_PATH for a changed meta.yaml or a newer version-N directory) or
+by POST /admin/model/reload. Load and swap durations are recorded as the
+'model_load' and 'model_swap' stages in /metrics.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.services.compiled_forest import PARITY_TOLERANCE
+from app.services.model_bundle import load_bundle, resolve_meta_path
+from app.services.predict_service import PredictService
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+logger = get_logger(__name__)
+
+# Maximum deviation of a row's class probabilities from summing to 1
+PROBABILITY_TOLERANCE = 1e-6
+
+
+class ModelValidationError(Exception):
+    """A newly loaded model failed validation and was not swapped in"""
+
+
+def golden_matrix(bundle, path=None):
+    """
+    Golden inputs preprocessed with the bundle's own pipeline
+
+    Args:
+        bundle (ModelBundle): Bundle to validate
+        path (str): CSV in the credit_risk_records schema (defaults to Config.MODEL_VALIDATION_PATH)
+
+    Returns:
+        np.ndarray: Feature matrix of the rows the pipeline accepts
+    """
+    import pandas as pd
+
+    records = pd.read_csv(path or Config.MODEL_VALIDATION_PATH)
+    matrix, errors = bundle.pipeline.transform_with_errors(records)
+    valid = [row for row in range(matrix.shape[0]) if row not in errors]
+    if not valid:
+        raise ModelValidationError(f"No usable golden inputs in {path or Config.MODEL_VALIDATION_PATH}")
+    return matrix[valid]
+
+
+def validate_bundle(bundle, matrix, reference=None):
+    """
+    Check that a bundle can serve: it takes the serving feature layout and
+    returns finite class probabilities for every golden input
+
+    Args:
+        bundle (ModelBundle): Candidate bundle
+        matrix (np.ndarray): Golden feature matrix (see golden_matrix)
+        reference (ModelBundle): Bundle being served, whose classes must be kept
+
+    Raises:
+        ModelValidationError: Describing the first failed check
+    """
+    model = bundle.model
+    n_features = getattr(model, 'n_features_in_', matrix.shape[1])
+    if n_features != matrix.shape[1]:
+        raise ModelValidationError(f"Model expects {n_features} features, the pipeline produces {matrix.shape[1]}")
+
+    classes = getattr(model, 'classes_', None)
+    if classes is None or len(classes) != 2:
+        raise ModelValidationError(f"Expected a binary classifier, got classes {classes}")
+    if reference is not None and list(classes) != list(reference.model.classes_):
+        raise ModelValidationError(f"Classes {list(classes)} differ from the served model's "
+                                   f"{list(reference.model.classes_)}")
+
+    try:
+        proba = model.predict_proba(matrix)
+        if bundle.engine is not None:
+            # Also runs the compiled evaluator once on real rows
+            compiled = bundle.engine.predict_proba(matrix)
+    except Exception as e:
+        raise ModelValidationError(f"Scoring the golden inputs failed: {e}") from e
+
+    if proba.shape != (matrix.shape[0], 2) or not np.isfinite(proba).all():
+        raise ModelValidationError("Model returned missing or non-finite probabilities")
+    if (proba < 0).any() or (proba > 1).any() or \
+            np.abs(proba.sum(axis=1) - 1.0).max() > PROBABILITY_TOLERANCE:
+        raise ModelValidationError("Model returned probabilities outside [0, 1] or not summing to 1")
+    if bundle.engine is not None and np.abs(compiled - proba).max() > PARITY_TOLERANCE:
+        raise ModelValidationError("Compiled evaluator disagrees with the model on the golden inputs")
+
+
+class ModelManager:
+    """Loads, validates and swaps in new model versions in the background"""
+
+    _instance = None
+
+    def __new__(cls):
+        """Singleton pattern"""
+        if cls._instance is None:
+            cls._instance = super(ModelManager, cls).__new__(cls)
+            cls._instance._reload_lock = threading.Lock()
+            cls._instance._reloads = {'success': 0, 'failure': 0}
+            cls._instance._last_reload = None
+            cls._instance._watcher = None
+            cls._instance._stop = threading.Event()
+            cls._instance._signature = None
+            metrics.register_collector(cls._instance.collect_metrics)
+        return cls._instance
+
+    @staticmethod
+    def model_source():
+        """Configured meta.yaml, version or registered model directory"""
+        return os.getenv('MODEL_META_PATH', Config.MODEL_PATH)
+
+    def _prepare(self, bundle, reference):
+        """Validate a freshly loaded bundle and warm its prediction and SHAP paths"""
+        from app.services.feature_pipeline import PreparedFeatures
+        from app.services.shap_service import ShapService
+
+        matrix = golden_matrix(bundle)
+        validate_bundle(bundle, matrix, reference)
+
+        # Build and warm the explainer now, so the first explained request
+        # after the swap does not pay for it. Models SHAP cannot explain still
+        # serve predictions (explanations come back empty), as at startup.
+        try:
+            ShapService().calibrate(PreparedFeatures(matrix[:1]), bundle)
+        except Exception as e:
+            logger.warning("✗ Could not warm the SHAP explainer for %s: %s", bundle.version, e)
+
+    def reload(self, meta_path=None, reason='manual'):
+        """
+        Load a model version and swap it in once it is validated and warm
+
+        Args:
+            meta_path (str): meta.yaml, version or registered model directory
+                (defaults to the configured MODEL_META_PATH / Config.MODEL_PATH)
+            reason (str): What triggered the reload (logged and reported in status())
+
+        Returns:
+            ModelBundle: The bundle now being served
+
+        Raises:
+            Exception: If loading or validation fails; the served model is unchanged
+        """
+        with self._reload_lock:
+            predict_service = PredictService()
+            reference = predict_service.bundle
+            start = time.perf_counter()
+            logger.info("Reloading model (%s)", reason)
+            try:
+                bundle = load_bundle(meta_path or self.model_source())
+                self._prepare(bundle, reference)
+            except Exception as e:
+                load_seconds = time.perf_counter() - start
+                metrics.observe('model_load', load_seconds, error=True)
+                self._finish(reason, 'failure', load_seconds=load_seconds, error=str(e))
+                logger.error("✗ Model reload (%s) failed, keeping %s: %s",
+                             reason, predict_service.model_version, e)
+                raise
+            load_seconds = time.perf_counter() - start
+            metrics.observe('model_load', load_seconds, model_version=bundle.version)
+
+            swap_start = time.perf_counter()
+            previous = predict_service.swap(bundle)
+            swap_seconds = time.perf_counter() - swap_start
+            metrics.observe('model_swap', swap_seconds, model_version=bundle.version)
+
+            self._finish(reason, 'success', version=bundle.version,
+                         load_seconds=load_seconds, swap_seconds=swap_seconds)
+            logger.info("✓ Swapped model %s -> %s (%s; loaded in %.2fs, swapped in %.1fus)",
+                        previous.version if previous else None, bundle.version, reason,
+                        load_seconds, swap_seconds * 1e6)
+            return bundle
+
+    def _finish(self, reason, result, **details):
+        self._reloads[result] += 1
+        self._last_reload = dict(details, reason=reason, result=result, finished_at=time.time())
+
+    def reload_async(self, meta_path=None, reason='admin'):
+        """
+        Start reload() in a background thread
+
+        Returns:
+            bool: False if a reload is already running
+        """
+        if self._reload_lock.locked():
+            return False
+
+        def run():
+            try:
+                self.reload(meta_path, reason)
+            except Exception:
+                pass  # logged and recorded by reload()
+
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
+        return True
+
+    def _current_signature(self):
+        """(meta.yaml path, mtime) the configured source resolves to now"""
+        meta_path = resolve_meta_path(self.model_source())
+        return meta_path, os.stat(meta_path).st_mtime_ns
+
+    def check_for_update(self):
+        """
+        Reload if the configured source now resolves to another meta.yaml
+        (e.g. a newly registered version-N) or the meta.yaml was rewritten
+
+        Returns:
+            bool: True if a reload was attempted
+        """
+        signature = self._current_signature()
+        if self._signature is None:
+            self._signature = signature
+            return False
+        if signature == self._signature:
+            return False
+        # Remembered even if the reload fails, so a bad model is tried once per change
+        self._signature = signature
+        try:
+            self.reload(signature[0], reason='watch')
+        except Exception:
+            pass  # logged and recorded by reload()
+        return True
+
+    def start_watcher(self, interval=None):
+        """
+        Poll the configured model source every interval seconds in a daemon thread
+
+        Args:
+            interval (float): Seconds between checks (defaults to Config.MODEL_WATCH_INTERVAL; 0 = off)
+
+        Returns:
+            bool: True if the watcher is running
+        """
+        interval = Config.MODEL_WATCH_INTERVAL if interval is None else interval
+        if interval <= 0:
+            return False
+        if self._watcher is not None and self._watcher.is_alive():
+            return True
+        try:
+            self._signature = self._current_signature()
+        except Exception as e:
+            logger.warning("Model watcher: cannot read %s yet: %s", self.model_source(), e)
+            self._signature = None
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='model-watcher', daemon=True)
+        self._watcher.start()
+        logger.info("✓ Watching %s for new model versions every %gs", self.model_source(), interval)
+        return True
+
+    def stop_watcher(self):
+        """Stop the watcher thread, if running"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                logger.warning("Model watcher: %s", e)
+
+    def status(self):
+        """Served model and last reload, for GET /admin/model"""
+        bundle = PredictService().bundle
+        return {
+            'model_version': bundle.version if bundle else None,
+            'meta_path': bundle.meta_path if bundle else None,
+            'loaded_at': bundle.loaded_at if bundle else None,
+            'reloading': self._reload_lock.locked(),
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+            'reloads': dict(self._reloads),
+            'last_reload': self._last_reload,
+        }
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        samples = [('model_reloads_total', 'counter', {'result': result}, count)
+                   for result, count in self._reloads.items()]
+        bundle = PredictService().bundle
+        if bundle is not None:
+            samples.append(('model_loaded_timestamp_seconds', 'gauge',
+                            {'model_version': bundle.version}, float(bundle.loaded_at)))
+        return samples
@@ -1,125 +1,228 @@
 """
-ML Prediction Service - STANDALONE All preprocessing logic built-in
+ML Prediction Service - model loading and inference
+(feature preprocessing is implemented in feature_pipeline.py)
 """
-import os
-import pickle
-import pandas as pd
 import numpy as np
-from pathlib import Path
 import warnings
+from concurrent.futures import TimeoutError as FutureTimeoutError
 warnings.filterwarnings('ignore')
-import yaml
-from sklearn.preprocessing import OneHotEncoder, MinMaxScaler, StandardScaler, RobustScaler
-import joblib
+from app.utils.metrics import metrics
+from app.utils.cache import LRUCache
+from app.utils.logger import get_logger, trace_enabled, trace_logger
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_bundle import load_bundle
+from app.services.shadow_scorer import ShadowScorer
+from app.services.feature_pipeline import (
+    PreparedFeatures, record_fingerprint,
+    CATEGORICAL_COLS, NUMERIC_COLS, EXPECTED_FEATURES, N_ONE_HOT
+)
 
 try:
     from app.config.settings import Config
 except Exception:
     Config = None
 
+logger = get_logger(__name__)
+
 class PredictService:
     """Service for loading ML models and making predictions"""
     
     _instance = None
-    _model = None
-    _scaler = None
-    _model_loaded = False
+    # ModelBundle being served; replaced as a whole by swap()
+    _bundle = None
     _model_load_error = None
+    _prediction_cache = None
+    # ShadowScorer for the challenger model, when Config.SHADOW_MODEL_PATH is set
+    _shadow = None
+    # MicroBatcher shared by concurrent predict() calls, when enabled
+    _batcher = None
     
-    # Categorical columns used in the training data
-    CATEGORICAL_COLS = [
-        'cb_person_default_on_file',
-        'loan_grade',
-        'person_home_ownership',
-        'loan_intent',
-        'age_group',
-        'income_group',
-        'loan_amount_group'
-    ]
-    
-    # These are the numeric columns to scale
-    NUMERIC_COLS = [
-        'index',
-        'person_age',
-        'person_income',
-        'person_emp_length',
-        'loan_amnt',
-        'loan_int_rate',
-        'cb_person_cred_hist_length',
-        'loan_percent_income',
-        'loan_to_income_ratio',
-        'loan_to_emp_length_ratio',
-        'int_rate_to_loan_amt_ratio'
-    ]
-    
-    # Column order after one-hot encoding (MUST match your training data exactly)
-    EXPECTED_FEATURES = ['cb_person_default_on_file_N', 'cb_person_default_on_file_Y',
-       'loan_grade_A', 'loan_grade_B', 'loan_grade_C', 'loan_grade_D',
-       'loan_grade_E', 'loan_grade_F', 'loan_grade_G',
-       'person_home_ownership_MORTGAGE', 'person_home_ownership_OTHER',
-       'person_home_ownership_OWN', 'person_home_ownership_RENT',
-       'loan_intent_DEBTCONSOLIDATION', 'loan_intent_EDUCATION',
-       'loan_intent_HOMEIMPROVEMENT', 'loan_intent_MEDICAL',
-       'loan_intent_PERSONAL', 'loan_intent_VENTURE', 'income_group_high',
-       'income_group_high-middle', 'income_group_low',
-       'income_group_low-middle', 'income_group_middle', 'age_group_20-25',
-       'age_group_26-35', 'age_group_36-45', 'age_group_46-55',
-       'age_group_56-65', 'age_group_nan', 'loan_amount_group_large',
-       'loan_amount_group_medium', 'loan_amount_group_small',
-       'loan_amount_group_very large', 'index', 'person_age', 'person_income',
-       'person_emp_length', 'loan_amnt', 'loan_int_rate',
-       'loan_percent_income', 'cb_person_cred_hist_length',
-       'loan_to_income_ratio', 'loan_to_emp_length_ratio',
-       'int_rate_to_loan_amt_ratio']
+    # Feature layout lives with the vectorized pipeline; kept here for existing callers
+    CATEGORICAL_COLS = CATEGORICAL_COLS
+    NUMERIC_COLS = NUMERIC_COLS
+    EXPECTED_FEATURES = EXPECTED_FEATURES
     
     def __new__(cls):
         """Singleton pattern"""
         if cls._instance is None:
             cls._instance = super(PredictService, cls).__new__(cls)
+            if Config and Config.RESULT_CACHE_ENABLED:
+                cls._prediction_cache = LRUCache('prediction', Config.RESULT_CACHE_MAX_BYTES, Config.RESULT_CACHE_TTL)
+                metrics.register_collector(cls._prediction_cache.collect_metrics)
             cls._instance.load_model()
+            if Config and Config.SHADOW_MODEL_PATH:
+                cls._instance.load_shadow(Config.SHADOW_MODEL_PATH)
+            if Config and Config.MICRO_BATCH_ENABLED:
+                cls._instance.enable_micro_batching()
         return cls._instance
     
     def load_model(self):
         """Load the trained ML model dynamically using meta.yaml"""
-        if self._model_loaded:
+        if self._bundle is not None:
             return
         
         try:
-            model_meta_path = os.getenv('MODEL_META_PATH', 
-                Config.MODEL_PATH if Config else 'mlruns/models/CreditRiskModel_BgC/version-1/meta.yaml')
-            print(f"model path taken {model_meta_path}")
-            with open(model_meta_path, 'r') as meta_file:
-                meta_data = yaml.safe_load(meta_file)
-                storage_location = meta_data.get('storage_location')
-
-            if not storage_location:
-                raise FileNotFoundError("Storage location not found in meta.yaml")
-
-            storage_path = Path(storage_location.replace('file:///', ''))
-            model_file = storage_path / 'model.pkl'
-
-            if model_file.exists():
-                with open(model_file, 'rb') as f:
-                    self._model = pickle.load(f)
-                self._model_loaded = True
-                print(f"✓ Model loaded successfully from {model_file}")
-            else:
-                raise FileNotFoundError(f"Model file not found at {model_file}")
-            
-            # Load scaler
-            scaler_model_path = os.getenv('SCALER_MODEL_PATH', 
-                Config.SCALER_MODEL_PATH if Config else 'app/models/scaler.pkl')
-            self._scaler = joblib.load(scaler_model_path)
-            print(f"✓ Scaler loaded successfully from {scaler_model_path}")
-
+            self.swap(load_bundle())
         except Exception as e:
             self._model_load_error = str(e)
-            print(f"✗ Error loading model: {e}")
-            self._model_loaded = False
+            logger.error("✗ Error loading model: %s", e)
+    
+    def swap(self, bundle):
+        """
+        Start serving from another model bundle
+        
+        The bundle is published with one reference assignment. Calls already
+        running finish with the bundle they started with; calls made after
+        this returns use the new one.
+        
+        Args:
+            bundle (ModelBundle): Loaded (and ideally validated and warmed) model
+        
+        Returns:
+            ModelBundle: The bundle that was being served, or None
+        """
+        previous = self._bundle
+        if self._prediction_cache is not None:
+            self._prediction_cache.ensure_generation(bundle.generation)
+        self._bundle = bundle
+        self._model_load_error = None
+        metrics.set_model_version(bundle.version)
+        return previous
+    
+    def load_shadow(self, meta_path, **options):
+        """
+        Load a challenger model that shadow-scores live predictions
+        
+        Args:
+            meta_path (str): meta.yaml, version or registered model directory
+            **options: ShadowScorer settings (log_dir, queue_size, batch_rows, flush_interval)
+        
+        Returns:
+            ShadowScorer: The running scorer, or None if the challenger could not be loaded
+        """
+        try:
+            bundle = load_bundle(meta_path)
+            n_features = getattr(bundle.model, 'n_features_in_', len(EXPECTED_FEATURES))
+            if n_features != len(EXPECTED_FEATURES):
+                raise ValueError(f"Challenger expects {n_features} features, not {len(EXPECTED_FEATURES)}")
+            scorer = ShadowScorer(bundle, **options)
+        except Exception as e:
+            logger.error("✗ Error loading shadow model: %s", e)
+            return None
+        
+        # One collector for whichever scorer is current, so replaced scorers are not exported
+        metrics.register_collector(self._collect_shadow_metrics)
+        previous, self._shadow = self._shadow, scorer
+        if previous is not None:
+            previous.close()
+        logger.info("✓ Shadow scoring live predictions with challenger %s", bundle.version)
+        return scorer
+    
+    def _collect_shadow_metrics(self):
+        shadow = self._shadow
+        return shadow.collect_metrics() if shadow is not None else []
+    
+    def enable_micro_batching(self, window_ms=None, max_batch_size=None):
+        """
+        Score concurrent predict() calls together (see app/services/micro_batcher.py)
+        
+        Args:
+            window_ms (float): Wait for more rows after the first (defaults to Config.MICRO_BATCH_WINDOW_MS)
+            max_batch_size (int): Rows per model call (defaults to Config.MICRO_BATCH_MAX_SIZE)
+        
+        Returns:
+            MicroBatcher: The batcher now used by predict()
+        """
+        self.disable_micro_batching()
+        batcher = MicroBatcher(self._infer, window_ms, max_batch_size)
+        metrics.register_collector(self._collect_batch_metrics)
+        self._batcher = batcher
+        logger.info("✓ Micro-batching predictions (window %.1f ms, up to %d rows)",
+                    batcher.window * 1000, batcher.max_batch_size)
+        return batcher
+    
+    def disable_micro_batching(self):
+        """Go back to one model call per predict(); rows already queued are still scored"""
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+    
+    def _collect_batch_metrics(self):
+        batcher = self._batcher
+        return batcher.collect_metrics() if batcher is not None else []
+    
+    @property
+    def shadow(self):
+        """The ShadowScorer running the challenger model, or None"""
+        return self._shadow
+    
+    @property
+    def bundle(self):
+        """The ModelBundle being served, or None when no model is loaded"""
+        return self._bundle
     
     def is_model_loaded(self):
         """Check if model is loaded"""
-        return self._model_loaded
+        return self._bundle is not None
+    
+    @property
+    def model_version(self):
+        """Registered model name and version from meta.yaml (e.g. 'CreditRiskModel_RF:11')"""
+        bundle = self._bundle
+        return bundle.version if bundle is not None else None
+    
+    def _get_pipeline(self, bundle=None):
+        """Return the feature pipeline of the given bundle or the one being served"""
+        bundle = bundle or self._bundle
+        if bundle is None:
+            raise RuntimeError(f"Model not loaded: {self._model_load_error or 'not found'}")
+        return bundle.pipeline
+    
+    def preprocess_batch(self, records, bundle=None):
+        """
+        Preprocess many records at once into the model feature matrix
+        
+        Args:
+            records: List of dicts, or a columnar mapping / DataFrame
+            bundle (ModelBundle): Bundle whose scaler to use (defaults to the one being served)
+        
+        Returns:
+            np.ndarray: float64 matrix in EXPECTED_FEATURES column order
+        """
+        return self._get_pipeline(bundle).transform(records)
+    
+    def prepare(self, data, bundle=None):
+        """
+        Preprocess one record into features that predict() and
+        ShapService.explain() can both consume without recomputing them
+        
+        Args:
+            data (dict): Input data
+            bundle (ModelBundle): Bundle whose scaler to use (defaults to the one being served)
+        
+        Returns:
+            PreparedFeatures: Single-row feature matrix in EXPECTED_FEATURES order
+        """
+        if isinstance(data, PreparedFeatures):
+            return data
+        
+        # Steps 1-6 (input, feature engineering, binning, OHE, scaling, ordering)
+        # run vectorized in FeaturePipeline
+        features = PreparedFeatures(self.preprocess_batch([data], bundle), self.EXPECTED_FEATURES,
+                                    fingerprint=record_fingerprint(data))
+        
+        if trace_enabled():
+            self._trace_features(features, bundle or self._bundle)
+        
+        return features
+    
+    def _trace_features(self, features, bundle):
+        """Log the prepared feature vector (only called when tracing is on)"""
+        row = features.matrix[0]
+        active = [name for name, value in zip(self.EXPECTED_FEATURES[:N_ONE_HOT], row[:N_ONE_HOT]) if value]
+        numeric = {name: round(float(value), 6) for name, value in zip(self.EXPECTED_FEATURES[N_ONE_HOT:], row[N_ONE_HOT:])}
+        trace_logger.debug("Preprocessed features: shape=%s scaled=%s one-hot=%s numeric=%s",
+                           features.matrix.shape, bundle.scaler is not None, active, numeric)
     
     def preprocess_data(self, data):
         """
@@ -132,261 +235,325 @@ class PredictService:
         Returns:
             pd.DataFrame: Preprocessed dataframe ready for model prediction
         """
-        print("\n" + "="*70)
-        print("PREPROCESSING PIPELINE")
-        print("="*70)
-        
-        # ========== STEP 1: Convert to DataFrame ==========
-        df = pd.DataFrame([data])
-        print(f"\n1. INPUT DATA")
-        print(f"   Shape: {df.shape}")
-        
-        # ========== STEP 2: Feature Engineering ==========
-        print(f"\n2. FEATURE ENGINEERING")
-        
-        # Age groups
-        if 'person_age' in df.columns:
-            df['age_group'] = pd.cut(
-                df['person_age'],
-                bins=[20, 26, 36, 46, 56, 66],
-                labels=['20-25', '26-35', '36-45', '46-55', '56-65'],
-                include_lowest=True
-            )
-            # Handle values outside bins
-            df['age_group'] = df['age_group'].astype('object')
-            print(f"   ✓ Created age_group: {df['age_group'].values[0]}")
-        
-        # Income groups
-        if 'person_income' in df.columns:
-            df['income_group'] = pd.cut(
-                df['person_income'],
-                bins=[0, 25000, 50000, 75000, 100000, float('inf')],
-                labels=['low', 'low-middle', 'middle', 'high-middle', 'high'],
-                include_lowest=True
-            )
-            df['income_group'] = df['income_group'].astype('object')
-            print(f"   ✓ Created income_group: {df['income_group'].values[0]}")
-        
-        # Loan amount groups
-        if 'loan_amnt' in df.columns:
-            df['loan_amount_group'] = pd.cut(
-                df['loan_amnt'],
-                bins=[0, 5000, 10000, 15000, float('inf')],
-                labels=['small', 'medium', 'large', 'very large'],
-                include_lowest=True
-            )
-            df['loan_amount_group'] = df['loan_amount_group'].astype('object')
-            print(f"   ✓ Created loan_amount_group: {df['loan_amount_group'].values[0]}")
-        
-        # Create ratios (protect against division by zero)
-        if 'loan_amnt' in df.columns and 'person_income' in df.columns:
-            df['loan_to_income_ratio'] = np.where(
-                df['person_income'] > 0,
-                df['loan_amnt'] / df['person_income'],
-                0
-            )
-            print(f"   ✓ Created loan_to_income_ratio: {df['loan_to_income_ratio'].values[0]:.4f}")
-        
-        if 'person_emp_length' in df.columns and 'loan_amnt' in df.columns:
-            df['loan_to_emp_length_ratio'] = np.where(
-                df['loan_amnt'] > 0,
-                df['person_emp_length'] / df['loan_amnt'],
-                0
-            )
-            print(f"   ✓ Created loan_to_emp_length_ratio: {df['loan_to_emp_length_ratio'].values[0]:.4f}")
-        
-        if 'loan_int_rate' in df.columns and 'loan_amnt' in df.columns:
-            df['int_rate_to_loan_amt_ratio'] = np.where(
-                df['loan_amnt'] > 0,
-                df['loan_int_rate'] / df['loan_amnt'],
-                0
-            )
-            print(f"   ✓ Created int_rate_to_loan_amt_ratio: {df['int_rate_to_loan_amt_ratio'].values[0]:.6f}")
-        
-        # ========== STEP 3: Handle Missing Values ==========
-        print(f"\n3. HANDLING MISSING VALUES")
-        for col in df.columns:
-            if df[col].isna().any():
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    median_val = df[col].median()
-                    df[col].fillna(median_val, inplace=True)
-                    print(f"   ✓ {col}: filled with median")
-                else:
-                    df[col].fillna('unknown', inplace=True)
-                    print(f"   ✓ {col}: filled with 'unknown'")
-               
-        # ========== STEP 4: One-Hot Encoding ==========
-        print(f"\n4. ONE-HOT ENCODING")
-        
-        # Define valid categories for each categorical column
-        categories = {
-            'cb_person_default_on_file': ['N', 'Y'],
-            'loan_grade': ['A', 'B', 'C', 'D', 'E', 'F', 'G'],
-            'person_home_ownership': ['MORTGAGE', 'OTHER', 'OWN', 'RENT'],
-            'loan_intent': ['DEBTCONSOLIDATION', 'EDUCATION', 'HOMEIMPROVEMENT', 'MEDICAL', 'PERSONAL', 'VENTURE'],
-            'income_group': ['high', 'high-middle', 'low', 'low-middle', 'middle'],
-            'age_group': ['20-25', '26-35', '36-45', '46-55', '56-65', 'nan'],
-            'loan_amount_group': ['large', 'medium', 'small', 'very large']
-        }
+        return self.prepare(data).frame
+    
+    def _infer(self, matrix, bundle=None):
+        """
+        Run the model once and derive class labels from its probabilities
         
-        # Create OneHotEncoder with specified categories
-        ohe = OneHotEncoder(
-            categories=[categories[col] for col in self.CATEGORICAL_COLS],
-            sparse_output=False,
-            handle_unknown='ignore'
-        )
+        With no DECISION_THRESHOLD configured the label is the most probable
+        class, which is exactly what the model's own predict() returns. With a
+        threshold, the positive class is chosen when its probability reaches it.
         
-        # Ensure categorical columns exist
-        for col in self.CATEGORICAL_COLS:
-            if col not in df.columns:
-                df[col] = 'unknown'
+        Args:
+            matrix (np.ndarray): Preprocessed feature matrix
+            bundle (ModelBundle): Model to run (defaults to the one being served)
         
-        try:
-            # Apply OHE
-            ohe_transformed = ohe.fit_transform(df[self.CATEGORICAL_COLS])
-            ohe_feature_names = ohe.get_feature_names_out(self.CATEGORICAL_COLS)
-            ohe_data = pd.DataFrame(ohe_transformed, columns=ohe_feature_names)
-            
-            print(f"   ✓ OHE created {len(ohe_feature_names)} binary features")
-            
-            # Get numeric features (excluding categorical columns)
-            numeric_features = df.drop(columns=self.CATEGORICAL_COLS, errors='ignore')
-            df_encoded = pd.concat([ohe_data, numeric_features], axis=1)
-            
-        except Exception as e:
-            print(f"   ✗ OHE Error: {e}")
-            raise
+        Returns:
+            tuple: (labels, proba) arrays, one row per input row
+        """
+        bundle = bundle or self._bundle
+        engine = bundle.engine
+        max_engine_rows = Config.COMPILED_ENGINE_MAX_ROWS if Config else 256
+        with metrics.timer('inference'):
+            if engine is not None and matrix.shape[0] <= max_engine_rows:
+                proba = engine.predict_proba(matrix)
+            else:
+                proba = bundle.model.predict_proba(matrix)
+        classes = bundle.model.classes_
+        threshold = Config.DECISION_THRESHOLD if Config else None
         
-        # ========== STEP 5: Apply Scaling ==========
-        print(f"\n5. FEATURE SCALING")       
-
-        df_scaled = df_encoded.copy()
-
-        # Use FIXED training statistics (you need to save these from training)
-        # training_stats = {
-        #     'person_age': {'mean': 27.73, 'std': 6.35},
-        #     'person_income': {'mean': 66074.0, 'std': 61995.0},
-        #     'person_emp_length': {'mean': 4.79, 'std': 4.14},
-        #     'loan_amnt': {'mean': 9589.0, 'std': 6248.0},
-        #     'loan_int_rate': {'mean': 11.01, 'std': 3.24},
-        #     'cb_person_cred_hist_length': {'mean': 5.80, 'std': 4.06},
-        #     'loan_percent_income': {'mean': 0.17, 'std': 0.10},
-        #     'loan_to_income_ratio': {'mean': 0.17, 'std': 0.10},
-        #     'loan_to_emp_length_ratio': {'mean': 0.0008, 'std': 0.0012},
-        #     'int_rate_to_loan_amt_ratio': {'mean': 0.0014, 'std': 0.0008}
-        # }
-
-        cols_to_scale = [col for col in self.NUMERIC_COLS if col in df_scaled.columns and col != 'index']
-
-        # for col in cols_to_scale:
-        #     if col in df_scaled.columns and col in training_stats:
-        #         stats = training_stats[col]
-        #         df_scaled[col] = (df_scaled[col] - stats['mean']) / stats['std']
-        #         print(f"   ✓ Scaled {col} using training stats")
-
-        # # Apply the pre-loaded scaler
-        # CORRECT order - NO 'index'
-        SCALER_NUMERIC_COLS = [
-            'person_income',
-            'person_age',
-            
-            'person_emp_length',
-            'loan_amnt',
-            'loan_int_rate',
-            'cb_person_cred_hist_length',
-            'loan_percent_income',
-            'loan_to_emp_length_ratio',
-            'int_rate_to_loan_amt_ratio'
-        ]
-    #     ['person_income','person_age','person_emp_length', 'loan_amnt',
-    #      'loan_int_rate','cb_person_cred_hist_length',
-    #      'loan_percent_income', 
-    #      'loan_to_income_ratio','loan_to_emp_length_ratio',
-    #    'int_rate_to_loan_amt_ratio']
-
-
-        if self._scaler is not None:
-            df_scaled[SCALER_NUMERIC_COLS] = self._scaler.transform(df_scaled[SCALER_NUMERIC_COLS])
-            print(f"   ✓ Applied StandardScaler to {len(SCALER_NUMERIC_COLS)} numeric columns")
+        if threshold is None or proba.shape[1] != 2:
+            labels = classes.take(np.argmax(proba, axis=1))
         else:
-            print(f"   ✗ Scaler not loaded, skipping scaling")
-
+            labels = np.where(proba[:, 1] >= threshold, classes[1], classes[0])
+        return labels, proba
+    
+    def cache_key(self, data, bundle=None):
+        """
+        Result-cache key for a record: (input fingerprint, model version, bundle generation)
         
-        # ========== STEP 6: Feature Selection & Ordering ==========
-        print(f"\n6. FINAL FEATURE SELECTION")
+        Args:
+            data (dict | PreparedFeatures): Record or prepared features
+            bundle (ModelBundle): Bundle to key on (defaults to the one being served)
         
-        # Add missing columns with 0 values
-        for col in self.EXPECTED_FEATURES:
-            if col not in df_scaled.columns:
-                df_scaled[col] = 0
+        Returns:
+            tuple: Cache key, or None when the input cannot be fingerprinted
+        """
+        if isinstance(data, PreparedFeatures):
+            fingerprint = data.fingerprint
+        elif isinstance(data, dict):
+            fingerprint = record_fingerprint(data)
+        else:
+            fingerprint = None
+        bundle = bundle or self._bundle
+        if fingerprint is None or bundle is None:
+            return None
+        return (fingerprint, bundle.version, bundle.generation)
+    
+    def cached_prediction(self, data):
+        """
+        Result-cache hit for a record, looked up before any preprocessing
         
-        # Select only expected columns in correct order
-        df_final = df_scaled[self.EXPECTED_FEATURES]
+        Args:
+            data (dict | PreparedFeatures): Record or prepared features
         
-        print(f"   ✓ Final feature matrix shape: {df_final.shape}")
-        print(f"   ✓ Expected columns: {len(self.EXPECTED_FEATURES)}")
-        print(f"   ✓ Match: {df_final.shape[1] == len(self.EXPECTED_FEATURES)}")
+        Returns:
+            dict: Prediction results in the predict() shape, or None on a miss
+                  (or when no model is loaded or the cache is disabled)
+        """
+        cache = self._prediction_cache
+        bundle = self._bundle
+        if cache is None or bundle is None:
+            return None
+        key = self.cache_key(data, bundle)
+        cached = cache.get(key) if key is not None else None
+        return dict(cached) if cached is not None else None
+    
+    def stored_prediction(self, record):
+        """
+        Prediction precomputed by app.jobs.score_records, if still valid
         
-        print("\n" + "="*70)
-        print("PREPROCESSING COMPLETE")
-        print("="*70 + "\n")
+        Args:
+            record (dict): Row from credit_risk_records
         
-        return df_final
+        Returns:
+            dict: Prediction results in the predict() shape, or None when the row
+                  was not scored by the currently loaded model version
+        """
+        model_version = self.model_version
+        if (model_version is None or record.get('risk_score') is None
+                or record.get('prediction') is None
+                or record.get('model_version') != model_version):
+            return None
+        
+        risk_score = float(record['risk_score'])
+        return {
+            'prediction': int(record['prediction']),
+            'risk_score': round(risk_score, 4),
+            'risk_category': record.get('risk_category'),
+            'probability_default': round(risk_score, 4),
+            'probability_no_default': round(1.0 - risk_score, 4)
+        }
+    
+    @staticmethod
+    def _error_result(message):
+        """Prediction-shaped result for a record that could not be scored"""
+        return {
+            'error': message,
+            'risk_score': None,
+            'risk_category': 'Unknown',
+            'prediction': None
+        }
+    
+    @staticmethod
+    def _build_result(prediction, prediction_proba):
+        """
+        Build the prediction response for one record
+        
+        Args:
+            prediction: Predicted class label
+            prediction_proba: Class probabilities for the record
+        
+        Returns:
+            dict: Prediction results
+        """
+        # Calculate risk score
+        risk_score = float(prediction_proba[1] if len(prediction_proba) > 1 else prediction_proba[0])
+        
+        # Categorize risk
+        if risk_score < 0.3:
+            risk_category = 'Low'
+        elif risk_score < 0.6:
+            risk_category = 'Medium'
+        else:
+            risk_category = 'High'
+        
+        return {
+            'prediction': int(prediction),
+            'risk_score': round(risk_score, 4),
+            'risk_category': risk_category,
+            'probability_default': round(risk_score, 4),
+            'probability_no_default': round(float(prediction_proba[0]), 4)
+        }
     
     def predict(self, data):
         """
         Predict credit risk for given data
         
         Args:
-            data (dict): Input features dictionary
+            data (dict | PreparedFeatures): Input features dictionary, or
+                features already prepared for this request by prepare()
         
         Returns:
             dict: Prediction results
         """
-        if not self._model_loaded:
-            return {
-                'error': f"Model not loaded: {self._model_load_error or 'not found'}",
-                'risk_score': None,
-                'risk_category': 'Unknown',
-                'prediction': None
-            }
+        bundle = self._bundle
+        if bundle is None:
+            return self._error_result(f"Model not loaded: {self._model_load_error or 'not found'}")
+        
+        cache = self._prediction_cache
+        key = self.cache_key(data, bundle) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return dict(cached)
         
         try:
-            # Preprocess data
-            processed_df = self.preprocess_data(data)
+            # Preprocess data (no-op when the request already prepared it)
+            features = self.prepare(data, bundle)
 
             # Make prediction
-            prediction = self._model.predict(processed_df)[0]
-            prediction_proba = self._model.predict_proba(processed_df)[0]
-            
-            print("Pediction ",prediction)
-            print("Prediction probability ",prediction_proba)
-            # Calculate risk score
-            risk_score = float(prediction_proba[1] if len(prediction_proba) > 1 else prediction_proba[0])
-            
-            # Categorize risk
-            if risk_score < 0.3:
-                risk_category = 'Low'
-            elif risk_score < 0.6:
-                risk_category = 'Medium'
+            batcher = self._batcher
+            if batcher is not None:
+                labels, proba = self._infer_batched(batcher, features.matrix, bundle)
             else:
-                risk_category = 'High'
+                labels, proba = self._infer(features.matrix, bundle)
+            if self._shadow is not None:
+                self._shadow.submit(features.matrix, proba, bundle.version)
+            prediction = labels[0]
+            prediction_proba = proba[0]
             
-            result = {
-                'prediction': int(prediction),
-                'risk_score': round(risk_score, 4),
-                'risk_category': risk_category,
-                'probability_default': round(risk_score, 4),
-                'probability_no_default': round(float(prediction_proba[0]), 4)
-            }
+            result = self._build_result(prediction, prediction_proba)
             
-            print(f"✓ PREDICTION SUCCESSFUL")
-            print(f"  Prediction: {result['prediction']}")
-            print(f"  Risk Score: {result['risk_score']:.4f}")
-            print(f"  Risk Category: {result['risk_category']}")
+            if trace_enabled():
+                trace_logger.debug("✓ Prediction %s (probabilities %s): risk score %.4f, category %s",
+                                   result['prediction'], prediction_proba,
+                                   result['risk_score'], result['risk_category'])
             
+            if key is not None:
+                cache.set(key, dict(result))
             return result
         
         except Exception as e:
-            print(f"✗ PREDICTION FAILED: {str(e)}")
-            raise Exception(f"Prediction error: {str(e)}")
\ No newline at end of file
+            logger.error("✗ Prediction failed: %s", e)
+            raise Exception(f"Prediction error: {str(e)}")
+    
+    def _infer_batched(self, batcher, matrix, bundle):
+        """Score rows through the micro-batcher, alone if the batch is not back in time"""
+        timeout = Config.MICRO_BATCH_TIMEOUT if Config else 1.0
+        try:
+            return batcher.submit(matrix, bundle).result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.warning("✗ Micro-batch not scored within %.1fs; scoring the request alone", timeout)
+            return self._infer(matrix, bundle)
+    
+    def predict_batch(self, records, chunk_size=None):
+        """
+        Predict credit risk for many records, one predict_proba call per chunk
+        
+        Args:
+            records (list): Input feature dictionaries
+            chunk_size (int): Rows per model call (defaults to Config.BATCH_CHUNK_SIZE)
+        
+        Returns:
+            list: One result per input record, in input order. Records that cannot
+                  be scored get the error shape returned by predict() instead of
+                  failing the whole batch.
+        """
+        bundle = self._bundle
+        if bundle is None:
+            message = f"Model not loaded: {self._model_load_error or 'not found'}"
+            return [self._error_result(message) for _ in records]
+        
+        chunk_size = chunk_size or (Config.BATCH_CHUNK_SIZE if Config else 1000)
+        results = []
+        for start in range(0, len(records), chunk_size):
+            results.extend(self._predict_chunk(records[start:start + chunk_size], bundle))
+        return results
+    
+    def _predict_chunk(self, chunk, bundle):
+        """Score one chunk of records with a single predict_proba call"""
+        results = [None] * len(chunk)
+        positions = []
+        rows = []
+        for i, record in enumerate(chunk):
+            if isinstance(record, dict):
+                positions.append(i)
+                rows.append(record)
+            else:
+                results[i] = self._error_result(f"Expected a JSON object, got {type(record).__name__}")
+        
+        if rows:
+            try:
+                matrix, errors = bundle.pipeline.transform_with_errors(rows)
+            except Exception as e:
+                logger.error("✗ Preprocessing failed for %d rows: %s", len(rows), e)
+                for position in positions:
+                    results[position] = self._error_result(f"Preprocessing error: {str(e)}")
+                return results
+            for row, message in errors.items():
+                results[positions[row]] = self._error_result(message)
+            valid = [row for row in range(len(rows)) if row not in errors]
+            
+            if valid:
+                try:
+                    valid_matrix = matrix[valid]
+                    labels, proba = self._infer(valid_matrix, bundle)
+                    if self._shadow is not None:
+                        self._shadow.submit(valid_matrix, proba, bundle.version)
+                    for row, label, row_proba in zip(valid, labels, proba):
+                        results[positions[row]] = self._build_result(label, row_proba)
+                except Exception as e:
+                    logger.error("✗ Batch prediction failed for %d rows: %s", len(valid), e)
+                    for row in valid:
+                        results[positions[row]] = self._error_result(f"Prediction error: {str(e)}")
+        
+        return results
+    
+    def predict_frame(self, frame):
+        """
+        Columnar counterpart of predict_batch for offline scoring
+        
+        Results match predict_batch row for row, but are built with array
+        operations and returned as columns instead of one dict per row.
+        
+        Args:
+            frame (pd.DataFrame | dict): Input columns in the credit_risk_records schema
+        
+        Returns:
+            pd.DataFrame: prediction, risk_score, risk_category, probability_default,
+                          probability_no_default and error, one row per input row
+        """
+        import pandas as pd
+        
+        bundle = self._bundle
+        if bundle is None:
+            raise RuntimeError(f"Model not loaded: {self._model_load_error or 'not found'}")
+        
+        matrix, errors = bundle.pipeline.transform_with_errors(frame)
+        n_rows = matrix.shape[0]
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(errors)] = False
+        
+        prediction = pd.Series(pd.NA, index=range(n_rows), dtype='Int64')
+        proba_default = np.full(n_rows, np.nan)
+        proba_no_default = np.full(n_rows, np.nan)
+        error = np.full(n_rows, None, dtype=object)
+        for row, message in errors.items():
+            error[row] = message
+        
+        if valid.any():
+            try:
+                labels, proba = self._infer(matrix[valid], bundle)
+                prediction[valid] = labels.astype(np.int64)
+                proba_default[valid] = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+                proba_no_default[valid] = proba[:, 0]
+            except Exception as e:
+                logger.error("✗ Batch prediction failed for %d rows: %s", int(valid.sum()), e)
+                error[valid] = f"Prediction error: {str(e)}"
+        
+        risk_category = np.select(
+            [np.isnan(proba_default), proba_default < 0.3, proba_default < 0.6],
+            ['Unknown', 'Low', 'Medium'],
+            default='High'
+        )
+        risk_score = np.round(proba_default, 4)
+        return pd.DataFrame({
+            'prediction': prediction,
+            'risk_score': risk_score,
+            'risk_category': risk_category,
+            'probability_default': risk_score,
+            'probability_no_default': np.round(proba_no_default, 4),
+            'error': error,
+        })
@@ -0,0 +1,229 @@
+"""
+Shadow scoring - a challenger model scores live traffic off the request path
+
+When Config.SHADOW_MODEL_PATH names a model version, PredictService hands
+the feature matrix of every live prediction (with the champion's
+probabilities) to ShadowScorer.submit(). That is a non-blocking put on a
+bounded queue; when the queue is full the rows are dropped and counted, so a
+slow challenger can never hold up a response. A daemon thread drains the
+queue, scores many requests with one challenger predict_proba call and
+appends compact batches to Config.SHADOW_LOG_DIR for offline comparison:
+
+    shadow-<pid>-<seq>.npz   timestamp (float64), features (float32),
+                             champion / challenger probability of default
+                             (float32), champion_version / challenger_version
+
+load_shadow_logs() reads a directory of batches back into one DataFrame.
+"""
+import itertools
+import os
+import queue
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+logger = get_logger(__name__)
+
+# Queued after the last submission to stop the drainer
+_STOP = object()
+
+# Live scorers; closed ones are dropped as soon as nothing references them
+_scorers = weakref.WeakSet()
+
+
+def _restart_after_fork():
+    """Threads do not survive fork(): give every scorer in the child a fresh queue"""
+    for scorer in list(_scorers):
+        scorer._start()
+
+
+# One hook for the process; per-instance hooks could never be unregistered
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class ShadowScorer:
+    """Bounded, drop-when-full background scoring with a challenger bundle"""
+
+    def __init__(self, bundle, log_dir=None, queue_size=None, batch_rows=None, flush_interval=None):
+        """
+        Args:
+            bundle (ModelBundle): Challenger model
+            log_dir (str): Directory for the batch files (defaults to Config.SHADOW_LOG_DIR)
+            queue_size (int): Submissions held before new ones are dropped
+                (defaults to Config.SHADOW_QUEUE_SIZE)
+            batch_rows (int): Rows scored and written per batch (defaults to Config.SHADOW_BATCH_ROWS)
+            flush_interval (float): Seconds after which a partial batch is written
+                (defaults to Config.SHADOW_FLUSH_INTERVAL)
+        """
+        self.bundle = bundle
+        self.log_dir = Path(log_dir or Config.SHADOW_LOG_DIR)
+        self.queue_size = queue_size or Config.SHADOW_QUEUE_SIZE
+        self.batch_rows = batch_rows or Config.SHADOW_BATCH_ROWS
+        self.flush_interval = flush_interval if flush_interval is not None else Config.SHADOW_FLUSH_INTERVAL
+        self.counts = {'submitted': 0, 'dropped': 0, 'scored': 0, 'failed': 0}
+        # Batch file numbers; next() on itertools.count is atomic under the GIL
+        self._sequence = itertools.count(1)
+        self._closed = False
+        self._start()
+        _scorers.add(self)
+
+    def _start(self):
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+
+    def _count(self, name, rows):
+        with self._counts_lock:
+            self.counts[name] += rows
+
+    def submit(self, matrix, champion_proba, champion_version):
+        """
+        Queue rows for the challenger without waiting
+
+        Args:
+            matrix (np.ndarray): Feature matrix the champion scored (not modified)
+            champion_proba (np.ndarray): Champion class probabilities for those rows
+            champion_version (str): Champion model version
+
+        Returns:
+            bool: False if the queue was full (or the scorer closed) and the rows were dropped
+        """
+        if self._closed:
+            return False
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None and not self._closed:
+                    self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((time.time(), matrix, champion_proba, champion_version))
+        except queue.Full:
+            self._count('dropped', matrix.shape[0])
+            return False
+        self._count('submitted', matrix.shape[0])
+        return True
+
+    def close(self):
+        """Score and write what is already queued, then stop the drainer"""
+        _scorers.discard(self)
+        with self._thread_lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self):
+        pending, rows = [], 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                if pending:
+                    self._score(pending)
+                    for _ in pending:
+                        self._queue.task_done()
+                self._queue.task_done()
+                return
+            if item is not None:
+                pending.append(item)
+                rows += item[1].shape[0]
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if pending and (rows >= self.batch_rows or time.monotonic() >= deadline):
+                self._score(pending)
+                for _ in pending:
+                    self._queue.task_done()
+                pending, rows, deadline = [], 0, None
+
+    def _score(self, pending):
+        """Score queued submissions with one challenger call and write them as one batch"""
+        n_rows = sum(item[1].shape[0] for item in pending)
+        challenger_version = self.bundle.version
+        try:
+            with metrics.timer('shadow_inference', model_version=challenger_version):
+                features = np.concatenate([item[1] for item in pending])
+                proba = self.bundle.model.predict_proba(features)
+            batch = {
+                'timestamp': np.repeat([item[0] for item in pending], [item[1].shape[0] for item in pending]),
+                'features': features.astype(np.float32),
+                'champion': np.concatenate([_default_proba(item[2]) for item in pending]).astype(np.float32),
+                'challenger': _default_proba(proba).astype(np.float32),
+                'champion_version': np.array([item[3] for item in pending for _ in range(item[1].shape[0])]),
+                'challenger_version': np.array(challenger_version),
+            }
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            sequence = next(self._sequence)
+            np.savez_compressed(self.log_dir / f'shadow-{os.getpid()}-{sequence:06d}.npz', **batch)
+        except Exception as e:
+            self._count('failed', n_rows)
+            logger.warning("✗ Shadow scoring of %d rows with %s failed: %s", n_rows, challenger_version, e)
+            return
+        self._count('scored', n_rows)
+
+    def wait(self, timeout=10.0):
+        """Block until everything queued so far has been scored and written (for tests and shutdown)"""
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        labels = {'model_version': self.bundle.version}
+        with self._counts_lock:
+            counts = dict(self.counts)
+        samples = [(f'shadow_rows_{name}_total', 'counter', labels, count) for name, count in counts.items()]
+        samples.append(('shadow_queue_depth', 'gauge', labels, self._queue.qsize()))
+        return samples
+
+
+def _default_proba(proba):
+    """Probability of default from (n_rows, n_classes) class probabilities"""
+    return proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+
+
+def load_shadow_logs(log_dir=None):
+    """
+    Read shadow batch files back for offline comparison
+
+    Args:
+        log_dir (str): Directory written by ShadowScorer (defaults to Config.SHADOW_LOG_DIR)
+
+    Returns:
+        pd.DataFrame: One row per shadowed prediction with timestamp,
+                      champion_version, challenger_version, champion,
+                      challenger and the feature columns
+    """
+    import pandas as pd
+    from app.services.feature_pipeline import EXPECTED_FEATURES
+
+    frames = []
+    for path in sorted(Path(log_dir or Config.SHADOW_LOG_DIR).glob('shadow-*.npz')):
+        with np.load(path) as batch:
+            frame = pd.DataFrame(batch['features'], columns=EXPECTED_FEATURES[:batch['features'].shape[1]])
+            frame.insert(0, 'challenger', batch['challenger'])
+            frame.insert(0, 'champion', batch['champion'])
+            frame.insert(0, 'challenger_version', str(batch['challenger_version']))
+            frame.insert(0, 'champion_version', batch['champion_version'])
+            frame.insert(0, 'timestamp', pd.to_datetime(batch['timestamp'], unit='s'))
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -1,129 +1,449 @@
 """
 SHAP Explanation Service
 """
-import pandas as pd
+import hashlib
+import time
 import numpy as np
 from app.services.predict_service import PredictService
-import shap
+from app.services.feature_pipeline import EXPECTED_FEATURES, PreparedFeatures
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+from app.utils.metrics import metrics
+from app.utils.cache import LRUCache
+from app.utils.logger import get_logger, trace_enabled, trace_logger
+from app.utils.startup import startup_report
+
+logger = get_logger(__name__)
+
+# Features reported per explanation
+TOP_K = 10
+# Impacts below this are left out of explanations
+MIN_IMPACT = 0.001
+# Identifier column that is never reported as a reason
+EXCLUDED_FEATURES = ('index',)
+
+# Explanation methods, most faithful first:
+#   exact           path-dependent TreeSHAP (the reference)
+#   interventional  TreeSHAP against a small fixed background sample
+#   saabas          Saabas path attribution (TreeExplainer approximate=True)
+METHODS = ('exact', 'interventional', 'saabas')
+# Weight of the newest call in the per-method latency estimates
+LATENCY_SMOOTHING = 0.2
+
+
+def feature_hash(row):
+    """16-byte digest of one preprocessed feature row (explanation cache key)"""
+    return hashlib.blake2b(np.ascontiguousarray(row, dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+def top_k_impacts(values, feature_names, top_k=TOP_K):
+    """
+    Select the top_k features by absolute SHAP value in every row
+    
+    The identifier column and impacts below MIN_IMPACT are never selected.
+    Only the top_k candidates per row are sorted (np.argpartition), so the
+    cost does not depend on how many features the model has.
+    
+    Args:
+        values (np.ndarray): (n_rows, n_features) SHAP values
+        feature_names (list): Column names of values
+        top_k (int): Features kept per row
+    
+    Returns:
+        tuple: (indices, impacts) arrays of shape (n_rows, top_k); rows with
+               fewer eligible features are padded with index -1 and impact 0
+    """
+    n_rows, n_features = values.shape
+    magnitude = np.abs(values)
+    magnitude[magnitude < MIN_IMPACT] = -1.0
+    for name in EXCLUDED_FEATURES:
+        if name in feature_names:
+            magnitude[:, list(feature_names).index(name)] = -1.0
+    
+    k = min(top_k, n_features)
+    candidates = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    candidate_magnitude = np.take_along_axis(magnitude, candidates, axis=1)
+    # Largest impact first; equal impacts keep feature order
+    order = np.lexsort((candidates, -candidate_magnitude), axis=1)
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_magnitude = np.take_along_axis(candidate_magnitude, order, axis=1)
+    
+    indices = np.full((n_rows, top_k), -1, dtype=np.intp)
+    impacts = np.zeros((n_rows, top_k), dtype=np.float64)
+    eligible = candidate_magnitude >= 0
+    indices[:, :k] = np.where(eligible, candidates, -1)
+    impacts[:, :k] = np.where(eligible, np.take_along_axis(values, candidates, axis=1), 0.0)
+    return indices, impacts
+
+
+class TopKExplanations:
+    """
+    Compact top-k SHAP explanations for a batch: feature indices and impacts
+    per row, with dicts only built for the rows a caller asks for
+    """
+    
+    __slots__ = ('indices', 'impacts', 'feature_names', 'method')
+    
+    def __init__(self, indices, impacts, feature_names, method='exact'):
+        """
+        Args:
+            indices (np.ndarray): (n_rows, k) feature indices, -1 for padding
+            impacts (np.ndarray): (n_rows, k) SHAP values of those features
+            feature_names (list): Names the indices refer to
+            method (str): Explanation method that produced them (see METHODS)
+        """
+        self.indices = indices
+        self.impacts = impacts
+        self.feature_names = feature_names
+        self.method = method
+    
+    def __len__(self):
+        return self.indices.shape[0]
+    
+    def to_list(self, row):
+        """Explanation for one row in the API shape: [{feature, impact, direction}, ...]"""
+        return [
+            {
+                "feature": self.feature_names[index],
+                "impact": float(impact),
+                "direction": "increase" if impact > 0 else "decrease"
+            }
+            for index, impact in zip(self.indices[row].tolist(), self.impacts[row].tolist())
+            if index >= 0
+        ]
+    
+    def to_lists(self):
+        """Explanations for every row"""
+        return [self.to_list(row) for row in range(len(self))]
+    
+    def pack(self, row):
+        """
+        Compact storage form of one row (see app.jobs.explain_records)
+        
+        Returns:
+            tuple: (feature_indices, impacts) as uint8 and float32 bytes
+        """
+        valid = self.indices[row] >= 0
+        return (self.indices[row][valid].astype(np.uint8).tobytes(),
+                self.impacts[row][valid].astype(np.float32).tobytes())
+    
+    @classmethod
+    def unpack(cls, feature_indices, impacts, feature_names, method):
+        """One-row TopKExplanations from the bytes written by pack()"""
+        indices = np.frombuffer(feature_indices, dtype=np.uint8).astype(np.intp)
+        values = np.frombuffer(impacts, dtype=np.float32).astype(np.float64)
+        return cls(indices[None, :], values[None, :], feature_names, method)
 
 
 class ShapService:
     """Service for generating SHAP (SHapley Additive exPlanations) values"""
     
     _instance = None
-    _explainer = None
+    _explanation_cache = None
+    _latency_ms = None
+    _unavailable = None
     
     def __new__(cls):
         """Singleton pattern"""
         if cls._instance is None:
             cls._instance = super(ShapService, cls).__new__(cls)
+            cls._latency_ms = {}
+            cls._unavailable = {}
+            if Config and Config.RESULT_CACHE_ENABLED:
+                cls._explanation_cache = LRUCache('shap', Config.RESULT_CACHE_MAX_BYTES, Config.RESULT_CACHE_TTL)
+                metrics.register_collector(cls._explanation_cache.collect_metrics)
         return cls._instance
     
-    def _get_explainer(self):
+    @staticmethod
+    def _current_bundle():
+        """The ModelBundle PredictService is serving, loading it if needed"""
+        # Get the singleton instance of PredictService
+        predict_service = PredictService()
+        
+        # Ensure model is loaded
+        if not predict_service.is_model_loaded():
+            predict_service.load_model()
+        
+        bundle = predict_service.bundle
+        if bundle is None:
+            raise ValueError("Model not found in PredictService")
+        return bundle
+    
+    def _get_explainer(self, bundle=None):
         """
         Initialize and return the SHAP explainer.
-        Uses the model already loaded in PredictService.
+        Uses the model already loaded in PredictService (or the given bundle);
+        each model bundle builds its explainer once.
+        """
+        try:
+            return (bundle or self._current_bundle()).explainer('tree', self._build_tree_explainer)
+        except Exception as e:
+            logger.error("✗ Error initializing SHAP explainer: %s", e)
+            raise e
+    
+    @staticmethod
+    def _build_tree_explainer(bundle):
+        """Path-dependent TreeExplainer for the bundle's model"""
+        # shap is slow to import; only processes that explain pay for it
+        with startup_report.phase('shap_import'):
+            import shap
+        
+        # Initialize TreeExplainer (efficient for XGBoost, Random Forest, etc.)
+        with startup_report.phase('explainer_init'):
+            explainer = shap.TreeExplainer(bundle.model)
+        logger.info("✓ SHAP Explainer initialized successfully")
+        return explainer
+
+    def _get_interventional_explainer(self, bundle=None):
+        """
+        TreeExplainer with interventional feature perturbation over the first
+        Config.SHAP_BACKGROUND_SIZE rows of Config.SHAP_BACKGROUND_PATH
+        """
+        bundle = bundle or self._current_bundle()
+        try:
+            return bundle.explainer('interventional', self._build_interventional_explainer)
+        except Exception as e:
+            # Budgeted calls stop choosing this method
+            self._unavailable['interventional'] = str(e)
+            logger.error("✗ Error initializing interventional SHAP explainer: %s", e)
+            raise
+    
+    @staticmethod
+    def _build_interventional_explainer(bundle):
+        """Interventional TreeExplainer for the bundle's model"""
+        import pandas as pd
+        with startup_report.phase('shap_import'):
+            import shap
+        
+        background = pd.read_csv(Config.SHAP_BACKGROUND_PATH, nrows=Config.SHAP_BACKGROUND_SIZE)
+        with startup_report.phase('explainer_init'):
+            explainer = shap.TreeExplainer(
+                bundle.model, data=bundle.pipeline.transform(background),
+                feature_perturbation='interventional')
+        logger.info("✓ Interventional SHAP explainer initialized with %d background rows", len(background))
+        return explainer
+    
+    def _shap_values(self, method, matrix, bundle=None):
+        """Positive-class SHAP values of matrix computed with the given method"""
+        if method == 'interventional':
+            values = self._get_interventional_explainer(bundle).shap_values(matrix)
+        else:
+            values = self._get_explainer(bundle).shap_values(matrix, approximate=(method == 'saabas'))
+        return self._positive_class(values)
+    
+    def _record_latency(self, method, seconds, n_rows):
+        """Fold one call into the method's per-row latency estimate (ms)"""
+        per_row = seconds * 1000.0 / max(n_rows, 1)
+        previous = self._latency_ms.get(method)
+        self._latency_ms[method] = per_row if previous is None else \
+            (1 - LATENCY_SMOOTHING) * previous + LATENCY_SMOOTHING * per_row
+    
+    def latency_estimates(self):
+        """Smoothed per-row latency of each method measured so far, in ms"""
+        return dict(self._latency_ms)
+    
+    def choose_method(self, method=None, budget_ms=None, n_rows=1):
         """
-        if self._explainer is None:
+        Pick the explanation method for a call
+        
+        An explicit method wins. With a latency budget, the most faithful
+        method whose measured latency for n_rows fits is used; a method that
+        has not been measured yet is tried. Without either, Config.SHAP_METHOD
+        (and Config.SHAP_LATENCY_BUDGET_MS) apply.
+        
+        Args:
+            method (str): One of METHODS, or None
+            budget_ms (float): Latency budget for the whole call, or None
+            n_rows (int): Rows to explain
+        
+        Returns:
+            str: The method to use
+        
+        Raises:
+            ValueError: For an unknown method
+        """
+        if method is not None:
+            if method not in METHODS:
+                raise ValueError(f"Unknown explanation method '{method}' (expected one of {', '.join(METHODS)})")
+            return method
+        default = Config.SHAP_METHOD if Config else 'exact'
+        if budget_ms is None:
+            budget_ms = Config.SHAP_LATENCY_BUDGET_MS if Config else None
+        if budget_ms is None:
+            return default
+        
+        candidates = [m for m in METHODS if m not in self._unavailable]
+        for candidate in candidates:
+            estimate = self._latency_ms.get(candidate)
+            if estimate is None or estimate * n_rows <= budget_ms:
+                return candidate
+        # Nothing fits: the fastest method
+        return candidates[-1]
+    
+    def calibrate(self, data, bundle=None):
+        """
+        Measure every method once on the given record(s) so budgeted calls
+        can choose between them from the first request
+        
+        Args:
+            data: Record(s) or prepared features to explain
+            bundle (ModelBundle): Model to measure (defaults to the one being served)
+        
+        Returns:
+            dict: Per-row latency estimates in ms
+        """
+        features = self._prepare_many(data, bundle)
+        for method in METHODS:
+            start = time.perf_counter()
             try:
-                # Get the singleton instance of PredictService
-                predict_service = PredictService()
-                
-                # Ensure model is loaded
-                if not predict_service.is_model_loaded():
-                    predict_service.load_model()
-                
-                model = predict_service._model
-                
-                if model is None:
-                    raise ValueError("Model not found in PredictService")
-                
-                # Initialize TreeExplainer (efficient for XGBoost, Random Forest, etc.)
-                self._explainer = shap.TreeExplainer(model)
-                print("✓ SHAP Explainer initialized successfully")
-                
+                self._shap_values(method, features.matrix, bundle)
             except Exception as e:
-                print(f"✗ Error initializing SHAP explainer: {e}")
-                raise e
-                
-        return self._explainer
+                self._unavailable[method] = str(e)
+                logger.warning("✗ Explanation method '%s' unavailable: %s", method, e)
+                continue
+            self._record_latency(method, time.perf_counter() - start, len(features))
+        return self.latency_estimates()
 
-    def explain(self, data):
+    @staticmethod
+    def _positive_class(shap_values):
         """
-        Generate feature importance explanations for a single prediction.
+        SHAP values of the positive class as an (n_samples, n_features) array,
+        whatever shape the explainer returned them in
+        """
+        if isinstance(shap_values, list):
+            # Case: List of arrays (e.g., [class0_shap, class1_shap])
+            # We assume binary classification and take the second one (positive class)
+            vals = shap_values[1] if len(shap_values) > 1 else shap_values[0]
+        elif isinstance(shap_values, np.ndarray) and shap_values.ndim == 3:
+            # Shape: (n_samples, n_features, n_classes) - take class 1 (positive class)
+            vals = shap_values[:, :, 1]
+        else:
+            # Shape: (n_samples, n_features) - Regression or binary log-odds
+            vals = np.asarray(shap_values)
+        return np.atleast_2d(np.asarray(vals, dtype=np.float64))
+
+    def _prepare_many(self, data, bundle=None):
+        """Features for explain_many from records, a matrix or PreparedFeatures"""
+        if isinstance(data, PreparedFeatures):
+            return data
+        if isinstance(data, np.ndarray):
+            return PreparedFeatures(np.atleast_2d(data))
+        return PreparedFeatures(PredictService().preprocess_batch(data, bundle))
+
+    def explain_many(self, data, top_k=TOP_K, method=None, budget_ms=None, bundle=None):
+        """
+        Top-k SHAP explanations for many records with one explainer call
+        
+        Rows are looked up in the explanation cache by a hash of their feature
+        values, the loaded model bundle and the method; only the misses go to the
+        explainer.
         
         Args:
-            data (dict): Raw input data dictionary (same as passed to predict)
-            
+            data (list | np.ndarray | PreparedFeatures): Raw input records, a
+                preprocessed feature matrix, or prepared features
+            top_k (int): Features kept per row
+            method (str): Explanation method (see METHODS), or None to choose
+            budget_ms (float): Latency budget used to choose the method (see choose_method)
+            bundle (ModelBundle): Model to explain (defaults to the one being served)
+        
         Returns:
-            list: List of dictionaries containing feature, impact, and direction
+            TopKExplanations: Feature indices and impacts per row, largest
+                              absolute impact first
+        
+        Raises:
+            Exception: If the records cannot be preprocessed or explained
         """
+        start = time.perf_counter()
         try:
-            predict_service = PredictService()
-            
-            # 1. Preprocess data using the EXACT same pipeline as prediction
-            processed_df = predict_service.preprocess_data(data)
-            
-            # 2. Get the explainer
-            explainer = self._get_explainer()
-            
-            # 3. Calculate SHAP values
-            shap_values = explainer.shap_values(processed_df)
-            
-            # Handle different return types from shap_values
-            vals = None
-            
-            if isinstance(shap_values, list):
-                # Case: List of arrays (e.g., [class0_shap, class1_shap])
-                # We assume binary classification and take the second one (positive class)
-                if len(shap_values) > 1:
-                    vals = shap_values[1]
-                else:
-                    vals = shap_values[0]
-            elif isinstance(shap_values, np.ndarray):
-                # Case: Numpy array
-                if len(shap_values.shape) == 3:
-                    # Shape: (n_samples, n_features, n_classes)
-                    # Take class 1 (positive class)
-                    vals = shap_values[:, :, 1]
-                else:
-                    # Shape: (n_samples, n_features) - Regression or binary log-odds
-                    vals = shap_values
-            else:
-                vals = np.array(shap_values)
+            # One bundle for the whole call, even if a new model is swapped in meanwhile
+            bundle = bundle or self._current_bundle()
+            features = self._prepare_many(data, bundle)
+            matrix = features.matrix
+            n_rows = matrix.shape[0]
+            method = self.choose_method(method, budget_ms, n_rows)
+            indices = np.full((n_rows, top_k), -1, dtype=np.intp)
+            impacts = np.zeros((n_rows, top_k), dtype=np.float64)
             
-            # Extract values for the single instance
-            # vals should now be (n_samples, n_features)
-            if len(vals.shape) > 1:
-                instance_values = vals[0]
-            else:
-                instance_values = vals
-
-            # 4. Map values to feature names
-            feature_names = processed_df.columns.tolist()
-            explanations = []
+            cache = self._explanation_cache
+            keys = [None] * n_rows
+            missing = list(range(n_rows))
+            if cache is not None:
+                cache.ensure_generation(bundle.generation)
+                missing = []
+                for row in range(n_rows):
+                    keys[row] = (feature_hash(matrix[row]), bundle.generation, top_k, method)
+                    cached = cache.get(keys[row])
+                    if cached is None:
+                        missing.append(row)
+                    else:
+                        indices[row], impacts[row] = cached
             
-            for feature, impact in zip(feature_names, instance_values):
-                # Skip index feature as it's an identifier, not a predictor
-                if feature == 'index': continue
-                
-                # Ensure impact is a scalar
-                if isinstance(impact, (np.ndarray, list)):
-                    # Flatten to handle any shape and take first element to avoid ambiguity
-                    impact = np.array(impact).flatten()[0]
-                
-                if abs(impact) < 0.001: continue # Skip negligible impacts
-                explanations.append({
-                    "feature": feature,
-                    "impact": float(impact),
-                    "direction": "increase" if impact > 0 else "decrease"
-                })
+            if missing:
+                computed = time.perf_counter()
+                values = self._shap_values(method, matrix[missing], bundle)
+                self._record_latency(method, time.perf_counter() - computed, len(missing))
+                top_indices, top_impacts = top_k_impacts(values, features.feature_names, top_k)
+                indices[missing] = top_indices
+                impacts[missing] = top_impacts
+                if cache is not None:
+                    for row, row_indices, row_impacts in zip(missing, top_indices, top_impacts):
+                        # Copies, so a cached row does not keep the whole batch array alive
+                        cache.set(keys[row], (row_indices.copy(), row_impacts.copy()))
             
-            # 5. Sort by absolute impact and return top 10
-            explanations.sort(key=lambda x: abs(x['impact']), reverse=True)
-            print(f"✓ Generated {len(explanations)} SHAP explanations")
-            return explanations[:10]
+            if trace_enabled():
+                trace_logger.debug("✓ Explained %d rows with %s SHAP (%d from cache)",
+                                   n_rows, method, n_rows - len(missing))
+            elapsed = time.perf_counter() - start
+            metrics.observe('shap', elapsed)
+            metrics.observe(f'shap_{method}', elapsed)
+            return TopKExplanations(indices, impacts, features.feature_names, method)
+        
+        except Exception:
+            metrics.observe('shap', time.perf_counter() - start, error=True)
+            raise
 
+    def stored_explanation(self, stored, method=None):
+        """
+        Explanation precomputed by app.jobs.explain_records, if still valid
+        
+        Args:
+            stored (dict): Row from record_explanations (ExplanationModel.get_by_id)
+            method (str): Method the caller asked for, or None for any
+        
+        Returns:
+            TopKExplanations: One-row explanation, or None when there is no
+                              stored row, it was computed by another model
+                              version, or with a different method than asked for
+        """
+        if (not stored or stored.get('model_version') != PredictService().model_version
+                or (method is not None and stored.get('method') != method)):
+            return None
+        return TopKExplanations.unpack(stored['feature_indices'], stored['impacts'],
+                                       EXPECTED_FEATURES, stored['method'])
+
+    def explain(self, data, method=None, budget_ms=None):
+        """
+        Generate feature importance explanations for a single prediction.
+        
+        Args:
+            data (dict | PreparedFeatures): Raw input data dictionary (same as passed
+                to predict), or the features the request already prepared for it
+            method (str): Explanation method (see METHODS), or None to choose
+            budget_ms (float): Latency budget used to choose the method
+            
+        Returns:
+            list: List of dictionaries containing feature, impact, and direction
+        """
+        try:
+            # Preprocess data using the EXACT same pipeline as prediction
+            # (reuses the prediction's matrix when given PreparedFeatures)
+            features = PredictService().prepare(data)
+            explanations = self.explain_many(features, method=method, budget_ms=budget_ms).to_list(0)
+            if trace_enabled():
+                trace_logger.debug("✓ Generated %d SHAP explanations", len(explanations))
+            return explanations
         except Exception as e:
-            print(f"✗ SHAP explanation failed: {e}")
-            return []
\ No newline at end of file
+            logger.warning("✗ SHAP explanation failed: %s", e)
+            return []
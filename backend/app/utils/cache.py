@@ -0,0 +1,119 @@
+"""
+Thread-safe in-process LRU cache with TTL and a memory budget
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by an approximate byte budget
+
+    Entries expire after ttl seconds. The cache is tied to a generation
+    (e.g. the loaded model's version): switching generation drops every entry.
+    """
+
+    def __init__(self, name, max_bytes, ttl=None):
+        """
+        Args:
+            name (str): Cache name used in metrics
+            max_bytes (int): Approximate memory budget for keys and values
+            ttl (float): Seconds an entry stays valid, None for no expiry
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.bytes -= size
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store value under key, evicting least recently used entries to stay in budget"""
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def ensure_generation(self, generation):
+        """Clear the cache if it holds entries from a different generation"""
+        if generation != self.generation:
+            with self._lock:
+                if generation != self.generation:
+                    self._entries.clear()
+                    self.bytes = 0
+                    self.generation = generation
+
+    def stats(self):
+        """Counters for monitoring"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        stats = self.stats()
+        labels = {'cache': self.name}
+        return [
+            ('cache_hits_total', 'counter', labels, stats['hits']),
+            ('cache_misses_total', 'counter', labels, stats['misses']),
+            ('cache_evictions_total', 'counter', labels, stats['evictions']),
+            ('cache_entries', 'gauge', labels, stats['entries']),
+            ('cache_bytes', 'gauge', labels, stats['bytes']),
+        ]
+
+
+def estimate_size(obj):
+    """Approximate deep size in bytes of plain Python containers and scalars"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(estimate_size(item) for item in obj)
+    elif getattr(obj, 'base', None) is not None and hasattr(obj, 'nbytes'):
+        # getsizeof already counts the buffer of an array that owns its data
+        size += obj.nbytes
+    return size
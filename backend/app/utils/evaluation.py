@@ -0,0 +1,110 @@
+"""
+Streaming evaluation metrics for binary credit-risk models
+
+Confusion-matrix counts and per-class score histograms are accumulated chunk
+by chunk, so evaluating a holdout file needs constant memory however large it
+is. AUC and KS are computed from the histograms; with the default 10,000 bins
+they agree with the exact values to about 1e-4.
+"""
+import numpy as np
+
+DEFAULT_SCORE_BINS = 10000
+
+
+class StreamingEvaluation:
+    """Accumulates binary classification metrics over chunks of predictions"""
+
+    def __init__(self, score_bins=DEFAULT_SCORE_BINS, positive_label=1):
+        """
+        Args:
+            score_bins (int): Equal-width bins over [0, 1] for the score histograms
+            positive_label: Label of the positive (default) class
+        """
+        self.score_bins = score_bins
+        self.positive_label = positive_label
+        # confusion[actual, predicted] with index 1 = positive class
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        # score_counts[actual, bin]
+        self.score_counts = np.zeros((2, score_bins), dtype=np.int64)
+
+    @property
+    def count(self):
+        return int(self.confusion.sum())
+
+    def update(self, y_true, y_pred, y_score=None):
+        """
+        Add one chunk of results
+
+        Args:
+            y_true (array-like): Actual labels
+            y_pred (array-like): Predicted labels
+            y_score (array-like): Predicted probability of the positive class
+        """
+        actual = (np.asarray(y_true) == self.positive_label).astype(np.intp)
+        predicted = (np.asarray(y_pred) == self.positive_label).astype(np.intp)
+        self.confusion += np.bincount(actual * 2 + predicted, minlength=4).reshape(2, 2)
+
+        if y_score is not None:
+            score = np.clip(np.asarray(y_score, dtype=np.float64), 0.0, 1.0)
+            bins = np.minimum((score * self.score_bins).astype(np.intp), self.score_bins - 1)
+            self.score_counts += np.bincount(actual * self.score_bins + bins,
+                                             minlength=2 * self.score_bins).reshape(2, -1)
+
+    def merge(self, other):
+        """Add the counts accumulated by another StreamingEvaluation (e.g. from a worker)"""
+        self.confusion += other.confusion
+        self.score_counts += other.score_counts
+        return self
+
+    def class_metrics(self):
+        """
+        Precision, recall, F1 and support per class
+
+        Returns:
+            dict: {0: {...}, 1: {...}} with 1 = positive class (also the report's row labels)
+        """
+        result = {}
+        for cls in (0, 1):
+            true_positive = self.confusion[cls, cls]
+            predicted = self.confusion[:, cls].sum()
+            support = self.confusion[cls, :].sum()
+            precision = true_positive / predicted if predicted else 0.0
+            recall = true_positive / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            result[cls] = {'precision': float(precision), 'recall': float(recall),
+                           'f1': float(f1), 'support': int(support)}
+        return result
+
+    def accuracy(self):
+        return float(np.trace(self.confusion) / self.count) if self.count else float('nan')
+
+    def auc(self):
+        """ROC AUC from the score histograms (scores in the same bin count as ties)"""
+        negatives, positives = self.score_counts
+        n_neg, n_pos = negatives.sum(), positives.sum()
+        if not n_neg or not n_pos:
+            return float('nan')
+        # For each positive bin: negatives scored lower, plus half the ties
+        lower_negatives = np.cumsum(negatives) - negatives
+        wins = (positives * (lower_negatives + 0.5 * negatives)).sum()
+        return float(wins / (n_neg * n_pos))
+
+    def ks(self):
+        """Kolmogorov-Smirnov statistic: max gap between the class score CDFs"""
+        negatives, positives = self.score_counts
+        n_neg, n_pos = negatives.sum(), positives.sum()
+        if not n_neg or not n_pos:
+            return float('nan')
+        return float(np.max(np.abs(np.cumsum(positives) / n_pos - np.cumsum(negatives) / n_neg)))
+
+    def report(self):
+        """Text report in the layout of sklearn's classification_report, plus AUC/KS"""
+        lines = [f"{'':>14}{'precision':>10}{'recall':>10}{'f1-score':>10}{'support':>10}", '']
+        for cls, stats in self.class_metrics().items():
+            lines.append(f"{cls:>14}{stats['precision']:>10.2f}{stats['recall']:>10.2f}"
+                         f"{stats['f1']:>10.2f}{stats['support']:>10}")
+        lines.append('')
+        lines.append(f"{'accuracy':>14}{'':>20}{self.accuracy():>10.2f}{self.count:>10}")
+        lines.append(f"{'roc auc':>14}{'':>20}{self.auc():>10.4f}")
+        lines.append(f"{'ks':>14}{'':>20}{self.ks():>10.4f}")
+        return '\n'.join(lines)
@@ -0,0 +1,89 @@
+"""
+Logging setup for the backend
+
+Application loggers live under the 'app' hierarchy and follow Config.LOG_LEVEL.
+The detailed per-request pipeline trace goes to the 'app.trace' logger and is
+guarded by trace_enabled(), so when tracing is off no trace message is ever
+formatted. With Config.LOG_TRACE_SAMPLE_RATE = N > 0, one request in N is
+traced regardless of LOG_LEVEL.
+"""
+import contextvars
+import itertools
+import logging
+import sys
+
+try:
+    from app.config.settings import Config
+except Exception:
+    Config = None
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+trace_logger = logging.getLogger('app.trace')
+
+_configured = False
+_sample_rate = 0
+_request_counter = itertools.count()
+_traced = contextvars.ContextVar('pipeline_trace', default=None)
+
+
+def configure_logging(level=None, sample_rate=None):
+    """
+    Configure the 'app' logger hierarchy (idempotent unless arguments are given)
+
+    Args:
+        level (str): Log level name, defaults to Config.LOG_LEVEL
+        sample_rate (int): Trace one request in N, defaults to Config.LOG_TRACE_SAMPLE_RATE (0 = off)
+    """
+    global _configured, _sample_rate
+    if _configured and level is None and sample_rate is None:
+        return
+
+    level = level or (Config.LOG_LEVEL if Config else 'INFO')
+    _sample_rate = sample_rate if sample_rate is not None else (Config.LOG_TRACE_SAMPLE_RATE if Config else 0)
+
+    app_logger = logging.getLogger('app')
+    app_logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    if not app_logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        app_logger.addHandler(handler)
+        app_logger.propagate = False
+
+    # Sampled traces must get through even when the application level is higher
+    trace_logger.setLevel(logging.DEBUG if _sample_rate > 0 else logging.NOTSET)
+    _configured = True
+
+
+def get_logger(name):
+    """Return a logger in the 'app' hierarchy, configuring logging on first use"""
+    configure_logging()
+    if name == '__main__':
+        # Modules run with 'python -m app.x' keep their dotted name (and the 'app' handler)
+        spec = getattr(sys.modules['__main__'], '__spec__', None)
+        name = spec.name if spec is not None else 'app.main'
+    return logging.getLogger(name)
+
+
+def begin_request_trace():
+    """
+    Decide whether the current request gets the detailed pipeline trace
+
+    Returns:
+        bool: True if the request is traced
+    """
+    if _sample_rate > 0:
+        traced = next(_request_counter) % _sample_rate == 0
+    else:
+        traced = trace_logger.isEnabledFor(logging.DEBUG)
+    _traced.set(traced)
+    return traced
+
+
+def trace_enabled():
+    """Cheap check guarding every pipeline trace message"""
+    traced = _traced.get()
+    if traced is None:
+        # Outside a request (CLI, jobs): follow the log level, never sample
+        return _sample_rate == 0 and trace_logger.isEnabledFor(logging.DEBUG)
+    return traced
@@ -0,0 +1,57 @@
+"""
+Process memory from /proc
+
+Resident memory split the way it matters for prefork workers: anonymous
+pages are private to a process (unless inherited copy-on-write), file-backed
+pages such as memory-mapped model arrays are shared through the page cache,
+and PSS divides shared pages between the processes using them, so the PSS of
+all workers adds up to their real footprint. Only available on Linux; other
+platforms report nothing.
+"""
+from app.utils.metrics import metrics
+
+# /proc/<pid>/status fields and the names they are reported under
+STATUS_FIELDS = {'VmRSS': 'rss', 'RssAnon': 'anon', 'RssFile': 'file', 'RssShmem': 'shmem'}
+
+
+def memory_usage(pid='self'):
+    """
+    Resident memory of a process
+
+    Args:
+        pid (int | str): Process id, or 'self'
+
+    Returns:
+        dict: Bytes per kind (rss, anon, file, shmem, pss); empty where /proc is unavailable
+    """
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                name, _, value = line.partition(':')
+                if name in STATUS_FIELDS:
+                    usage[STATUS_FIELDS[name]] = int(value.split()[0]) * 1024
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                if line.startswith('Pss:'):
+                    usage['pss'] = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    return usage
+
+
+def format_memory(usage):
+    """One-line summary of memory_usage() in MB"""
+    if not usage:
+        return 'memory usage unavailable'
+    parts = ', '.join(f'{kind} {usage[kind] / 2**20:.1f}' for kind in ('anon', 'file', 'pss') if kind in usage)
+    return f"RSS {usage.get('rss', 0) / 2**20:.1f} MB ({parts})"
+
+
+def collect_metrics():
+    """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+    return [('process_memory_bytes', 'gauge', {'kind': kind}, value) for kind, value in memory_usage().items()]
+
+
+metrics.register_collector(collect_metrics)
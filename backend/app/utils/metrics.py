@@ -0,0 +1,215 @@
+"""
+In-process latency metrics with Prometheus text exposition
+
+Each (stage, model_version) pair gets a fixed-bucket histogram, so recording
+a sample is a bisect plus a few integer increments. Quantiles (p50/p95/p99)
+are estimated from the buckets when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bucket upper bounds in seconds: 10us .. ~84s, growing by sqrt(2)
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (i / 2) for i in range(47))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ('counts', 'count', 'errors', 'total', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        """Record one sample"""
+        bucket = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self):
+        """Consistent copy of (counts, count, errors, total)"""
+        with self._lock:
+            return list(self.counts), self.count, self.errors, self.total
+
+    @staticmethod
+    def quantile(counts, count, q):
+        """Estimate a quantile by linear interpolation inside the bucket that holds it"""
+        if count == 0:
+            return float('nan')
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKET_BOUNDS[-1]
+
+
+class StageTimer:
+    """Times consecutive stages: each lap() records the time since the previous one"""
+
+    __slots__ = ('_registry', '_model_version', '_last')
+
+    def __init__(self, registry, model_version=None):
+        self._registry = registry
+        self._model_version = model_version
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._registry.observe(stage, now - self._last, model_version=self._model_version)
+        self._last = now
+
+
+class MetricsRegistry:
+    """Histograms per (stage, model_version)"""
+
+    def __init__(self, prefix='credit_risk'):
+        self.prefix = prefix
+        self.model_version = 'none'
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        # Per-thread flag set by paused()
+        self._local = threading.local()
+
+    def register_collector(self, collector):
+        """
+        Add a callable rendered on every scrape
+
+        The callable returns (name, type, labels, value) samples, e.g.
+        ('cache_hits_total', 'counter', {'cache': 'prediction'}, 42); names get
+        the registry prefix and samples of the same name are grouped together.
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def set_model_version(self, model_version):
+        """Label subsequent samples with the currently loaded model's version"""
+        self.model_version = str(model_version)
+
+    def _histogram(self, stage, model_version):
+        key = (stage, model_version)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds, error=False, model_version=None):
+        """Record a stage duration (and whether the stage failed)"""
+        if getattr(self._local, 'paused', False):
+            return
+        self._histogram(stage, model_version or self.model_version).observe(seconds, error)
+
+    @contextmanager
+    def paused(self):
+        """Ignore samples recorded by the current thread inside the block (e.g. warmup calls)"""
+        previous = getattr(self._local, 'paused', False)
+        self._local.paused = True
+        try:
+            yield
+        finally:
+            self._local.paused = previous
+
+    @contextmanager
+    def timer(self, stage, model_version=None):
+        """Time a block; an exception counts as an error for the stage and is re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(stage, time.perf_counter() - start, error=True, model_version=model_version)
+            raise
+        self.observe(stage, time.perf_counter() - start, model_version=model_version)
+
+    def stage_timer(self, model_version=None):
+        """Start a StageTimer for a sequence of stages"""
+        return StageTimer(self, model_version)
+
+    def summary(self):
+        """
+        Per-stage statistics
+
+        Returns:
+            dict: {(stage, model_version): {'count', 'errors', 'sum', 'p50', 'p95', 'p99'}}
+        """
+        with self._lock:
+            items = list(self._histograms.items())
+        result = {}
+        for key, histogram in sorted(items):
+            counts, count, errors, total = histogram.snapshot()
+            stats = {'count': count, 'errors': errors, 'sum': total}
+            for q in QUANTILES:
+                stats[f'p{int(q * 100)}'] = Histogram.quantile(counts, count, q)
+            result[key] = stats
+        return result
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        latency = f'{self.prefix}_stage_latency_seconds'
+        errors_name = f'{self.prefix}_stage_errors_total'
+        summary = self.summary()
+
+        lines = [
+            f'# HELP {latency} Latency of each request stage.',
+            f'# TYPE {latency} summary',
+        ]
+        for (stage, model_version), stats in summary.items():
+            labels = f'stage="{_escape(stage)}",model_version="{_escape(model_version)}"'
+            for q in QUANTILES:
+                lines.append(f'{latency}{{{labels},quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6g}')
+            lines.append(f'{latency}_sum{{{labels}}} {stats["sum"]:.6g}')
+            lines.append(f'{latency}_count{{{labels}}} {stats["count"]}')
+
+        lines.append(f'# HELP {errors_name} Failed executions of each request stage.')
+        lines.append(f'# TYPE {errors_name} counter')
+        for (stage, model_version), stats in summary.items():
+            labels = f'stage="{_escape(stage)}",model_version="{_escape(model_version)}"'
+            lines.append(f'{errors_name}{{{labels}}} {stats["errors"]}')
+
+        lines.extend(self._render_collectors())
+        return '\n'.join(lines) + '\n'
+
+    def _render_collectors(self):
+        families = {}
+        for collector in list(self._collectors):
+            for name, metric_type, labels, value in collector():
+                families.setdefault((name, metric_type), []).append((labels, value))
+
+        lines = []
+        for (name, metric_type), samples in families.items():
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f'{full_name}{{{label_text}}} {value:.6g}' if isinstance(value, float)
+                             else f'{full_name}{{{label_text}}} {value}')
+        return lines
+
+    def reset(self):
+        """Drop all recorded samples"""
+        with self._lock:
+            self._histograms = {}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,77 @@
+"""
+Bounded thread-pool stages for running blocking work from an event loop
+
+Each stage (database, inference, SHAP) owns its own thread pool and an
+asyncio semaphore of the same size. Calls beyond the limit wait on the event
+loop, where waiting is cheap and cancellable, and time spent waiting is
+recorded as the '<name>_queue_wait' metric. Because the pools are separate,
+a stage at its limit never delays calls to another stage.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.metrics import metrics
+
+
+class Stage:
+    """A named, concurrency-limited executor for one kind of blocking call"""
+
+    def __init__(self, name, concurrency):
+        """
+        Args:
+            name (str): Stage name used for thread names and metrics
+            concurrency (int): Maximum calls running at once (and worker threads)
+        """
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f'stage-{name}')
+        self._semaphore = None
+        self._loop = None
+        self.active = 0
+        self.waiting = 0
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in the stage's pool and await the result
+
+        The caller's context variables (e.g. the request's trace decision) are
+        carried into the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphores belong to one event loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        metrics.observe(f'{self.name}_queue_wait', time.perf_counter() - queued)
+
+        self.active += 1
+        try:
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, func, *args, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        labels = {'stage': self.name}
+        return [
+            ('stage_active', 'gauge', labels, self.active),
+            ('stage_waiting', 'gauge', labels, self.waiting),
+            ('stage_concurrency', 'gauge', labels, self.concurrency),
+        ]
+
+    def shutdown(self):
+        """Stop the worker threads once queued calls finish"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,102 @@
+"""
+Startup-time accounting and the explicit warmup phase
+
+Heavy libraries (shap above all) are imported on first use, so a process only
+pays for what it needs. startup_report records how long each startup phase
+took (imports, model and scaler load, explainer build, warmup); it is logged
+once the app is ready and exported on /metrics as
+credit_risk_startup_phase_seconds{phase=...}.
+
+warm_up() front-loads everything the first request would otherwise pay for.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Representative applicant used for warmup predictions
+WARMUP_RECORD = {
+    'person_age': 25, 'person_income': 30000.0, 'person_home_ownership': 'RENT',
+    'person_emp_length': 3.0, 'loan_intent': 'HOMEIMPROVEMENT', 'loan_grade': 'E',
+    'loan_amnt': 4800, 'loan_int_rate': 15.95, 'loan_percent_income': 0.16,
+    'cb_person_default_on_file': 'Y', 'cb_person_cred_hist_length': 2,
+}
+
+
+class StartupReport:
+    """Seconds spent per startup phase, in the order the phases first ran"""
+
+    def __init__(self):
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """Add seconds to a phase (phases can run more than once, e.g. a model reload)"""
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as one startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def phases(self):
+        with self._lock:
+            return dict(self._phases)
+
+    def log(self, title='Startup'):
+        """Log the per-phase breakdown at INFO"""
+        phases = self.phases()
+        breakdown = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in phases.items())
+        logger.info("✓ %s: %.2fs total (%s)", title, sum(phases.values()), breakdown or 'no phases')
+
+    def collect_metrics(self):
+        """Samples for MetricsRegistry.register_collector: (name, type, labels, value)"""
+        return [('startup_phase_seconds', 'gauge', {'phase': name}, seconds)
+                for name, seconds in self.phases().items()]
+
+
+# Process-wide report
+startup_report = StartupReport()
+metrics.register_collector(startup_report.collect_metrics)
+
+
+def warm_up(explainer=True):
+    """
+    Load the model, import shap and build the explainer, and run one
+    prediction (and explanation) so the first real request is not slower
+
+    Args:
+        explainer (bool): Also build the SHAP explainer and run one explanation
+
+    Returns:
+        bool: True if the model is loaded and warm
+    """
+    from app.services.predict_service import PredictService
+
+    # Model/scaler load and explainer build record their own phases
+    predict_service = PredictService()
+    if not predict_service.is_model_loaded():
+        logger.warning("Warmup skipped: model not loaded")
+        return False
+    if explainer:
+        from app.services.shap_service import ShapService
+        ShapService()._get_explainer()
+
+    # Warmup samples are not traffic; samples recorded earlier (model load) are kept
+    with startup_report.phase('warmup'), metrics.paused():
+        features = predict_service.prepare(WARMUP_RECORD)
+        predict_service.predict(features)
+        if explainer:
+            # Times every explanation method once, so latency-budgeted
+            # requests can choose between them from the start
+            ShapService().calibrate(features)
+    return True
@@ -0,0 +1,629 @@
+"""
+Benchmark suite for the prediction hot path
+
+Times each stage a GET /api/records/<id> request goes through, plus the batch
+paths, using rows from large_test_data.csv. Everything runs locally: the
+records are seeded into a temporary SQLite database, and if the configured
+model cannot be loaded a RandomForest is fitted on the CSV with a fixed seed.
+Result caches are bypassed so the numbers measure the compute path.
+
+Benchmarks:
+    preprocess[n=N]     preprocess_data (N=1) / preprocess_batch (N>1)
+    predict[n=N]        predict (N=1) / predict_batch (N>1)
+    shap_explain        ShapService.explain, one record per call
+    shap_explain_many[n=100]  ShapService.explain_many, 100 records per call
+    db_get_by_id        RecordModel.get_by_id
+    http_get_record     GET /api/records/<id> through the Flask test client
+
+Run from the 'backend' directory:
+    python tests/benchmark.py run -o bench.json [--sizes 1,10,100,1000,10000,100000]
+    python tests/benchmark.py compare baseline.json bench.json [--threshold 0.15]
+    python tests/benchmark.py shap-methods [--rows 200]
+    python tests/benchmark.py memory [--workers 4]
+    python tests/benchmark.py micro-batch [--threads 16] [--requests 4000]
+
+'run --baseline baseline.json' compares right after the run. Compare exits
+with status 1 when a benchmark's latency regresses by more than the threshold.
+'shap-methods' reports each explanation method's latency and how well its
+top-10 features agree with exact TreeSHAP. 'memory' starts worker processes
+that load the model by unpickling it and from the memory-mapped artifact cache
+(ARTIFACT_CACHE_DIR) and reports each worker's resident memory. 'micro-batch'
+sends single-record predictions from concurrent threads with and without
+micro-batching and reports throughput, latency and batch sizes.
+Set INFERENCE_ENGINE=compiled to benchmark the compiled tree evaluator.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DATA_PATH = os.path.join(TESTS_DIR, 'large_test_data.csv')
+SEED_SCRIPTS_DIR = os.path.join(BACKEND_DIR, '..', 'database', 'scripts')
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000, 100000)
+DEFAULT_ITERATIONS = 200
+DEFAULT_THRESHOLD = 0.15
+WARMUP_CALLS = 3
+QUANTILES = (50, 95, 99)
+
+# Records per explain_many call
+SHAP_BATCH_SIZE = 100
+
+# Records explained per method by compare_shap_methods
+SHAP_METHOD_ROWS = 200
+
+# Worker processes started per loading mode by measure_worker_memory
+MEMORY_WORKERS = 4
+
+# Worker body for measure_worker_memory: load (or not), report, then wait
+MEMORY_WORKER_SCRIPT = (
+    "import sys\n"
+    "from app.services.model_bundle import load_bundle\n"
+    "if sys.argv[1] == 'load':\n"
+    "    bundle = load_bundle()\n"
+    "else:\n"
+    "    import joblib, yaml, sklearn.ensemble, sklearn.neighbors  # the libraries a load imports\n"
+    "print('ready', flush=True)\n"
+    "sys.stdin.read()\n"
+)
+
+# Concurrent callers and predictions for compare_micro_batching
+MICRO_BATCH_THREADS = 16
+MICRO_BATCH_REQUESTS = 4000
+
+# Batch benchmarks repeat until about this many rows have been processed
+ROWS_PER_BATCH_BENCHMARK = 300000
+
+
+def summarize(samples, rows_per_call=1):
+    """
+    Latency statistics for one benchmark
+
+    Args:
+        samples (list): Seconds per call
+        rows_per_call (int): Rows processed by each call
+
+    Returns:
+        dict: iterations, batch_size, p50_ms, p95_ms, p99_ms, mean_ms, rows_per_sec
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    stats = {'iterations': int(samples.size), 'batch_size': rows_per_call}
+    for q in QUANTILES:
+        stats[f'p{q}_ms'] = float(np.percentile(samples, q) * 1000)
+    stats['mean_ms'] = float(samples.mean() * 1000)
+    stats['rows_per_sec'] = float(rows_per_call / np.median(samples))
+    return stats
+
+
+def time_calls(func, args_list):
+    """Call func(*args) for each args tuple after a short warmup; return seconds per call"""
+    for args in args_list[:WARMUP_CALLS]:
+        func(*args)
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _synthetic_model(scaler, df):
+    """Deterministic RandomForest fitted on the CSV when no trained model is available"""
+    from sklearn.ensemble import RandomForestClassifier
+    from app.services import FeaturePipeline
+
+    X = FeaturePipeline(scaler).transform(df)
+    y = df['loan_status'].to_numpy()
+    return RandomForestClassifier(n_estimators=100, random_state=0, n_jobs=1).fit(X, y)
+
+
+def _load_flask_app():
+    """Build the app from backend/app.py (shadowed on import by the 'app' package)"""
+    spec = importlib.util.spec_from_file_location('credit_risk_flask_app', os.path.join(BACKEND_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_app()
+
+
+@contextlib.contextmanager
+def benchmark_environment(model=None):
+    """
+    Point the services at a temporary seeded database and a model, then restore them
+
+    Args:
+        model: Fitted model to benchmark; defaults to the configured model,
+               or a synthetic RandomForest if that cannot be loaded
+
+    Yields:
+        dict: predict_service, shap_service, record_model, client, df, model_source and
+              customer_ids (the seeded records that can be scored)
+    """
+    import app.config.database as database
+    from app.models.record_model import RecordModel
+    from app.services.model_bundle import ModelBundle
+    from app.services.predict_service import PredictService
+    from app.services.shap_service import ShapService
+    from app.config.settings import Config
+
+    sys.path.insert(0, os.path.abspath(SEED_SCRIPTS_DIR))
+    import seed
+
+    df = pd.read_csv(TEST_DATA_PATH)
+    predict_service = PredictService()
+    shap_service = ShapService()
+    saved_bundle = predict_service.__dict__.get('_bundle')
+    saved_db_path = database.DB_PATH
+
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if model is not None:
+                model_source = f'given:{type(model).__name__}'
+            elif predict_service.is_model_loaded():
+                model = predict_service.bundle.model
+                model_source = f'configured:{predict_service.model_version}'
+            else:
+                model = None
+                model_source = 'synthetic:RandomForestClassifier(n_estimators=100, random_state=0)'
+
+            bundle = predict_service.bundle
+            scaler = bundle.scaler if bundle is not None else joblib.load(Config.SCALER_MODEL_PATH)
+            if model is None:
+                model = _synthetic_model(scaler, df)
+            # A fresh bundle also gives the run its own SHAP explainers
+            predict_service._bundle = ModelBundle(model, scaler, f'benchmark:{model_source}')
+            # Instance attributes shadow the class-level caches for the run
+            predict_service._prediction_cache = None
+            shap_service._explanation_cache = None
+
+            seed.DB_PATH = type(seed.DB_PATH)(os.path.join(workdir, 'benchmark.db'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed.initialize_database()
+                if not seed.seed_from_csv(csv_path=TEST_DATA_PATH):
+                    raise RuntimeError('Could not seed the benchmark database')
+            database.close_db_connection()
+            database.DB_PATH = str(seed.DB_PATH)
+            # Rows with NULL inputs cannot be scored live; requests for them skip prediction and SHAP
+            complete = np.flatnonzero(df.notna().all(axis=1).to_numpy())
+            customer_ids = [seed.START_CUSTOMER_ID + int(i) for i in complete]
+
+            yield {
+                'predict_service': predict_service,
+                'shap_service': shap_service,
+                'record_model': RecordModel(),
+                'client': _load_flask_app().test_client(),
+                'customer_ids': customer_ids,
+                'df': df,
+                'model_source': model_source,
+            }
+        finally:
+            database.close_db_connection()
+            database.DB_PATH = saved_db_path
+            if saved_bundle is None:
+                predict_service.__dict__.pop('_bundle', None)
+            else:
+                predict_service._bundle = saved_bundle
+            predict_service.__dict__.pop('_prediction_cache', None)
+            shap_service.__dict__.pop('_explanation_cache', None)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, iterations=DEFAULT_ITERATIONS, model=None, log=print):
+    """
+    Run the whole suite
+
+    Args:
+        sizes (list): Batch sizes for the preprocess/predict benchmarks
+        iterations (int): Calls per single-record benchmark
+        model: Model to benchmark (see benchmark_environment)
+        log (callable): Progress output
+
+    Returns:
+        dict: {'meta': {...}, 'results': {benchmark: stats}}
+    """
+    import logging
+    import sklearn
+
+    results = {}
+    # Keep per-request logging out of the timings
+    app_logger = logging.getLogger('app')
+    saved_level = app_logger.level
+    app_logger.setLevel(logging.WARNING)
+
+    with contextlib.ExitStack() as stack:
+        stack.callback(app_logger.setLevel, saved_level)
+        env = stack.enter_context(benchmark_environment(model))
+        predict_service = env['predict_service']
+        df = env['df']
+        records = df.to_dict('records')
+        rng = np.random.default_rng(0)
+
+        def single_args(n):
+            return [(records[i],) for i in rng.integers(0, len(records), n)]
+
+        def record(name, samples, rows_per_call=1):
+            results[name] = summarize(samples, rows_per_call)
+            stats = results[name]
+            log(f"{name:<28} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                f"p99 {stats['p99_ms']:9.3f} ms  {stats['rows_per_sec']:12,.0f} rows/sec")
+
+        for size in sizes:
+            if size == 1:
+                record('preprocess[n=1]', time_calls(predict_service.preprocess_data, single_args(iterations)))
+                record('predict[n=1]', time_calls(predict_service.predict, single_args(iterations)))
+                continue
+            batch = [records[i] for i in np.resize(np.arange(len(records)), size)]
+            repeats = max(3, min(iterations, ROWS_PER_BATCH_BENCHMARK // size))
+            record(f'preprocess[n={size}]', time_calls(predict_service.preprocess_batch, [(batch,)] * repeats), size)
+            record(f'predict[n={size}]', time_calls(predict_service.predict_batch, [(batch,)] * repeats), size)
+
+        record('shap_explain', time_calls(env['shap_service'].explain, single_args(max(iterations // 4, 5))))
+        shap_batches = [([records[i] for i in rng.integers(0, len(records), SHAP_BATCH_SIZE)],)
+                        for _ in range(max(iterations // 40, 3))]
+        record(f'shap_explain_many[n={SHAP_BATCH_SIZE}]', time_calls(env['shap_service'].explain_many, shap_batches),
+               SHAP_BATCH_SIZE)
+
+        ids = [int(i) for i in rng.choice(env['customer_ids'], iterations)]
+        record('db_get_by_id', time_calls(env['record_model'].get_by_id, [(i,) for i in ids]))
+
+        client = env['client']
+
+        def get_record(customer_id):
+            response = client.get(f'/api/records/{customer_id}')
+            if response.status_code != 200:
+                raise RuntimeError(f'GET /api/records/{customer_id} returned {response.status_code}')
+
+        record('http_get_record', time_calls(get_record, [(i,) for i in ids[:max(iterations // 4, 5)]]))
+        model_source = env['model_source']
+        engine = 'compiled' if predict_service.bundle.engine is not None else 'sklearn'
+
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'model': model_source,
+        'inference_engine': engine,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sizes': list(sizes),
+        'iterations': iterations,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def rank_agreement(reference, approximate):
+    """
+    Agreement between two sets of top-k explanations (TopKExplanations.indices)
+
+    Returns:
+        dict: top_k_overlap (mean share of the reference top-k also in the
+              approximate top-k), top1_agreement and same_order (share of rows
+              whose top-k lists are identical)
+    """
+    overlap, top1, same = [], [], []
+    for expected, actual in zip(reference, approximate):
+        expected = [int(i) for i in expected if i >= 0]
+        actual = [int(i) for i in actual if i >= 0]
+        overlap.append(len(set(expected) & set(actual)) / max(len(expected), 1))
+        top1.append(expected[:1] == actual[:1])
+        same.append(expected == actual)
+    return {
+        'top_k_overlap': float(np.mean(overlap)),
+        'top1_agreement': float(np.mean(top1)),
+        'same_order': float(np.mean(same)),
+    }
+
+
+def compare_shap_methods(rows=SHAP_METHOD_ROWS, model=None, log=print):
+    """
+    Latency and top-10 agreement with exact TreeSHAP of each explanation method
+
+    Explains the same complete rows of large_test_data.csv one call per row
+    with every method in ShapService.METHODS.
+
+    Args:
+        rows (int): Records to explain
+        model: Model to explain (see benchmark_environment)
+        log (callable): Progress output
+
+    Returns:
+        dict: {method: {p50_ms, p95_ms, p99_ms, mean_ms, ..., top_k_overlap, top1_agreement, same_order}}
+    """
+    import logging
+    from app.services.shap_service import METHODS, TOP_K
+
+    results = {}
+    app_logger = logging.getLogger('app')
+    saved_level = app_logger.level
+    app_logger.setLevel(logging.WARNING)
+
+    with contextlib.ExitStack() as stack:
+        stack.callback(app_logger.setLevel, saved_level)
+        env = stack.enter_context(benchmark_environment(model))
+        shap_service = env['shap_service']
+        df = env['df']
+        complete = df[df.notna().all(axis=1)]
+        sample = complete.sample(min(rows, len(complete)), random_state=0).to_dict('records')
+
+        top = {}
+        for method in METHODS:
+            indices = []
+
+            def explain(record):
+                indices.append(shap_service.explain_many([record], TOP_K, method=method).indices[0])
+
+            shap_service.explain_many(sample[:1], TOP_K, method=method)
+            samples = time_calls(explain, [(record,) for record in sample])
+            top[method] = indices[WARMUP_CALLS:]
+            results[method] = summarize(samples)
+            results[method].update(rank_agreement(top['exact'], top[method]))
+            stats = results[method]
+            log(f"{method:<16} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                f"top-{TOP_K} overlap {stats['top_k_overlap']:6.1%}  top-1 {stats['top1_agreement']:6.1%}  "
+                f"same order {stats['same_order']:6.1%}")
+    return results
+
+
+def compare_micro_batching(threads=MICRO_BATCH_THREADS, requests=MICRO_BATCH_REQUESTS, model=None, log=print):
+    """
+    Throughput of concurrent single-record predict() calls with and without micro-batching
+
+    Args:
+        threads (int): Concurrent callers
+        requests (int): Predictions per mode
+        model: Model to benchmark (see benchmark_environment)
+        log (callable): Report output
+
+    Returns:
+        dict: {'off': stats, 'on': stats, 'throughput_gain': on/off requests per second},
+              stats as in summarize() plus requests_per_sec (and mean_batch_size when on)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = {}
+    with benchmark_environment(model) as env:
+        predict_service = env['predict_service']
+        df = env['df']
+        records = df[df.notna().all(axis=1)].head(500).to_dict('records')
+        features = [predict_service.prepare(records[i % len(records)]) for i in range(requests)]
+
+        def call(prepared):
+            start = time.perf_counter()
+            predict_service.predict(prepared)
+            return time.perf_counter() - start
+
+        try:
+            for mode in ('off', 'on'):
+                if mode == 'on':
+                    batcher = predict_service.enable_micro_batching()
+                with ThreadPoolExecutor(threads) as pool:
+                    list(pool.map(call, features[:threads * WARMUP_CALLS]))
+                    start = time.perf_counter()
+                    samples = list(pool.map(call, features))
+                    elapsed = time.perf_counter() - start
+                stats = summarize(samples)
+                stats['requests_per_sec'] = requests / elapsed
+                if mode == 'on':
+                    stats['mean_batch_size'] = batcher.counts['rows'] / max(batcher.counts['batches'], 1)
+                results[mode] = stats
+        finally:
+            predict_service.disable_micro_batching()
+
+    results['throughput_gain'] = results['on']['requests_per_sec'] / results['off']['requests_per_sec']
+    log(f"Model: {env['model_source']}, {threads} threads, {requests} predictions")
+    log(f"{'batching':<9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'batch size':>11}")
+    for mode in ('off', 'on'):
+        stats = results[mode]
+        log(f"{mode:<9} {stats['requests_per_sec']:>9.0f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+            f"{stats.get('mean_batch_size', 1.0):>11.1f}")
+    log(f"Throughput gain: {results['throughput_gain']:.2f}x")
+    return results
+
+
+def _worker_memory(env, workers, load=True):
+    """Start workers, wait until each has loaded the model and read their memory from /proc"""
+    import subprocess
+    from app.utils.memory import memory_usage
+
+    children = [subprocess.Popen([sys.executable, '-c', MEMORY_WORKER_SCRIPT, 'load' if load else 'skip'],
+                                 cwd=BACKEND_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, text=True)
+                for _ in range(workers)]
+    try:
+        for child in children:
+            if child.stdout.readline().strip() != 'ready':
+                raise RuntimeError(f'Memory worker failed with status {child.wait()}')
+        # Read while every worker is alive, so shared pages are split between them in PSS
+        return [memory_usage(child.pid) for child in children]
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+
+
+def measure_worker_memory(workers=MEMORY_WORKERS, log=print):
+    """
+    Resident memory of worker processes that each load the model
+
+    Compares workers that load nothing (interpreter and imports only), that
+    unpickle model.pkl, and that map the artifact cache. The cache is
+    converted by one extra process before it is measured. The model is the
+    configured one, or the synthetic RandomForest.
+
+    Args:
+        workers (int): Worker processes per mode
+        log (callable): Report output
+
+    Returns:
+        dict: {mode: {'rss_mb': [...], 'pss_mb': [...], 'anon_mb': [...], 'total_pss_mb'}}
+    """
+    import pickle
+    from app.config.settings import Config
+    from app.services.model_bundle import resolve_meta_path
+    from app.utils.memory import memory_usage
+
+    if not memory_usage():
+        raise RuntimeError('Process memory is only available on Linux (/proc)')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            meta_path = resolve_meta_path(os.getenv('MODEL_META_PATH', Config.MODEL_PATH))
+            if not os.path.exists(meta_path):
+                raise FileNotFoundError(meta_path)
+            model_source = f'configured:{meta_path}'
+        except (OSError, FileNotFoundError):
+            model = _synthetic_model(joblib.load(Config.SCALER_MODEL_PATH), pd.read_csv(TEST_DATA_PATH))
+            with open(os.path.join(workdir, 'model.pkl'), 'wb') as f:
+                pickle.dump(model, f)
+            meta_path = os.path.join(workdir, 'meta.yaml')
+            with open(meta_path, 'w') as f:
+                f.write(f"name: BenchmarkModel\nversion: 1\nstorage_location: {workdir}\n")
+            model_source = 'synthetic:RandomForestClassifier(n_estimators=100, random_state=0)'
+
+        env = dict(os.environ, MODEL_META_PATH=meta_path, LOG_LEVEL='WARNING')
+        env.pop('ARTIFACT_CACHE_DIR', None)
+        mmap_env = dict(env, ARTIFACT_CACHE_DIR=os.path.join(workdir, 'artifact_cache'))
+        _worker_memory(mmap_env, 1)  # converts the cache
+
+        log(f"Model: {model_source}, INFERENCE_ENGINE={env.get('INFERENCE_ENGINE', Config.INFERENCE_ENGINE)}")
+        log(f"{'mode':<10} {'worker RSS MB':>14} {'anon MB':>9} {'file MB':>9} {'PSS MB':>8}")
+        for mode, mode_env, load in (('no model', env, False), ('pickle', env, True), ('mmap', mmap_env, True)):
+            usage = _worker_memory(mode_env, workers, load)
+            result = {kind: [round(u.get(kind, 0) / 2**20, 1) for u in usage] for kind in ('rss', 'anon', 'file', 'pss')}
+            results[mode] = {f'{kind}_mb': values for kind, values in result.items()}
+            results[mode]['total_pss_mb'] = round(sum(result['pss']), 1)
+            log(f"{mode:<10} {np.mean(result['rss']):>14.1f} {np.mean(result['anon']):>9.1f} "
+                f"{np.mean(result['file']):>9.1f} {np.mean(result['pss']):>8.1f}")
+        log(f"Total PSS of {workers} workers: " +
+            ', '.join(f"{mode} {result['total_pss_mb']:.0f} MB" for mode, result in results.items()))
+    return results
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, stat='p50_ms'):
+    """
+    Compare two benchmark runs
+
+    Args:
+        baseline (dict): Earlier run_benchmarks() result
+        current (dict): New run_benchmarks() result
+        threshold (float): Allowed relative slowdown, e.g. 0.15 = 15%
+        stat (str): Latency statistic to compare (p50_ms, p95_ms, p99_ms, mean_ms)
+
+    Returns:
+        list: (benchmark, baseline value, current value, relative change, regressed) rows
+    """
+    rows = []
+    for name, base_stats in baseline['results'].items():
+        stats = current['results'].get(name)
+        if stats is None:
+            continue
+        before, after = base_stats[stat], stats[stat]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def report_comparison(baseline, current, threshold=DEFAULT_THRESHOLD, stat='p50_ms', log=print):
+    """Print the comparison table; return True if nothing regressed"""
+    if baseline['meta'].get('model') != current['meta'].get('model'):
+        log(f"Warning: comparing different models ({baseline['meta'].get('model')} vs {current['meta'].get('model')})")
+    rows = compare(baseline, current, threshold, stat)
+    log(f"{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, before, after, change, regressed in rows:
+        flag = '  ✗ REGRESSION' if regressed else ''
+        log(f"{name:<28} {before:10.3f}ms {after:10.3f}ms {change:+8.1%}{flag}")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        log(f"✗ {len(regressions)} benchmark(s) slower than baseline by more than {threshold:.0%} ({stat})")
+        return False
+    log(f"✓ No {stat} regression above {threshold:.0%}")
+    return True
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the prediction hot path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and write JSON results')
+    run_parser.add_argument('-o', '--output', default='benchmark_results.json', help='Results file')
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='Comma-separated batch sizes')
+    run_parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                            help='Calls per single-record benchmark')
+    run_parser.add_argument('--baseline', help='Compare against this results file after the run')
+
+    shap_parser = commands.add_parser('shap-methods', help='Compare explanation methods with exact SHAP')
+    shap_parser.add_argument('--rows', type=int, default=SHAP_METHOD_ROWS, help='Records to explain')
+    shap_parser.add_argument('-o', '--output', help='Also write the results as JSON')
+
+    memory_parser = commands.add_parser('memory', help='Per-worker memory with and without the artifact cache')
+    memory_parser.add_argument('--workers', type=int, default=MEMORY_WORKERS, help='Worker processes per mode')
+    memory_parser.add_argument('-o', '--output', help='Also write the results as JSON')
+
+    batch_parser = commands.add_parser('micro-batch', help='Concurrent predictions with and without micro-batching')
+    batch_parser.add_argument('--threads', type=int, default=MICRO_BATCH_THREADS, help='Concurrent callers')
+    batch_parser.add_argument('--requests', type=int, default=MICRO_BATCH_REQUESTS, help='Predictions per mode')
+    batch_parser.add_argument('-o', '--output', help='Also write the results as JSON')
+
+    compare_parser = commands.add_parser('compare', help='Compare two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help='Allowed relative slowdown before failing (default: 0.15)')
+        sub.add_argument('--stat', default='p50_ms', choices=('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'),
+                         help='Latency statistic to compare')
+
+    args = parser.parse_args(argv)
+
+    if args.command in ('shap-methods', 'memory', 'micro-batch'):
+        if args.command == 'memory':
+            results = measure_worker_memory(args.workers)
+        elif args.command == 'micro-batch':
+            results = compare_micro_batching(args.threads, args.requests)
+        else:
+            results = compare_shap_methods(args.rows)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    if args.command == 'run':
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        current = run_benchmarks(sizes, args.iterations)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = _load_json(args.baseline)
+    else:
+        baseline, current = _load_json(args.baseline), _load_json(args.current)
+
+    return 0 if report_comparison(baseline, current, args.threshold, args.stat) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
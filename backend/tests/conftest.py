@@ -0,0 +1,89 @@
+"""
+Shared pytest fixtures for the backend tests
+"""
+import os
+import sys
+
+import joblib
+import pandas as pd
+import pytest
+
+# Add the backend directory to the Python path to allow for absolute imports
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DATA_PATH = os.path.join(os.path.dirname(__file__), 'large_test_data.csv')
+SCALER_PATH = os.path.join(BACKEND_DIR, 'app', 'models', 'scaler.pkl')
+
+
+@pytest.fixture(scope='session')
+def scaler():
+    """The StandardScaler shipped with the backend"""
+    return joblib.load(SCALER_PATH)
+
+
+@pytest.fixture(scope='session')
+def test_df():
+    """Holdout data in the raw credit_risk_records schema"""
+    return pd.read_csv(TEST_DATA_PATH)
+
+
+@pytest.fixture(scope='session')
+def complete_df(test_df):
+    """Holdout rows without missing values (not every model flavor accepts NaN)"""
+    return test_df.dropna().reset_index(drop=True)
+
+
+@pytest.fixture(scope='session')
+def training_data(scaler, complete_df):
+    """(X, y) in model feature space, built with the serving pipeline"""
+    from app.services.feature_pipeline import FeaturePipeline
+    X = FeaturePipeline(scaler).transform(complete_df)
+    return X, complete_df['loan_status'].to_numpy()
+
+
+@pytest.fixture
+def loaded_service(scaler):
+    """
+    Factory that loads a given fitted model into the PredictService singleton
+    (the registered mlruns models are not available to the tests) and
+    restores the previous state afterwards.
+    """
+    from app.services.model_bundle import ModelBundle
+    from app.services.predict_service import PredictService
+    service = PredictService()
+    saved = service.__dict__.get('_bundle')
+
+    def load(model):
+        # A distinct version per model keeps cached results from leaking between tests
+        service._bundle = ModelBundle(model, scaler, f'test-{type(model).__name__}:{id(model)}')
+        return service
+
+    yield load
+    if saved is None:
+        service.__dict__.pop('_bundle', None)
+    else:
+        service._bundle = saved
+
+
+@pytest.fixture
+def model_registry(tmp_path):
+    """
+    Temporary mlruns-style registered model: (registry directory, register)
+    where register(version, model) writes model as version-N
+    """
+    import pickle
+    registry = tmp_path / 'models' / 'TestModel'
+
+    def register(version, model):
+        artifacts = tmp_path / 'artifacts' / f'v{version}'
+        artifacts.mkdir(parents=True)
+        with open(artifacts / 'model.pkl', 'wb') as f:
+            pickle.dump(model, f)
+        version_dir = registry / f'version-{version}'
+        version_dir.mkdir(parents=True)
+        (version_dir / 'meta.yaml').write_text(
+            f"name: TestModel\nversion: {version}\nstorage_location: {artifacts.as_uri()}\n")
+        return version_dir / 'meta.yaml'
+
+    return registry, register
@@ -0,0 +1,93 @@
+"""
+Artifact cache tests: a model loaded through the cache predicts exactly like
+the pickled one, its arrays are memory-mapped, and a changed model.pkl gets
+a new cache entry.
+"""
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.neighbors import KNeighborsClassifier
+
+from app.config.settings import Config
+from app.services.compiled_forest import CompiledForest
+from app.services.model_bundle import load_bundle
+from app.utils.memory import format_memory, memory_usage
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'artifact_cache'
+    monkeypatch.setattr(Config, 'ARTIFACT_CACHE_DIR', str(directory))
+    return directory
+
+
+def test_mapped_model_matches_pickled_model(cache_dir, model_registry, training_data):
+    X, y = training_data
+    _, register = model_registry
+    model = KNeighborsClassifier(n_neighbors=5).fit(X, y)
+    meta_path = register(1, model)
+
+    bundle = load_bundle(meta_path)
+
+    assert len(list(cache_dir.iterdir())) == 1
+    assert isinstance(bundle.model._fit_X, np.memmap)  # training data shared, not copied
+    assert isinstance(bundle.scaler.mean_, np.memmap)
+    np.testing.assert_array_equal(bundle.model.predict_proba(X[:200]), model.predict_proba(X[:200]))
+    assert load_bundle(meta_path).version == 'TestModel:1'
+    assert len(list(cache_dir.iterdir())) == 1  # converted once
+
+
+def test_compiled_engine_is_cached_and_mapped(cache_dir, model_registry, training_data, monkeypatch):
+    X, y = training_data
+    _, register = model_registry
+    monkeypatch.setattr(Config, 'INFERENCE_ENGINE', 'compiled')
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    meta_path = register(1, model)
+
+    load_bundle(meta_path)
+    bundle = load_bundle(meta_path)
+
+    assert isinstance(bundle.engine, CompiledForest)
+    assert isinstance(bundle.engine.leaf_proba, np.memmap)
+    np.testing.assert_array_equal(bundle.engine.predict_proba(X[:50]), model.predict_proba(X[:50]))
+
+
+def test_uncompilable_model_is_compiled_once(cache_dir, model_registry, training_data, monkeypatch):
+    import app.services.artifact_cache as artifact_cache
+    import app.services.model_bundle as model_bundle
+
+    X, y = training_data
+    _, register = model_registry
+    monkeypatch.setattr(Config, 'INFERENCE_ENGINE', 'compiled')
+    meta_path = register(1, KNeighborsClassifier(n_neighbors=3).fit(X, y))
+    calls = []
+    for module in (artifact_cache, model_bundle):
+        monkeypatch.setattr(module, 'compile_model', lambda model: calls.append(model) and None)
+
+    assert load_bundle(meta_path).engine is None
+    assert len(calls) == 1
+
+
+def test_changed_model_gets_a_new_entry(cache_dir, model_registry, training_data):
+    X, y = training_data
+    _, register = model_registry
+    meta_path = register(1, KNeighborsClassifier(n_neighbors=3).fit(X, y))
+    load_bundle(meta_path)
+
+    model_file = meta_path.parents[3] / 'artifacts' / 'v1' / 'model.pkl'
+    replacement = KNeighborsClassifier(n_neighbors=7).fit(X, y)
+    with open(model_file, 'wb') as f:
+        pickle.dump(replacement, f)
+
+    assert load_bundle(meta_path).model.n_neighbors == 7
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_memory_usage_reports_resident_memory():
+    usage = memory_usage()
+    if not usage:
+        pytest.skip('/proc is not available')
+    assert usage['rss'] > 0 and usage['anon'] + usage['file'] <= usage['rss'] + usage.get('shmem', 0)
+    assert format_memory(usage).startswith('RSS ')
@@ -0,0 +1,85 @@
+"""
+Tests for the ASGI entry point and its bounded stages
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from app.utils.stages import Stage
+from benchmark import benchmark_environment
+
+
+@pytest.fixture(scope='module')
+def environment(training_data):
+    """Seeded temporary database and a small model behind both the Flask and ASGI apps"""
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    with benchmark_environment(model) as env:
+        yield env
+
+
+def test_routes_match_flask(environment):
+    from app.asgi import app
+
+    customer_id = environment['customer_ids'][0]
+    payload = b'{"person_age": 30}\nnot json\n'
+    with TestClient(app) as asgi_client:
+        for method, path, body in [('get', '/health', None),
+                                   ('get', f'/api/records/{customer_id}', None),
+                                   ('get', f'/api/records/{customer_id}?shap_method=saabas', None),
+                                   ('get', f'/api/records/{customer_id}?shap_method=kernel', None),
+                                   ('get', '/api/records/1', None),
+                                   ('post', '/api/records/score', payload)]:
+            flask_response = getattr(environment['client'], method)(path, **({'data': body} if body else {}))
+            asgi_response = getattr(asgi_client, method)(path, **({'content': body} if body else {}))
+            assert asgi_response.status_code == flask_response.status_code, path
+            assert asgi_response.json() == flask_response.get_json(), path
+
+        assert 'shap_explanation' in asgi_client.get(f'/api/records/{customer_id}').json()
+        assert asgi_client.get(f'/api/records/{customer_id}?shap_method=saabas').json()['shap_method'] == 'saabas'
+        assert 'credit_risk_stage_concurrency' in asgi_client.get('/metrics').text
+
+
+def test_stage_limits_concurrency():
+    stage = Stage('test_limit', 2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    async def main():
+        await asyncio.gather(*(stage.run(work) for _ in range(8)))
+
+    asyncio.run(main())
+    stage.shutdown()
+    assert peak[0] == 2
+
+
+def test_saturated_stage_does_not_block_other_stages():
+    slow, fast = Stage('test_slow', 1), Stage('test_fast', 1)
+    release = threading.Event()
+
+    async def main():
+        blocked = [asyncio.ensure_future(slow.run(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        assert await fast.run(lambda: 'ok') == 'ok'
+        elapsed = time.perf_counter() - start
+        assert slow.waiting == 2
+        release.set()
+        await asyncio.gather(*blocked)
+        return elapsed
+
+    assert asyncio.run(main()) < 0.5
+    slow.shutdown()
+    fast.shutdown()
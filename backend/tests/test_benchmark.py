@@ -0,0 +1,58 @@
+"""
+Smoke tests for the benchmark suite (tests/benchmark.py)
+"""
+import json
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+import benchmark
+
+
+def _run(p50_ms):
+    return {'meta': {'model': 'test'},
+            'results': {name: {'p50_ms': value} for name, value in p50_ms.items()}}
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = _run({'predict[n=1]': 10.0, 'shap_explain': 20.0, 'db_get_by_id': 1.0})
+    current = _run({'predict[n=1]': 10.9, 'shap_explain': 25.0, 'http_get_record': 5.0})
+
+    rows = {name: regressed for name, _, _, _, regressed in benchmark.compare(baseline, current, threshold=0.1)}
+
+    assert rows == {'predict[n=1]': False, 'shap_explain': True}
+
+
+def test_main_compare_exit_status(tmp_path):
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    baseline.write_text(json.dumps(_run({'predict[n=1]': 10.0})))
+    current.write_text(json.dumps(_run({'predict[n=1]': 13.0})))
+
+    assert benchmark.main(['compare', str(baseline), str(current), '--threshold', '0.5']) == 0
+    assert benchmark.main(['compare', str(baseline), str(current), '--threshold', '0.2']) == 1
+
+
+def test_quick_run_covers_every_stage(training_data):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+    result = benchmark.run_benchmarks(sizes=[1, 50], iterations=8, model=model, log=lambda line: None)
+
+    assert set(result['results']) == {
+        'preprocess[n=1]', 'predict[n=1]', 'preprocess[n=50]', 'predict[n=50]',
+        'shap_explain', 'shap_explain_many[n=100]', 'db_get_by_id', 'http_get_record',
+    }
+    for stats in result['results'].values():
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+        assert stats['rows_per_sec'] > 0
+    assert result['results']['predict[n=50]']['batch_size'] == 50
+    json.dumps(result)
+
+
+def test_rank_agreement():
+    reference = np.array([[1, 2, 3], [4, 5, -1]])
+    approximate = np.array([[1, 3, 2], [4, 5, -1]])
+
+    agreement = benchmark.rank_agreement(reference, approximate)
+
+    assert agreement == {'top_k_overlap': 1.0, 'top1_agreement': 1.0, 'same_order': 0.5}
@@ -0,0 +1,143 @@
+"""
+Tests for the LRU+TTL result cache and the prediction lookups that use it
+"""
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.model_bundle import ModelBundle
+from app.utils.cache import LRUCache, estimate_size
+from benchmark import benchmark_environment
+
+
+def test_evicts_least_recently_used_within_budget():
+    entry_size = estimate_size('a') + estimate_size({'risk_score': 0.5})
+    cache = LRUCache('test', max_bytes=entry_size * 2)
+
+    cache.set('a', {'risk_score': 0.5})
+    cache.set('b', {'risk_score': 0.5})
+    cache.get('a')
+    cache.set('c', {'risk_score': 0.5})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'risk_score': 0.5}
+    assert cache.stats()['evictions'] == 1
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('app.utils.cache.time.monotonic', lambda: now[0])
+    cache = LRUCache('test', max_bytes=10_000, ttl=60)
+
+    cache.set('key', 'value')
+    now[0] += 59
+    assert cache.get('key') == 'value'
+    now[0] += 2
+    assert cache.get('key') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_new_generation_drops_entries():
+    cache = LRUCache('test', max_bytes=10_000)
+    cache.ensure_generation('RF:11')
+    cache.set('key', 'value')
+
+    cache.ensure_generation('RF:11')
+    assert cache.get('key') == 'value'
+    cache.ensure_generation('RF:12')
+    assert cache.get('key') is None
+    assert cache.bytes == 0
+
+
+def test_arrays_are_sized_once():
+    owned = np.zeros(1000)
+    view = owned[:10]
+
+    assert estimate_size(owned) == sys.getsizeof(owned)  # buffer already included
+    assert estimate_size(view) == sys.getsizeof(view) + view.nbytes
+
+@pytest.fixture
+def cached_service(loaded_service, training_data):
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    service._prediction_cache = LRUCache('prediction', max_bytes=1_000_000)
+    yield service
+    service.__dict__.pop('_prediction_cache', None)
+
+
+def _count_inference(service, monkeypatch):
+    calls = []
+    infer = service._infer
+    monkeypatch.setattr(service, '_infer', lambda *args: calls.append(1) or infer(*args))
+    return calls
+
+
+def test_predict_serves_repeat_records_from_cache(cached_service, complete_df, monkeypatch):
+    record = complete_df.iloc[0].to_dict()
+    calls = _count_inference(cached_service, monkeypatch)
+
+    first = cached_service.predict(record)
+    assert cached_service.predict({**record, 'customer_id': 'other'}) == first
+    assert cached_service.cached_prediction(record) == first
+    assert len(calls) == 1
+
+
+def test_model_swap_invalidates_cached_predictions(cached_service, training_data, complete_df, monkeypatch):
+    X, y = training_data
+    record = complete_df.iloc[0].to_dict()
+    cached_service.predict(record)
+
+    bundle = cached_service.bundle
+    cached_service.swap(ModelBundle(RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y),
+                                    bundle.scaler, 'test-swapped'))
+    assert cached_service.cached_prediction(record) is None
+    calls = _count_inference(cached_service, monkeypatch)
+    cached_service.predict(record)
+    assert len(calls) == 1
+
+
+def test_reloading_the_same_version_invalidates_cached_predictions(cached_service, training_data, complete_df):
+    X, y = training_data
+    record = complete_df.iloc[0].to_dict()
+    cached_service.predict(record)
+
+    bundle = cached_service.bundle
+    retrained = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y)
+    cached_service.swap(ModelBundle(retrained, bundle.scaler, bundle.version))
+
+    assert cached_service.cached_prediction(record) is None
+    expected = round(float(retrained.predict_proba(cached_service.prepare(record).matrix)[0, 1]), 4)
+    assert cached_service.predict(record)['risk_score'] == expected
+
+def test_cached_record_lookup_skips_preprocessing(training_data, monkeypatch):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    with benchmark_environment(model) as env:
+        service = env['predict_service']
+        service._prediction_cache = LRUCache('prediction', max_bytes=1_000_000)
+        client, customer_id = env['client'], env['customer_ids'][0]
+        first = client.get(f'/api/records/{customer_id}').get_json()
+
+        prepared = []
+        prepare = service.prepare
+        monkeypatch.setattr(service, 'prepare', lambda *args: prepared.append(1) or prepare(*args))
+        second = client.get(f'/api/records/{customer_id}').get_json()
+        monkeypatch.undo()
+        service.__dict__.pop('_prediction_cache', None)
+
+    assert second['risk_prediction'] == first['risk_prediction']
+    assert prepared == []
+
+
+def test_record_lookup_without_model_reports_the_load_error(training_data, monkeypatch):
+    X, y = training_data
+    with benchmark_environment(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)) as env:
+        service = env['predict_service']
+        monkeypatch.setattr(service, '_bundle', None)
+        record = env['client'].get(f"/api/records/{env['customer_ids'][0]}").get_json()
+        monkeypatch.undo()
+
+    assert record['risk_prediction_error'].startswith('Model not loaded')
@@ -0,0 +1,84 @@
+"""
+Compiled tree-ensemble tests: the flat-array evaluator must reproduce each
+supported model's predict_proba exactly and refuse everything else.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import BaggingClassifier, ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from app.config.settings import Config
+from app.services.compiled_forest import CompiledForest, UnsupportedModel, compile_model
+
+SUPPORTED_FLAVORS = {
+    'random_forest': lambda: RandomForestClassifier(n_estimators=30, random_state=0),
+    'extra_trees': lambda: ExtraTreesClassifier(n_estimators=30, random_state=0),
+    # Feature subsets and small bags exercise estimators_features_ and members
+    # that only saw some of the classes
+    'bagging': lambda: BaggingClassifier(DecisionTreeClassifier(), n_estimators=30, max_samples=0.05,
+                                         max_features=0.6, random_state=0),
+    'decision_tree': lambda: DecisionTreeClassifier(max_depth=8, random_state=0),
+}
+
+
+@pytest.fixture(params=sorted(SUPPORTED_FLAVORS))
+def fitted_tree_model(request, training_data):
+    X, y = training_data
+    return SUPPORTED_FLAVORS[request.param]().fit(X, y)
+
+
+def test_probabilities_match_sklearn(fitted_tree_model, training_data):
+    X, _ = training_data
+    engine = compile_model(fitted_tree_model)
+
+    assert engine is not None
+    np.testing.assert_array_equal(engine.predict_proba(X), fitted_tree_model.predict_proba(X))
+    np.testing.assert_array_equal(engine.predict_proba(X[:1]), fitted_tree_model.predict_proba(X[:1]))
+
+
+def test_missing_values_follow_sklearn(fitted_tree_model, training_data):
+    X, _ = training_data
+    X = X[:200].copy()
+    X[::2, -1] = np.nan
+    X[::3, 35] = np.nan
+    engine = compile_model(fitted_tree_model)
+
+    try:
+        expected = fitted_tree_model.predict_proba(X)
+    except ValueError:
+        with pytest.raises(ValueError):
+            engine.predict_proba(X)
+    else:
+        np.testing.assert_array_equal(engine.predict_proba(X), expected)
+
+
+def test_unsupported_models_fall_back(training_data):
+    X, y = training_data
+    model = LogisticRegression(max_iter=200).fit(X, y)
+
+    with pytest.raises(UnsupportedModel):
+        CompiledForest(model)
+    assert compile_model(model) is None
+
+
+def test_wrong_feature_count_is_rejected(training_data):
+    X, y = training_data
+    engine = compile_model(DecisionTreeClassifier(max_depth=3).fit(X, y))
+
+    with pytest.raises(ValueError):
+        engine.predict_proba(X[:, :-1])
+
+
+def test_predict_service_uses_compiled_engine(monkeypatch, loaded_service, complete_df, training_data):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y)
+    records = complete_df.head(50).to_dict('records')
+    expected = loaded_service(model).predict_batch(records)
+
+    monkeypatch.setattr(Config, 'INFERENCE_ENGINE', 'compiled')
+    service = loaded_service(model)
+
+    assert isinstance(service.bundle.engine, CompiledForest)
+    assert service.predict_batch(records) == expected
+    assert [service.predict(record) for record in records[:5]] == expected[:5]
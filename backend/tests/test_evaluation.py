@@ -0,0 +1,66 @@
+"""
+Tests for the streaming evaluation accumulator
+"""
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support, roc_auc_score
+
+from app.utils.evaluation import StreamingEvaluation
+
+
+def _sample(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, n)
+    y_score = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1)
+    return y_true, (y_score >= 0.5).astype(int), y_score
+
+
+def _exact_ks(y_true, y_score):
+    thresholds = np.sort(np.unique(y_score))
+    pos = np.sort(y_score[y_true == 1])
+    neg = np.sort(y_score[y_true == 0])
+    cdf_pos = np.searchsorted(pos, thresholds, side='right') / len(pos)
+    cdf_neg = np.searchsorted(neg, thresholds, side='right') / len(neg)
+    return np.max(np.abs(cdf_pos - cdf_neg))
+
+
+def test_chunked_metrics_match_sklearn():
+    y_true, y_pred, y_score = _sample()
+    evaluation = StreamingEvaluation()
+    for start in range(0, len(y_true), 3000):
+        end = start + 3000
+        evaluation.update(y_true[start:end], y_pred[start:end], y_score[start:end])
+
+    assert evaluation.count == len(y_true)
+    np.testing.assert_array_equal(evaluation.confusion, confusion_matrix(y_true, y_pred))
+
+    precision, recall, f1, support = precision_recall_fscore_support(y_true, y_pred)
+    for cls, stats in evaluation.class_metrics().items():
+        assert np.isclose(stats['precision'], precision[cls])
+        assert np.isclose(stats['recall'], recall[cls])
+        assert np.isclose(stats['f1'], f1[cls])
+        assert stats['support'] == support[cls]
+
+    assert abs(evaluation.auc() - roc_auc_score(y_true, y_score)) < 1e-3
+    assert abs(evaluation.ks() - _exact_ks(y_true, y_score)) < 1e-3
+
+
+def test_merge_equals_single_pass():
+    y_true, y_pred, y_score = _sample(5000, seed=1)
+    whole = StreamingEvaluation()
+    whole.update(y_true, y_pred, y_score)
+
+    left, right = StreamingEvaluation(), StreamingEvaluation()
+    left.update(y_true[:2000], y_pred[:2000], y_score[:2000])
+    right.update(y_true[2000:], y_pred[2000:], y_score[2000:])
+    left.merge(right)
+
+    np.testing.assert_array_equal(left.confusion, whole.confusion)
+    assert left.auc() == whole.auc()
+    assert left.ks() == whole.ks()
+
+
+def test_single_class_has_no_auc():
+    evaluation = StreamingEvaluation()
+    evaluation.update([0, 0], [0, 1], [0.1, 0.7])
+    assert np.isnan(evaluation.auc())
+    assert evaluation.class_metrics()[1]['precision'] == 0.0
@@ -0,0 +1,75 @@
+"""
+Tests for the precomputed-explanation job (app/jobs/explain_records.py) and
+the records endpoint serving its results
+"""
+import sqlite3
+
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import app.config.database as database
+from app.api.records import explanation_model
+from app.jobs.explain_records import explain_records
+from benchmark import benchmark_environment
+
+
+@pytest.fixture
+def environment(training_data):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    with benchmark_environment(model) as env:
+        yield env
+
+
+def _stored_rows():
+    with sqlite3.connect(database.DB_PATH) as conn:
+        return conn.execute('SELECT COUNT(*), COUNT(DISTINCT model_version) FROM record_explanations').fetchone()
+
+
+def test_job_stores_explanations_served_by_the_endpoint(environment):
+    client = environment['client']
+    customer_id = environment['customer_ids'][0]
+    live = client.get(f'/api/records/{customer_id}').get_json()
+
+    result = explain_records(workers=0, chunk_size=500)
+
+    n_records = len(environment['df'])
+    assert result['explained'] + result['failed'] == n_records
+    assert _stored_rows() == (result['explained'], 1)
+    # A second run has nothing left to do for this model version
+    assert explain_records(workers=0, chunk_size=500)['explained'] == 0
+
+    stored = environment['shap_service'].stored_explanation(explanation_model.get_by_id(customer_id))
+    assert stored is not None and stored.method == 'exact'
+
+    served = client.get(f'/api/records/{customer_id}').get_json()
+    assert served['shap_method'] == 'exact'
+    assert [item['feature'] for item in served['shap_explanation']] == \
+        [item['feature'] for item in live['shap_explanation']]
+    for item, expected in zip(served['shap_explanation'], live['shap_explanation']):
+        assert item['impact'] == pytest.approx(expected['impact'], rel=1e-6, abs=1e-7)
+        assert item['direction'] == expected['direction']
+
+
+def test_stale_or_other_method_explanations_are_recomputed(environment):
+    explain_records(workers=0, chunk_size=500)
+    customer_id = environment['customer_ids'][0]
+    shap_service = environment['shap_service']
+
+    stored = explanation_model.get_by_id(customer_id)
+    assert shap_service.stored_explanation(stored, 'saabas') is None
+    assert shap_service.stored_explanation(dict(stored, model_version='other:1')) is None
+    response = environment['client'].get(f'/api/records/{customer_id}?shap_method=saabas').get_json()
+    assert response['shap_method'] == 'saabas'
+
+
+def test_malformed_record_only_fails_its_own_row(environment):
+    baseline = explain_records(workers=0, chunk_size=500)
+    bad_id = environment['customer_ids'][0]
+    with sqlite3.connect(database.DB_PATH) as conn:
+        conn.execute("UPDATE credit_risk_records SET person_age = 'abc' WHERE customer_id = ?", (bad_id,))
+
+    result = explain_records(workers=0, chunk_size=500, force=True)
+
+    assert result['failed'] == baseline['failed'] + 1
+    assert result['explained'] == baseline['explained'] - 1
@@ -0,0 +1,170 @@
+"""
+Parity tests: the vectorized FeaturePipeline must reproduce the original
+pandas/OneHotEncoder preprocessing bit for bit.
+
+golden_features.npz holds the reference feature matrix for every row of
+large_test_data.csv. Regenerate it (only when the features change on
+purpose) from the backend directory with:
+    PYTHONPATH=. python tests/test_feature_pipeline.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import OneHotEncoder
+
+from app.services.feature_pipeline import (
+    FeaturePipeline, CATEGORICAL_COLS, CATEGORIES, EXPECTED_FEATURES, SCALER_NUMERIC_COLS
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'golden_features.npz')
+
+# The reference pipeline takes the median of all-NaN single-row columns
+pytestmark = pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+
+
+def reference_preprocess(data, scaler):
+    """The single-record pandas pipeline PredictService.preprocess_data used to run"""
+    df = pd.DataFrame([data])
+    df['age_group'] = pd.cut(df['person_age'], bins=[20, 26, 36, 46, 56, 66],
+                             labels=['20-25', '26-35', '36-45', '46-55', '56-65'],
+                             include_lowest=True).astype('object')
+    df['income_group'] = pd.cut(df['person_income'], bins=[0, 25000, 50000, 75000, 100000, float('inf')],
+                                labels=['low', 'low-middle', 'middle', 'high-middle', 'high'],
+                                include_lowest=True).astype('object')
+    df['loan_amount_group'] = pd.cut(df['loan_amnt'], bins=[0, 5000, 10000, 15000, float('inf')],
+                                     labels=['small', 'medium', 'large', 'very large'],
+                                     include_lowest=True).astype('object')
+    df['loan_to_income_ratio'] = np.where(df['person_income'] > 0, df['loan_amnt'] / df['person_income'], 0)
+    df['loan_to_emp_length_ratio'] = np.where(df['loan_amnt'] > 0, df['person_emp_length'] / df['loan_amnt'], 0)
+    df['int_rate_to_loan_amt_ratio'] = np.where(df['loan_amnt'] > 0, df['loan_int_rate'] / df['loan_amnt'], 0)
+    for col in df.columns:
+        if df[col].isna().any():
+            if pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].fillna(df[col].median())
+            else:
+                df[col] = df[col].fillna('unknown')
+    for col in CATEGORICAL_COLS:
+        if col not in df.columns:
+            df[col] = 'unknown'
+    ohe = OneHotEncoder(categories=[CATEGORIES[col] for col in CATEGORICAL_COLS],
+                        sparse_output=False, handle_unknown='ignore')
+    ohe_data = pd.DataFrame(ohe.fit_transform(df[CATEGORICAL_COLS]),
+                            columns=ohe.get_feature_names_out(CATEGORICAL_COLS))
+    df_encoded = pd.concat([ohe_data, df.drop(columns=CATEGORICAL_COLS)], axis=1)
+    df_encoded[SCALER_NUMERIC_COLS] = scaler.transform(df_encoded[SCALER_NUMERIC_COLS])
+    for col in EXPECTED_FEATURES:
+        if col not in df_encoded.columns:
+            df_encoded[col] = 0
+    return df_encoded[EXPECTED_FEATURES].to_numpy(dtype=np.float64)
+
+
+def db_record(**overrides):
+    """A record shaped like a credit_risk_records row"""
+    record = {
+        'customer_id': 100000, 'person_age': 25, 'person_income': 30000.0,
+        'person_home_ownership': 'RENT', 'person_emp_length': 3.0,
+        'loan_intent': 'HOMEIMPROVEMENT', 'loan_grade': 'E', 'loan_amnt': 4800,
+        'loan_int_rate': 15.95, 'loan_status': 1, 'loan_percent_income': 0.16,
+        'cb_person_default_on_file': 'Y', 'cb_person_cred_hist_length': 2,
+        'risk_score': None, 'risk_category': None,
+        'created_at': '2025-01-01 00:00:00', 'updated_at': '2025-01-01 00:00:00',
+    }
+    record.update(overrides)
+    return record
+
+
+EDGE_CASES = [
+    {},
+    {'person_age': 19},
+    {'person_age': 20},
+    {'person_age': 26},
+    {'person_age': 66},
+    {'person_age': 67},
+    {'person_income': 0.0},
+    {'person_income': 25000.0},
+    {'person_income': 1e9},
+    {'loan_amnt': 0},
+    {'loan_amnt': 15000},
+    {'person_emp_length': float('nan')},
+    {'loan_int_rate': float('nan')},
+    {'loan_grade': None},
+    {'loan_intent': 'UNSEEN'},
+    {'cb_person_default_on_file': None},
+    {'person_home_ownership': 'rent'},
+    {'index': 42},
+]
+
+
+def assert_bit_identical(actual, expected):
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual, expected, equal_nan=True)
+    # Bit patterns, not just values (catches -0.0 vs 0.0)
+    assert actual.tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize('overrides', EDGE_CASES, ids=[str(case) for case in EDGE_CASES])
+def test_edge_cases_match_reference(scaler, overrides):
+    record = db_record(**overrides)
+    actual = FeaturePipeline(scaler).transform([record])
+    assert_bit_identical(actual, reference_preprocess(record, scaler))
+
+
+def test_csv_rows_match_reference(scaler, test_df):
+    records = test_df.head(200).to_dict('records')
+    actual = FeaturePipeline(scaler).transform(records)
+    expected = np.vstack([reference_preprocess(record, scaler) for record in records])
+    assert_bit_identical(actual, expected)
+
+
+def test_columnar_input_matches_records(scaler, test_df):
+    pipeline = FeaturePipeline(scaler)
+    assert_bit_identical(pipeline.transform(test_df), pipeline.transform(test_df.to_dict('records')))
+
+
+def test_missing_numeric_input_is_reported_per_row(scaler):
+    records = [db_record(), db_record(person_emp_length=None), db_record()]
+    matrix, errors = FeaturePipeline(scaler).transform_with_errors(records)
+    assert list(errors) == [1]
+    assert 'person_emp_length' in errors[1]
+    assert_bit_identical(matrix[[0, 2]], np.vstack([reference_preprocess(records[0], scaler)] * 2))
+    with pytest.raises(ValueError):
+        FeaturePipeline(scaler).transform(records)
+
+
+def test_non_numeric_input_is_reported_per_row(scaler):
+    records = [db_record(), db_record(person_age='abc'), db_record(), db_record(loan_amnt=[1000]), db_record()]
+    matrix, errors = FeaturePipeline(scaler).transform_with_errors(records)
+    assert sorted(errors) == [1, 3]
+    assert "'person_age'" in errors[1] and "'loan_amnt'" in errors[3]
+    assert_bit_identical(matrix[[0, 2, 4]], np.vstack([reference_preprocess(records[0], scaler)] * 3))
+
+
+def test_whole_csv_matches_golden_vectors(scaler, test_df, loaded_service):
+    """Serving, batch and evaluation preprocessing all produce the golden matrix"""
+    from sklearn.dummy import DummyClassifier
+    from test_model_evaluation import preprocess_test_data
+
+    golden = np.load(GOLDEN_PATH)
+    assert list(golden['feature_names']) == EXPECTED_FEATURES
+    expected = golden['features']
+    assert expected.shape[0] == len(test_df)
+
+    service = loaded_service(DummyClassifier())
+    evaluation_matrix, _ = preprocess_test_data(test_df, scaler, service.bundle.model)
+
+    assert_bit_identical(FeaturePipeline(scaler).transform(test_df.to_dict('records')), expected)
+    assert_bit_identical(service.preprocess_batch(test_df), expected)
+    assert_bit_identical(evaluation_matrix, expected)
+
+
+if __name__ == '__main__':
+    import joblib
+    from conftest import SCALER_PATH, TEST_DATA_PATH
+
+    records = pd.read_csv(TEST_DATA_PATH).to_dict('records')
+    reference_scaler = joblib.load(SCALER_PATH)
+    features = np.vstack([reference_preprocess(record, reference_scaler) for record in records])
+    np.savez_compressed(GOLDEN_PATH, features=features, feature_names=np.array(EXPECTED_FEATURES))
+    print(f"Wrote {features.shape} golden features to {GOLDEN_PATH}")
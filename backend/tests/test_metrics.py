@@ -0,0 +1,37 @@
+"""
+Tests for the in-process latency histograms behind /metrics
+"""
+import pytest
+
+from app.utils.metrics import MetricsRegistry
+
+
+def test_quantiles_track_recorded_latencies():
+    registry = MetricsRegistry()
+    for i in range(1, 1001):
+        registry.observe('inference', i / 1000.0, model_version='RF:1')
+
+    stats = registry.summary()[('inference', 'RF:1')]
+
+    assert stats['count'] == 1000
+    # Buckets grow by sqrt(2), so estimates are within one bucket width
+    assert stats['p50'] == pytest.approx(0.5, rel=0.42)
+    assert stats['p99'] == pytest.approx(0.99, rel=0.42)
+    assert stats['p50'] < stats['p95'] <= stats['p99']
+
+
+def test_timer_counts_errors_and_reraises():
+    registry = MetricsRegistry()
+    registry.set_model_version('RF:2')
+
+    with registry.timer('db_fetch'):
+        pass
+    with pytest.raises(RuntimeError):
+        with registry.timer('db_fetch'):
+            raise RuntimeError('boom')
+
+    stats = registry.summary()[('db_fetch', 'RF:2')]
+    assert (stats['count'], stats['errors']) == (2, 1)
+    text = registry.render_prometheus()
+    assert 'credit_risk_stage_errors_total{stage="db_fetch",model_version="RF:2"} 1' in text
+    assert 'credit_risk_stage_latency_seconds_count{stage="db_fetch",model_version="RF:2"} 2' in text
@@ -0,0 +1,112 @@
+"""
+Micro-batching tests: concurrent predictions scored in shared batches must
+return exactly what one call per record returns, batch failures must reach
+every caller, and rows for different model bundles must never share a call.
+"""
+import gc
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.config.settings import Config
+from app.services import micro_batcher
+from app.services.micro_batcher import MicroBatcher
+
+
+@pytest.fixture
+def batched_service(loaded_service, training_data):
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    service._prediction_cache = None  # every call reaches the model
+    yield service
+    service.disable_micro_batching()
+    service.__dict__.pop('_prediction_cache', None)
+
+
+def test_batched_predictions_match_unbatched(batched_service, complete_df):
+    records = complete_df.head(64).to_dict('records')
+    expected = [batched_service.predict(record) for record in records]
+
+    batcher = batched_service.enable_micro_batching(window_ms=20, max_batch_size=16)
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(batched_service.predict, records))
+
+    assert results == expected
+    assert batcher.counts['requests'] == len(records)
+    assert batcher.counts['batches'] < len(records)
+    assert 1 < batcher.counts['largest'] <= 16
+
+
+def test_batch_failure_reaches_every_caller(batched_service, complete_df, monkeypatch):
+    records = complete_df.head(8).to_dict('records')
+    batched_service.enable_micro_batching(window_ms=20)
+
+    def fail(matrix, bundle):
+        raise RuntimeError('model exploded')
+
+    monkeypatch.setattr(batched_service._batcher, 'run_batch', fail)
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(batched_service.predict, record) for record in records]
+    for future in futures:
+        with pytest.raises(Exception, match='model exploded'):
+            future.result()
+
+
+def test_rows_of_different_bundles_are_scored_separately():
+    calls = []
+    lock = threading.Lock()
+
+    def run_batch(matrix, key):
+        with lock:
+            calls.append((key, matrix.shape[0]))
+        return matrix[:, 0], np.column_stack([1 - matrix[:, 0], matrix[:, 0]]) + key
+
+    batcher = MicroBatcher(run_batch, window_ms=50, max_batch_size=64)
+    rows = [np.full((1, 3), i / 10) for i in range(10)]
+    with ThreadPoolExecutor(10) as pool:
+        futures = list(pool.map(lambda i: batcher.submit(rows[i], key=i % 2), range(10)))
+    results = [future.result(timeout=5) for future in futures]
+    batcher.close()
+
+    for i, (labels, proba) in enumerate(results):
+        assert labels[0] == pytest.approx(i / 10)
+        assert proba[0, 1] == pytest.approx(i / 10 + i % 2)
+    assert sum(rows for _, rows in calls) == 10
+    assert len(calls) < 10  # rows were batched
+
+
+def test_bad_submission_fails_its_batch_and_the_thread_keeps_running():
+    batcher = MicroBatcher(lambda matrix, key: (matrix[:, 0], matrix), window_ms=1)
+    try:
+        with pytest.raises(AttributeError):
+            batcher.submit([[1.0]]).result(timeout=5)  # not an array: no .shape
+        labels, _ = batcher.submit(np.ones((1, 3))).result(timeout=5)
+        assert labels[0] == 1.0
+    finally:
+        batcher.close()
+
+
+def test_slow_batch_falls_back_to_scoring_alone(batched_service, complete_df, monkeypatch):
+    record = complete_df.iloc[0].to_dict()
+    expected = batched_service.predict(record)
+    release = threading.Event()
+    batched_service.enable_micro_batching(window_ms=1)
+    monkeypatch.setattr(batched_service._batcher, 'run_batch', lambda matrix, key: release.wait())
+    monkeypatch.setattr(Config, 'MICRO_BATCH_TIMEOUT', 0.05)
+    try:
+        assert batched_service.predict(record) == expected
+    finally:
+        release.set()
+
+
+def test_closed_batchers_are_not_kept_alive(batched_service):
+    live = len(micro_batcher._batchers)
+    batchers = [weakref.ref(batched_service.enable_micro_batching()) for _ in range(5)]
+    batched_service.disable_micro_batching()
+    gc.collect()
+    assert all(batcher() is None for batcher in batchers)
+    assert len(micro_batcher._batchers) == live
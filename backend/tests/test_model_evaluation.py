@@ -4,78 +4,93 @@ Test script to evaluate the trained model with a large dataset.
 This script performs the following steps:
 1. Loads the trained machine learning model from the path specified in settings.
 2. Loads a large test dataset from a CSV file.
-3. Preprocesses the test data to match the format expected by the model.
+3. Preprocesses the test data with the serving FeaturePipeline
+   (app/services/feature_pipeline.py), exactly as the API does.
 4. Makes predictions on the preprocessed test data.
 5. Calculates and prints evaluation metrics, including a classification report
    (precision, recall, f1-score) and a confusion matrix.
 
+With --stream the file is read in chunks (--chunk-size) and the metrics are
+accumulated incrementally, adding ROC AUC and KS; memory stays constant for
+holdout files of any size.
+
 To run this script:
 1. Make sure you have a test CSV file with 1000+ records.
 2. Update the `TEST_DATA_PATH` variable below to point to your test file.
 3. Ensure the target column name in your CSV matches `TARGET_COLUMN`.
 4. Run the script from the 'backend' directory:
-   python -m test.test_model_evaluation
+   python -m tests.test_model_evaluation [--data holdout.csv] [--stream --chunk-size 100000]
 """
 import os
+import time
 import pandas as pd
-import joblib
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.preprocessing import OneHotEncoder
 import mlflow
 import sys
-import yaml
-from pathlib import Path
 import numpy as np
 
 # --- Configuration ---
 TEST_DATA_PATH = 'large_test_data.csv'
 TARGET_COLUMN = 'Risk'  # TODO: Update this if your target column has a different name.
+DEFAULT_CHUNK_SIZE = 100000
 
 # Add the backend directory to the Python path to allow for absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 try:
-    # Import paths from settings.py. Note: OHE is created on-the-fly as in predict_service.
+    # Import paths from settings.py
     from app.config.settings import Config
 except ImportError:
     print("Error: Could not import MODEL_PATH or SCALER_MODEL_PATH from settings.py.")
     print("Please ensure settings.py exists in the 'backend' directory and contains the MODEL_PATH variable.")
     sys.exit(1)
 
+from app.services import FeaturePipeline, EXPECTED_FEATURES
+from app.services.model_bundle import load_bundle
+from app.utils.evaluation import StreamingEvaluation
+
+def load_model_and_scaler():
+    """
+    Loads the model referenced by MODEL_META_PATH / Config.MODEL_PATH and the scaler,
+    through the same load_bundle() the prediction service uses.
+
+    Returns:
+        tuple: (model, scaler)
+    """
+    bundle = load_bundle()
+    print(f"✓ Model {bundle.version} loaded from {bundle.meta_path}")
+    return bundle.model, bundle.scaler
+
+def preprocess_test_data(test_df, scaler, model):
+    """
+    Preprocesses raw test rows into the model's feature layout.
+
+    Uses the serving FeaturePipeline, so evaluation scores exactly the
+    features the API would. The pipeline is stateless (fixed categories and
+    bins), so each chunk can be preprocessed on its own.
+
+    Args:
+        test_df (pd.DataFrame): Raw rows including the target column
+        scaler: Fitted scaler for the numeric columns
+        model: Loaded model (only used to check its expected feature order)
+
+    Returns:
+        tuple: (X_test_processed, y_test) with X_test_processed in EXPECTED_FEATURES order
+    """
+    target = TARGET_COLUMN if TARGET_COLUMN in test_df.columns else 'loan_status'
+    y_test = test_df[target]
+
+    if hasattr(model, 'feature_names_in_') and list(model.feature_names_in_) != EXPECTED_FEATURES:
+        print("Warning: model feature order differs from the serving pipeline's EXPECTED_FEATURES")
+
+    X_test_processed = FeaturePipeline(scaler).transform(test_df)
+    return X_test_processed, y_test
+
 def evaluate_model():
     """
     Loads the model and a large dataset, then prints evaluation metrics.
     """
-    # Load scaler
-    scaler_model_path = os.getenv('SCALER_MODEL_PATH', 
-        Config.SCALER_MODEL_PATH if Config else 'app/models/scaler.pkl')
-    scaler = joblib.load(scaler_model_path)
-    print(f"✓ Scaler loaded successfully from {scaler_model_path}")
-
-    # # Load model from local paths, mirroring predict_service.py
-    # print(f"Loading model from path: {Config.MODEL_PATH}")
-    # model_meta_path = os.getenv('MODEL_META_PATH', Config.MODEL_PATH)
-
-    model_meta_path = os.getenv('MODEL_META_PATH', 
-        Config.MODEL_PATH if Config else 'mlruns/models/CreditRiskModel_BgC/version-1/meta.yaml')
-    print(f"model path taken {model_meta_path}")
-    
-    with open(model_meta_path, 'r') as meta_file:
-        meta_data = yaml.safe_load(meta_file)
-        storage_location = meta_data.get('storage_location')
-
-    print(f"Storage location from meta.yaml: {storage_location}")
-    if not storage_location:
-        raise FileNotFoundError("Storage location not found in meta.yaml")
-
-    storage_path = Path(storage_location.replace('file:///', ''))
-    model_path = storage_path / 'model.pkl'
-    model = joblib.load(model_path)
-    print(f"✓ Model loaded successfully from {model_path}")
-    
-    # model = joblib.load(Config.MODEL_PATH)
-    # print(f"Loading scaler from path: {Config.SCALER_MODEL_PATH}")
-    # scaler = joblib.load(Config.SCALER_MODEL_PATH)
+    model, scaler = load_model_and_scaler()
 
     # --- Data Loading ---
     print(f"Loading test data from: {TEST_DATA_PATH}")
@@ -87,73 +102,12 @@ def evaluate_model():
     test_df = pd.read_csv(TEST_DATA_PATH)
     print(f"Loaded {len(test_df)} records for evaluation.")
 
-    # Rename target column to match training
-    if 'loan_status' in test_df.columns:
-        test_df = test_df.rename(columns={'loan_status': TARGET_COLUMN})
-
-    if TARGET_COLUMN not in test_df.columns:
+    if TARGET_COLUMN not in test_df.columns and 'loan_status' not in test_df.columns:
         print(f"Error: Target column '{TARGET_COLUMN}' (or 'loan_status') not found in the test data.")
         return
 
-    # --- Preprocessing ---
     print("Preprocessing test data...")
-
-    # 1. Feature Engineering (as in notebook)
-    test_df['loan_to_income_ratio'] = np.where(test_df['person_income'] > 0, test_df['loan_amnt'] / test_df['person_income'], 0)
-    test_df['loan_to_emp_length_ratio'] = np.where(test_df['loan_amnt'] > 0, test_df['person_emp_length'] / test_df['loan_amnt'], 0)
-    test_df['int_rate_to_loan_amt_ratio'] = np.where(test_df['loan_amnt'] > 0, test_df['loan_int_rate'] / test_df['loan_amnt'], 0)
-    test_df['age_group'] = pd.cut(test_df['person_age'], bins=[20, 26, 36, 46, 56, 66], labels=['20-25', '26-35', '36-45', '46-55', '56-65'])
-    test_df['income_group'] = pd.cut(test_df['person_income'], bins=[0, 25000, 50000, 75000, 100000, float('inf')], labels=['low', 'low-middle', 'middle', 'high-middle', 'high'])
-    test_df['loan_amount_group'] = pd.cut(test_df['loan_amnt'], bins=[0, 5000, 10000, 15000, float('inf')], labels=['small', 'medium', 'large', 'very large'])
-
-    # Handle NaNs created by pd.cut if any value is outside bins
-    for col in ['age_group', 'income_group', 'loan_amount_group']:
-        test_df[col] = test_df[col].astype('object').fillna('nan')
-
-    # 2. Separate Features and Target
-    y_test = test_df[TARGET_COLUMN]
-    X_test = test_df.drop(columns=[TARGET_COLUMN])
-
-    # 3. One-Hot Encode Categorical Features
-    # Recreate OHE with the same categories as in training/prediction service
-    ohe_cols = ['cb_person_default_on_file', 'loan_grade', 'person_home_ownership', 'loan_intent', 'income_group', 'age_group', 'loan_amount_group']
-    categories = {
-        'cb_person_default_on_file': ['N', 'Y'],
-        'loan_grade': ['A', 'B', 'C', 'D', 'E', 'F', 'G'],
-        'person_home_ownership': ['MORTGAGE', 'OTHER', 'OWN', 'RENT'],
-        'loan_intent': ['DEBTCONSOLIDATION', 'EDUCATION', 'HOMEIMPROVEMENT', 'MEDICAL', 'PERSONAL', 'VENTURE'],
-        'income_group': ['high', 'high-middle', 'low', 'low-middle', 'middle'],
-        'age_group': ['20-25', '26-35', '36-45', '46-55', '56-65', 'nan'],
-        'loan_amount_group': ['large', 'medium', 'small', 'very large']
-    }
-    ohe = OneHotEncoder(
-        categories=[categories[col] for col in ohe_cols],
-        sparse_output=False,
-        handle_unknown='ignore'
-    )
-
-    ohe_transformed = ohe.fit_transform(X_test[ohe_cols])
-    ohe_feature_names = ohe.get_feature_names_out(ohe_cols)
-    ohe_data = pd.DataFrame(ohe_transformed, columns=ohe_feature_names, index=X_test.index)
-
-    # 4. Scale Numerical Features
-    # This order MUST match the order used to fit the scaler in the notebook
-    scale_cols = [
-        'person_income', 'person_age', 'person_emp_length', 'loan_amnt',
-        'loan_int_rate', 'cb_person_cred_hist_length', 'loan_percent_income',
-        'loan_to_emp_length_ratio', 'int_rate_to_loan_amt_ratio'
-    ]
-    X_test_scaled = X_test.copy()
-    X_test_scaled[scale_cols] = scaler.transform(X_test[scale_cols])
-
-    # 5. Combine Processed Features
-    numeric_features = X_test_scaled.drop(columns=ohe_cols, errors='ignore')
-    X_test_processed = pd.concat([ohe_data, numeric_features], axis=1)
-
-    # Ensure column order matches training
-    # Using the feature names from the loaded model is the most reliable way
-    if hasattr(model, 'feature_names_in_'):
-        X_test_processed = X_test_processed.reindex(columns=model.feature_names_in_, fill_value=0)
+    X_test_processed, y_test = preprocess_test_data(test_df, scaler, model)
 
     print("Making predictions on the test set...")
     y_pred = model.predict(X_test_processed)
@@ -167,5 +121,69 @@ def evaluate_model():
     print(confusion_matrix(y_test, y_pred))
     print("\n--------------------------------\n")
 
+def evaluate_model_streaming(test_data_path=TEST_DATA_PATH, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Evaluates the model chunk by chunk with constant memory.
+
+    Each chunk is preprocessed and scored with one predict_proba call, then
+    folded into a StreamingEvaluation (confusion-matrix counts and score
+    histograms for AUC/KS), so the file is never held in memory at once.
+
+    Args:
+        test_data_path (str): Holdout CSV in the credit_risk_records schema
+        chunk_size (int): Rows read and scored per chunk
+
+    Returns:
+        StreamingEvaluation: Accumulated metrics, or None if the data is missing
+    """
+    model, scaler = load_model_and_scaler()
+
+    print(f"Streaming test data from: {test_data_path} ({chunk_size} rows per chunk)")
+    if not os.path.exists(test_data_path):
+        print(f"Error: Test data file not found at {test_data_path}")
+        return None
+
+    classes = list(model.classes_)
+    positive_column = classes.index(1) if 1 in classes else len(classes) - 1
+    evaluation = StreamingEvaluation(positive_label=classes[positive_column])
+    start = time.perf_counter()
+
+    for chunk in pd.read_csv(test_data_path, chunksize=chunk_size):
+        if TARGET_COLUMN not in chunk.columns and 'loan_status' not in chunk.columns:
+            print(f"Error: Target column '{TARGET_COLUMN}' (or 'loan_status') not found in the test data.")
+            return None
+
+        X_chunk, y_chunk = preprocess_test_data(chunk, scaler, model)
+        # Labels from the same probabilities, exactly as model.predict() derives them
+        proba = model.predict_proba(X_chunk)
+        y_pred = model.classes_.take(np.argmax(proba, axis=1))
+        evaluation.update(y_chunk.to_numpy(), y_pred, proba[:, positive_column])
+
+        elapsed = time.perf_counter() - start
+        print(f"Evaluated {evaluation.count} records ({evaluation.count / elapsed:,.0f} rows/sec)...")
+
+    # --- Evaluation ---
+    print("\n--- Model Evaluation Results (streaming) ---")
+    print("\nClassification Report:")
+    print(evaluation.report())
+
+    print("\nConfusion Matrix:")
+    print(evaluation.confusion)
+    print("\n--------------------------------\n")
+    return evaluation
+
 if __name__ == '__main__':
-    evaluate_model()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Evaluate the configured model on a holdout CSV')
+    parser.add_argument('--data', default=TEST_DATA_PATH, help='Holdout CSV file')
+    parser.add_argument('--stream', action='store_true',
+                        help='Evaluate in chunks with constant memory (adds ROC AUC and KS)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk with --stream')
+    args = parser.parse_args()
+
+    if args.stream:
+        evaluate_model_streaming(args.data, args.chunk_size)
+    else:
+        TEST_DATA_PATH = args.data
+        evaluate_model()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Model manager tests: new versions are validated before they are swapped in,
+a bad model never replaces the served one, and requests keep being answered
+while models are swapped underneath them.
+"""
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from app.config.settings import Config
+from app.services.model_bundle import resolve_meta_path, storage_path
+from app.services.model_manager import ModelManager, ModelValidationError
+from app.utils.metrics import metrics
+
+
+@pytest.fixture
+def manager(loaded_service, training_data, model_registry, monkeypatch):
+    """ModelManager over a temporary registry, with the served model restored afterwards"""
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y))
+    registry, register = model_registry
+    monkeypatch.setenv('MODEL_META_PATH', str(registry))
+    saved_version = metrics.model_version
+    manager = ModelManager()
+    yield manager, service, register
+    manager.stop_watcher()
+    manager._signature = None
+    metrics.set_model_version(saved_version)
+
+
+def test_storage_location_uris():
+    assert storage_path('file:///home/user/mlruns/1/abc/artifacts') == Path('/home/user/mlruns/1/abc/artifacts')
+    assert storage_path('file:///E:/BITS/mlruns/my%20model') == Path('E:/BITS/mlruns/my model')
+    assert storage_path('mlruns/1/abc/artifacts') == Path('mlruns/1/abc/artifacts')
+
+
+def test_registry_resolves_to_highest_version(model_registry, training_data):
+    X, y = training_data
+    registry, register = model_registry
+    model = DecisionTreeClassifier(max_depth=2).fit(X, y)
+    for version in (2, 10, 9):
+        register(version, model)
+
+    assert resolve_meta_path(registry) == str(registry / 'version-10' / 'meta.yaml')
+    assert resolve_meta_path(registry / 'version-9') == str(registry / 'version-9' / 'meta.yaml')
+
+
+def test_watcher_swaps_in_new_version(manager, training_data, complete_df):
+    X, y = training_data
+    manager, service, register = manager
+    record = complete_df.iloc[0].to_dict()
+    register(1, RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y))
+    assert manager.check_for_update() is False  # first check records the baseline
+
+    register(2, RandomForestClassifier(n_estimators=5, random_state=2).fit(X, y))
+    assert manager.check_for_update() is True
+    assert service.model_version == 'TestModel:2'
+    assert service.bundle.explainers.get('tree') is not None  # warmed before the swap
+    assert 'error' not in service.predict(record)
+    assert manager.status()['last_reload']['result'] == 'success'
+    assert ('model_swap', 'TestModel:2') in metrics.summary()
+
+
+def test_invalid_model_is_not_swapped_in(manager, training_data):
+    X, y = training_data
+    manager, service, register = manager
+    served = service.bundle
+    # Trained on fewer columns than the serving pipeline produces
+    register(1, DecisionTreeClassifier(max_depth=2).fit(X[:, :5], y))
+
+    with pytest.raises(ModelValidationError):
+        manager.reload(reason='test')
+
+    assert service.bundle is served
+    assert manager.status()['last_reload']['result'] == 'failure'
+    assert metrics.summary()[('model_load', metrics.model_version)]['errors'] >= 1
+
+
+def test_requests_keep_working_during_swaps(manager, training_data, complete_df):
+    X, y = training_data
+    manager, service, register = manager
+    records = complete_df.head(20).to_dict('records')
+    register(1, RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y))
+    failures = []
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                for result in service.predict_batch(records) + [service.predict(records[0])]:
+                    if result.get('error'):
+                        failures.append(result['error'])
+            except Exception as e:
+                failures.append(str(e))
+
+    threads = [threading.Thread(target=serve) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(3):
+            manager.reload(reason='test')
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert failures == []
+    assert service.model_version == 'TestModel:1'
+
+
+def test_admin_reload_endpoint(manager, training_data, monkeypatch):
+    from app.api.admin import admin_bp
+
+    X, y = training_data
+    manager, service, register = manager
+    register(3, DecisionTreeClassifier(max_depth=3).fit(X, y))
+    app = Flask(__name__)
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    client = app.test_client()
+
+    assert client.post('/admin/model/reload').status_code == 404  # no ADMIN_TOKEN configured
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/admin/model/reload', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.post('/admin/model/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 202
+    deadline = time.monotonic() + 30
+    while manager.status()['reloading'] or service.model_version != 'TestModel:3':
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    status = client.get('/admin/model', headers={'Authorization': 'Bearer secret'}).get_json()
+    assert status['model_version'] == 'TestModel:3'
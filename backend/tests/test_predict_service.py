@@ -0,0 +1,101 @@
+"""
+PredictService inference tests: labels derived from a single predict_proba
+pass must match each model flavor's own predict().
+"""
+import pytest
+from sklearn.ensemble import (
+    BaggingClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+)
+from sklearn.neighbors import KNeighborsClassifier
+
+from app.config.settings import Config
+
+
+def _xgboost():
+    xgboost = pytest.importorskip('xgboost')
+    return xgboost.XGBClassifier(n_estimators=40, max_depth=4, random_state=0)
+
+
+MODEL_FLAVORS = {
+    'random_forest': lambda: RandomForestClassifier(n_estimators=40, random_state=0),
+    'bagging': lambda: BaggingClassifier(n_estimators=20, random_state=0),
+    'knn': lambda: KNeighborsClassifier(n_neighbors=4),
+    'gradient_boosting': lambda: GradientBoostingClassifier(n_estimators=40, random_state=0),
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(max_iter=40, random_state=0),
+    'xgboost': _xgboost,
+}
+
+
+@pytest.fixture(params=sorted(MODEL_FLAVORS))
+def fitted_model(request, training_data):
+    X, y = training_data
+    return MODEL_FLAVORS[request.param]().fit(X, y)
+
+
+def test_batch_labels_match_model_predict(fitted_model, loaded_service, complete_df):
+    service = loaded_service(fitted_model)
+    X = service.preprocess_batch(complete_df)
+
+    results = service.predict_batch(complete_df.to_dict('records'), chunk_size=500)
+
+    assert [result['prediction'] for result in results] == fitted_model.predict(X).astype(int).tolist()
+    expected_scores = [round(float(p), 4) for p in fitted_model.predict_proba(X)[:, 1]]
+    assert [result['risk_score'] for result in results] == expected_scores
+
+
+def test_single_record_labels_match_model_predict(fitted_model, loaded_service, complete_df):
+    service = loaded_service(fitted_model)
+    records = complete_df.head(25).to_dict('records')
+
+    predictions = [service.predict(record)['prediction'] for record in records]
+
+    assert predictions == fitted_model.predict(service.preprocess_batch(records)).astype(int).tolist()
+
+
+def test_decision_threshold(training_data, loaded_service, complete_df, monkeypatch):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=40, random_state=0).fit(X, y)
+    service = loaded_service(model)
+    monkeypatch.setattr(Config, 'DECISION_THRESHOLD', 0.2)
+
+    results = service.predict_batch(complete_df.to_dict('records'))
+
+    expected = (model.predict_proba(X)[:, 1] >= 0.2).astype(int)
+    assert [result['prediction'] for result in results] == expected.tolist()
+
+
+def test_predict_frame_matches_predict_batch(training_data, loaded_service, test_df):
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=40, random_state=0).fit(X, y))
+
+    # Rows with a None numeric input come back as errors
+    records = test_df.astype(object)
+    records.loc[::7, 'loan_int_rate'] = None
+    frame = service.predict_frame(records)
+    results = service.predict_batch(records.to_dict('records'))
+
+    assert frame['error'].notna().any()
+    for result, (_, row) in zip(results, frame.iterrows()):
+        if result.get('error'):
+            assert row['error'] == result['error']
+            assert row['risk_category'] == 'Unknown'
+        else:
+            assert row['error'] is None
+            assert row['prediction'] == result['prediction']
+            assert row['risk_score'] == result['risk_score']
+            assert row['risk_category'] == result['risk_category']
+
+
+def test_malformed_rows_do_not_fail_the_batch(training_data, loaded_service, complete_df):
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    records = complete_df.head(4).to_dict('records')
+    expected = service.predict_batch(records)
+    records[1] = {**records[1], 'person_age': 'abc'}
+    records[2] = {**records[2], 'person_income': [52000]}
+
+    results = service.predict_batch(records)
+
+    assert [result['risk_score'] for result in results[::3]] == [result['risk_score'] for result in expected[::3]]
+    assert 'person_age' in results[1]['error'] and 'person_income' in results[2]['error']
+    assert results[0].get('error') is None and results[3].get('error') is None
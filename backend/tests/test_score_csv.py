@@ -0,0 +1,24 @@
+"""
+Tests for the offline CSV scoring job
+"""
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from app.jobs.score_csv import score_csv
+from conftest import TEST_DATA_PATH
+
+
+def test_scores_written_in_input_order(training_data, loaded_service, test_df, tmp_path):
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y))
+    output = tmp_path / 'scores.csv'
+
+    # workers=0 scores in this process, where loaded_service installed the model
+    summary = score_csv(TEST_DATA_PATH, output, workers=0, chunk_size=300)
+
+    scores = pd.read_csv(output)
+    expected = service.predict_frame(test_df)
+    assert summary['rows'] == len(test_df)
+    assert summary['failed'] == int(expected['error'].notna().sum())
+    assert scores['row'].tolist() == list(range(len(test_df)))
+    assert scores['risk_score'].equals(expected['risk_score'])
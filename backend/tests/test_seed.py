@@ -0,0 +1,78 @@
+"""
+Tests for the bulk CSV loader in database/scripts/seed.py
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+from conftest import TEST_DATA_PATH
+
+SEED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'scripts'))
+sys.path.insert(0, SEED_DIR)
+
+import seed  # noqa: E402
+
+
+@pytest.fixture
+def seed_db(tmp_path, monkeypatch):
+    """Empty credit_risk_records table in a temporary database"""
+    db_path = tmp_path / 'seed.db'
+    monkeypatch.setattr(seed, 'DB_PATH', db_path)
+    seed.initialize_database()
+    return db_path
+
+
+def test_bulk_load_matches_csv(seed_db, test_df):
+    # A small chunk size exercises several executemany batches
+    assert seed.seed_from_csv(csv_path=TEST_DATA_PATH, chunk_size=500)
+
+    conn = sqlite3.connect(str(seed_db))
+    rows = conn.execute('SELECT * FROM credit_risk_records ORDER BY customer_id').fetchall()
+    columns = [d[0] for d in conn.execute('SELECT * FROM credit_risk_records').description]
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+
+    assert len(rows) == len(test_df)
+    assert journal_mode == 'wal'
+    assert [row[0] for row in rows] == list(range(seed.START_CUSTOMER_ID, seed.START_CUSTOMER_ID + len(test_df)))
+
+    for i in (0, len(rows) // 2, len(rows) - 1):
+        stored = dict(zip(columns, rows[i]))
+        source = test_df.iloc[i]
+        for name, kind in seed.SEED_COLUMNS:
+            if source.isna()[name]:
+                assert stored[name] is None
+            elif kind == 'int':
+                assert stored[name] == int(source[name])
+            elif kind == 'float':
+                assert stored[name] == float(source[name])
+            else:
+                assert stored[name] == str(source[name])
+
+
+def test_missing_and_bad_values_become_null(seed_db, tmp_path):
+    csv_path = tmp_path / 'bad.csv'
+    csv_path.write_text(
+        'person_age,person_income,loan_int_rate,loan_grade\n'
+        '25,50000,,A\n'
+        'n/a,60000.5,11.2,\n'
+    )
+    assert seed.seed_from_csv(csv_path=csv_path)
+    assert seed.seed_from_csv(csv_path=csv_path)
+
+    conn = sqlite3.connect(str(seed_db))
+    rows = conn.execute(
+        'SELECT customer_id, person_age, person_income, loan_int_rate, loan_grade, loan_amnt '
+        'FROM credit_risk_records ORDER BY customer_id'
+    ).fetchall()
+    conn.close()
+
+    start = seed.START_CUSTOMER_ID
+    assert rows == [
+        (start, 25, 50000.0, None, 'A', None),
+        (start + 1, None, 60000.5, 11.2, None, None),
+        (start + 2, 25, 50000.0, None, 'A', None),
+        (start + 3, None, 60000.5, 11.2, None, None),
+    ]
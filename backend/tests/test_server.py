@@ -0,0 +1,65 @@
+"""
+Integration test for the prefork launcher (app/server.py)
+"""
+import json
+import os
+import pickle
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import BACKEND_DIR
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='prefork needs os.fork')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get_json(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                return json.load(response)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def test_workers_serve_preloaded_model(training_data, tmp_path):
+    X, y = training_data
+    model_dir = tmp_path / 'model'
+    model_dir.mkdir()
+    with open(model_dir / 'model.pkl', 'wb') as f:
+        pickle.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), f)
+    meta = tmp_path / 'meta.yaml'
+    meta.write_text(f'name: TestModel\nversion: 1\nstorage_location: {model_dir}\n')
+
+    port = _free_port()
+    env = dict(os.environ, MODEL_PATH=str(meta), PYTHONPATH=BACKEND_DIR)
+    env.pop('MODEL_META_PATH', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'app.server', '--workers', '2', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        health = _get_json(f'http://127.0.0.1:{port}/health')
+        assert health['model_loaded'] is True
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=30)
+
+    assert server.returncode == 0, output
+    assert 'Preloaded:' in output
+    assert output.count('Started worker') == 2
+    assert 'All workers stopped' in output
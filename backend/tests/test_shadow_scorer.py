@@ -0,0 +1,123 @@
+"""
+Shadow scoring tests: the challenger's scores for live predictions are
+logged next to the champion's, and a full queue drops work instead of
+blocking the caller.
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from app.services.model_bundle import ModelBundle
+from app.utils.metrics import metrics
+from app.services.shadow_scorer import ShadowScorer, load_shadow_logs
+
+
+@pytest.fixture
+def shadowed_service(loaded_service, training_data, model_registry, tmp_path):
+    """Champion in PredictService plus a registered challenger, shadow removed afterwards"""
+    X, y = training_data
+    service = loaded_service(RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, y))
+    registry, register = model_registry
+    challenger = DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y)
+    register(1, challenger)
+    yield service, registry, challenger
+    scorer = service.__dict__.pop('_shadow', None)
+    if scorer is not None:
+        scorer.close()
+
+
+def test_challenger_scores_are_logged_with_the_champions(shadowed_service, complete_df, tmp_path):
+    service, registry, challenger = shadowed_service
+    log_dir = tmp_path / 'shadow'
+    scorer = service.load_shadow(registry, log_dir=log_dir, batch_rows=25, flush_interval=0.05)
+    records = complete_df.head(30).to_dict('records')
+
+    results = [service.predict(record) for record in records[:10]] + service.predict_batch(records[10:])
+    assert scorer.wait()
+
+    logged = load_shadow_logs(log_dir)
+    assert len(logged) == len(records) == scorer.counts['scored']
+    assert set(logged['challenger_version']) == {'TestModel:1'}
+    expected = challenger.predict_proba(service.preprocess_batch(records))[:, 1].astype(np.float32)
+    np.testing.assert_array_equal(logged['challenger'].to_numpy(), expected)
+    np.testing.assert_allclose(logged['champion'], [result['risk_score'] for result in results], atol=5e-5)
+
+
+def test_reloading_the_challenger_replaces_the_running_scorer(shadowed_service, complete_df, tmp_path):
+    service, registry, _ = shadowed_service
+    workers_before = sum(thread.name == 'shadow-scorer' for thread in threading.enumerate())
+    records = complete_df.head(2).to_dict('records')
+
+    first = service.load_shadow(registry, log_dir=tmp_path / 'first', flush_interval=0.01)
+    service.predict(records[0])
+    second = service.load_shadow(registry, log_dir=tmp_path / 'second', flush_interval=0.01)
+    service.predict(records[1])
+    assert second.wait()
+
+    assert first.counts['scored'] == 1  # drained when replaced
+    assert not first.submit(np.zeros((1, 45)), np.array([[0.9, 0.1]]), 'champion:1')
+    assert sum(thread.name == 'shadow-scorer' for thread in threading.enumerate()) == workers_before + 1
+    exported = [line for line in metrics.render_prometheus().splitlines()
+                if line.startswith('credit_risk_shadow_rows_scored_total{')]
+    assert exported == ['credit_risk_shadow_rows_scored_total{model_version="TestModel:1"} 1']
+
+
+def test_full_queue_drops_instead_of_blocking(scaler, tmp_path):
+    release = threading.Event()
+
+    class SlowModel:
+        classes_ = np.array([0, 1])
+
+        def predict_proba(self, X):
+            release.wait()
+            return np.tile([0.5, 0.5], (len(X), 1))
+
+    scorer = ShadowScorer(ModelBundle(SlowModel(), scaler, 'slow:1'), log_dir=tmp_path,
+                          queue_size=2, batch_rows=1, flush_interval=0.0)
+    row, proba = np.zeros((1, 45)), np.array([[0.9, 0.1]])
+    try:
+        start = time.perf_counter()
+        accepted = [scorer.submit(row, proba, 'champion:1') for _ in range(50)]
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    assert not all(accepted)
+    assert scorer.counts['dropped'] == accepted.count(False)
+    assert elapsed < 0.5
+    assert scorer.wait()
+    assert scorer.counts['scored'] == accepted.count(True)
+
+
+def test_concurrent_first_submits_start_one_worker(scaler, tmp_path):
+    class ConstantModel:
+        classes_ = np.array([0, 1])
+
+        def predict_proba(self, X):
+            return np.tile([0.5, 0.5], (len(X), 1))
+
+    scorer = ShadowScorer(ModelBundle(ConstantModel(), scaler, 'constant:1'), log_dir=tmp_path,
+                          queue_size=10_000, batch_rows=1, flush_interval=0.0)
+    row, proba = np.zeros((1, 45)), np.array([[0.9, 0.1]])
+    barrier = threading.Barrier(16)
+    workers_before = sum(thread.name == 'shadow-scorer' for thread in threading.enumerate())
+
+    def submit_many():
+        barrier.wait()
+        for _ in range(50):
+            scorer.submit(row, proba, 'champion:1')
+
+    threads = [threading.Thread(target=submit_many) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scorer.wait()
+
+    assert sum(thread.name == 'shadow-scorer' for thread in threading.enumerate()) == workers_before + 1
+    assert scorer.counts['submitted'] == scorer.counts['scored'] == 16 * 50
+    assert len(list(tmp_path.glob('shadow-*.npz'))) == 16 * 50  # no batch file overwritten
@@ -0,0 +1,120 @@
+"""
+ShapService tests: batched top-k explanations must match the per-feature
+selection explain() used to do, repeated rows must come from the cache, and
+latency budgets must choose the explanation method.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.feature_pipeline import EXPECTED_FEATURES
+from app.services.shap_service import METHODS, ShapService, top_k_impacts
+from app.utils.cache import LRUCache
+
+
+def _reference_top_k(values, feature_names, top_k=10):
+    """The original dict-per-feature selection"""
+    explanations = []
+    for feature, impact in zip(feature_names, values):
+        if feature == 'index' or abs(impact) < 0.001:
+            continue
+        explanations.append({"feature": feature, "impact": float(impact),
+                             "direction": "increase" if impact > 0 else "decrease"})
+    explanations.sort(key=lambda x: abs(x['impact']), reverse=True)
+    return explanations[:top_k]
+
+
+@pytest.fixture
+def shap_service(loaded_service, training_data):
+    X, y = training_data
+    loaded_service(RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y))
+    service = ShapService()
+    saved = service.__dict__.get('_explanation_cache')
+    service._explanation_cache = LRUCache('shap-test', 1024 * 1024)
+    yield service
+    service._latency_ms.clear()
+    if saved is None:
+        service.__dict__.pop('_explanation_cache', None)
+    else:
+        service._explanation_cache = saved
+
+
+def test_top_k_matches_reference_selection():
+    rng = np.random.default_rng(0)
+    values = rng.normal(scale=0.05, size=(50, len(EXPECTED_FEATURES)))
+    values[:, 5:30] *= 0.01  # many negligible impacts
+    values[0] = 0.0  # nothing to report
+
+    indices, impacts = top_k_impacts(values, EXPECTED_FEATURES, 10)
+
+    for row in range(len(values)):
+        expected = _reference_top_k(values[row], EXPECTED_FEATURES)
+        actual = [(EXPECTED_FEATURES[i], impact) for i, impact in zip(indices[row], impacts[row]) if i >= 0]
+        assert actual == [(item['feature'], item['impact']) for item in expected]
+    assert (indices[0] == -1).all()
+
+
+def test_explain_many_matches_single_explanations(shap_service, complete_df):
+    records = complete_df.head(20).to_dict('records')
+    explainer = shap_service._get_explainer()
+
+    batch = shap_service.explain_many(records)
+
+    assert len(batch) == 20
+    for row, record in enumerate(records):
+        features = shap_service._prepare_many([record])
+        values = shap_service._positive_class(explainer.shap_values(features.matrix))[0]
+        expected = _reference_top_k(values, features.feature_names)
+        np.testing.assert_allclose([item['impact'] for item in batch.to_list(row)],
+                                   [item['impact'] for item in expected], rtol=1e-9, atol=1e-12)
+        assert [item['feature'] for item in batch.to_list(row)] == [item['feature'] for item in expected]
+    assert shap_service.explain(records[3]) == batch.to_list(3)
+
+
+def test_repeated_rows_are_served_from_cache(shap_service, complete_df):
+    records = complete_df.head(5).to_dict('records')
+    cache = shap_service._explanation_cache
+
+    first = shap_service.explain_many(records).to_lists()
+    misses = cache.misses
+    second = shap_service.explain_many(records).to_lists()
+
+    assert second == first
+    assert cache.misses == misses
+    assert cache.hits >= 5
+    # Rows are cached as their own small arrays, not views pinning the batch
+    assert all(array.base is None for value, _, _ in cache._entries.values() for array in value)
+
+
+def test_each_method_reports_itself(shap_service, complete_df):
+    records = complete_df.head(3).to_dict('records')
+
+    for method in METHODS:
+        explanations = shap_service.explain_many(records, method=method)
+        assert explanations.method == method
+        assert all(explanations.to_lists())
+
+
+def test_budget_picks_most_faithful_method_that_fits(shap_service, complete_df):
+    shap_service._latency_ms.clear()
+    estimates = shap_service.calibrate(complete_df.head(1).to_dict('records'))
+    assert set(estimates) == set(METHODS)
+
+    shap_service._latency_ms.update({'exact': 10.0, 'interventional': 4.0, 'saabas': 0.5})
+    assert shap_service.choose_method(budget_ms=20) == 'exact'
+    assert shap_service.choose_method(budget_ms=5) == 'interventional'
+    assert shap_service.choose_method(budget_ms=5, n_rows=2) == 'saabas'
+    assert shap_service.choose_method(budget_ms=0.1) == 'saabas'
+    assert shap_service.choose_method('exact', budget_ms=0.1) == 'exact'
+    with pytest.raises(ValueError):
+        shap_service.choose_method('kernel')
+
+
+def test_explanation_options_are_validated():
+    from app.api.records import explanation_options
+
+    assert explanation_options({}) == (None, None)
+    assert explanation_options({'shap_method': 'saabas', 'shap_budget_ms': '25'}) == ('saabas', 25.0)
+    for args in ({'shap_method': 'kernel'}, {'shap_budget_ms': 'fast'}, {'shap_budget_ms': '-1'}):
+        with pytest.raises(ValueError):
+            explanation_options(args)
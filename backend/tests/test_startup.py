@@ -0,0 +1,53 @@
+"""
+Unit tests for lazy imports and the startup report (app/utils/startup.py)
+"""
+import subprocess
+import sys
+
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import BACKEND_DIR
+from app.utils.metrics import MetricsRegistry, metrics
+from app.utils.startup import StartupReport, warm_up
+
+
+def test_importing_routes_does_not_import_shap():
+    code = "import sys, app.api.records; print('shap' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False'
+
+
+def test_startup_report_accumulates_phases_in_order():
+    report = StartupReport()
+    report.record('imports', 0.5)
+    with report.phase('model_load'):
+        pass
+    report.record('imports', 0.25)
+
+    phases = report.phases()
+    assert list(phases) == ['imports', 'model_load']
+    assert phases['imports'] == 0.75
+    assert phases['model_load'] >= 0.0
+
+
+def test_startup_report_is_exported_as_metrics():
+    report = StartupReport()
+    report.record('warmup', 1.5)
+    registry = MetricsRegistry()
+    registry.register_collector(report.collect_metrics)
+
+    assert 'credit_risk_startup_phase_seconds{phase="warmup"} 1.5' in registry.render_prometheus()
+
+
+def test_warm_up_keeps_earlier_samples_and_records_none(loaded_service, training_data):
+    X, y = training_data
+    loaded_service(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    metrics.observe('model_load', 0.2, model_version='test-warmup')
+    before = metrics.summary()
+
+    assert warm_up(explainer=False)
+
+    assert metrics.summary() == before
+    assert before[('model_load', 'test-warmup')]['count'] == 1
@@ -3,6 +3,8 @@ Database initialization script for SQLite
 """
 import sqlite3
 import os
+import time
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -21,6 +23,9 @@ def initialize_database():
     conn = sqlite3.connect(str(DB_PATH))
     cursor = conn.cursor()
     
+    # WAL lets the backend's read-only connections read while this script writes
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS credit_risk_records (
             customer_id INTEGER PRIMARY KEY,
@@ -38,11 +43,27 @@ def initialize_database():
             cb_person_cred_hist_length INTEGER,
             risk_score REAL,
             risk_category TEXT,
+            prediction INTEGER,
+            model_version TEXT,
+            scored_at DATETIME,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Top-k SHAP explanations precomputed by app.jobs.explain_records
+    # (uint8 feature indices and float32 impacts, packed as blobs)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS record_explanations (
+            customer_id INTEGER PRIMARY KEY,
+            model_version TEXT NOT NULL,
+            method TEXT NOT NULL,
+            feature_indices BLOB NOT NULL,
+            impacts BLOB NOT NULL,
+            computed_at DATETIME
+        )
+    ''')
+    
     conn.commit()
     conn.close()
     print(f"Database schema initialized at {DB_PATH}")
@@ -60,97 +81,156 @@ def get_next_customer_id(conn):
     next_id = max(max_id + 1, START_CUSTOMER_ID)
     return next_id
 
-def seed_from_csv(clear_existing=False):
-    """Seed data from CSV file (if available)"""
-    csv_path = Path(__file__).parent.parent / 'credit_risk_dataset.csv'
+# CSV columns loaded into credit_risk_records, with the type each is stored as
+SEED_COLUMNS = [
+    ('person_age', 'int'),
+    ('person_income', 'float'),
+    ('person_home_ownership', 'str'),
+    ('person_emp_length', 'float'),
+    ('loan_intent', 'str'),
+    ('loan_grade', 'str'),
+    ('loan_amnt', 'int'),
+    ('loan_int_rate', 'float'),
+    ('loan_status', 'int'),
+    ('loan_percent_income', 'float'),
+    ('cb_person_default_on_file', 'str'),
+    ('cb_person_cred_hist_length', 'int'),
+]
+
+DEFAULT_CHUNK_SIZE = 50000
+
+INSERT_SQL = f'''
+    INSERT INTO credit_risk_records (
+        customer_id, {', '.join(name for name, _ in SEED_COLUMNS)}
+    ) VALUES ({', '.join('?' * (len(SEED_COLUMNS) + 1))})
+'''
+
+def convert_chunk(chunk):
+    """
+    Convert a CSV chunk to SQLite-ready columns in one pass per column
+
+    Missing or unparseable values become None; ints are truncated like int().
+
+    Args:
+        chunk (pd.DataFrame): Rows read from the CSV
+
+    Returns:
+        list: One list of Python values per SEED_COLUMNS entry
+    """
+    columns = []
+    for name, kind in SEED_COLUMNS:
+        if name not in chunk:
+            columns.append([None] * len(chunk))
+            continue
+        values = chunk[name]
+        if kind == 'str':
+            values = values.astype(object)
+            values = values.where(values.notna(), None).map(lambda v: v if v is None else str(v))
+        else:
+            values = pd.to_numeric(values, errors='coerce')
+            if kind == 'int':
+                values = np.trunc(values).astype('Int64')
+            values = values.astype(object).where(values.notna(), None)
+        columns.append(values.tolist())
+    return columns
+
+def set_ingestion_pragmas(conn):
+    """
+    Tune a connection for one large write transaction
+
+    The rollback journal is kept in memory and fsyncs are skipped; a crash
+    mid-load can lose the load, so re-run it. journal_mode only changes when no
+    other connection has the database open (otherwise it stays WAL).
+
+    Returns:
+        str: The journal mode in effect
+    """
+    journal_mode = conn.execute('PRAGMA journal_mode=MEMORY').fetchone()[0]
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-262144')  # 256 MB
+    return journal_mode
+
+def restore_pragmas(conn):
+    """Switch back to the WAL/NORMAL settings the backend expects"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+def seed_from_csv(clear_existing=False, csv_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Bulk-load records from a CSV file (if available)
+
+    The CSV is streamed chunk_size rows at a time, so memory stays constant
+    regardless of file size. Each chunk is converted column-wise and inserted
+    with executemany; the whole load is a single transaction.
+
+    Args:
+        clear_existing (bool): Delete existing records first
+        csv_path (str): CSV to load, defaults to database/credit_risk_dataset.csv
+        chunk_size (int): Rows read and inserted per chunk
+
+    Returns:
+        bool: True if the load succeeded
+    """
+    csv_path = Path(csv_path) if csv_path else Path(__file__).parent.parent / 'credit_risk_dataset.csv'
     
     if not csv_path.exists():
         print('CSV file not found. Skipping seed data.')
         return False
     
-    print(f'Reading CSV file from {csv_path}...')
+    print(f'Loading CSV file from {csv_path} in chunks of {chunk_size} rows...')
     
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
     try:
-        # Read CSV file
-        df = pd.read_csv(csv_path)
-        print(f'Loaded {len(df)} records from CSV')
+        journal_mode = set_ingestion_pragmas(conn)
+        print(f'Ingestion pragmas: journal_mode={journal_mode}, synchronous=OFF')
         
-        # Connect to database
-        conn = sqlite3.connect(str(DB_PATH))
-        cursor = conn.cursor()
+        start = time.perf_counter()
+        conn.execute('BEGIN')
         
         # Clear existing data if requested
         if clear_existing:
-            cursor.execute('DELETE FROM credit_risk_records')
-            conn.commit()
+            conn.execute('DELETE FROM credit_risk_records')
             print('Cleared existing records')
         
         # Get starting customer ID
-        current_customer_id = get_next_customer_id(conn)
-        
-        # Prepare data for insertion
+        first_customer_id = get_next_customer_id(conn)
         records_inserted = 0
-        batch_size = 1000
-        
-        print('Inserting records into database...')
         
-        for idx, row in df.iterrows():
-            try:
-                # Generate 6-digit customer ID
-                customer_id = current_customer_id + idx
-                
-                # Handle missing values
-                person_emp_length = row.get('person_emp_length') if pd.notna(row.get('person_emp_length')) else None
-                loan_int_rate = row.get('loan_int_rate') if pd.notna(row.get('loan_int_rate')) else None
-                
-                # Insert record
-                cursor.execute('''
-                    INSERT INTO credit_risk_records (
-                        customer_id, person_age, person_income, person_home_ownership,
-                        person_emp_length, loan_intent, loan_grade, loan_amnt,
-                        loan_int_rate, loan_status, loan_percent_income,
-                        cb_person_default_on_file, cb_person_cred_hist_length
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    customer_id,
-                    int(row['person_age']) if pd.notna(row.get('person_age')) else None,
-                    float(row['person_income']) if pd.notna(row.get('person_income')) else None,
-                    str(row['person_home_ownership']) if pd.notna(row.get('person_home_ownership')) else None,
-                    float(person_emp_length) if person_emp_length is not None else None,
-                    str(row['loan_intent']) if pd.notna(row.get('loan_intent')) else None,
-                    str(row['loan_grade']) if pd.notna(row.get('loan_grade')) else None,
-                    int(row['loan_amnt']) if pd.notna(row.get('loan_amnt')) else None,
-                    float(loan_int_rate) if loan_int_rate is not None else None,
-                    int(row['loan_status']) if pd.notna(row.get('loan_status')) else None,
-                    float(row['loan_percent_income']) if pd.notna(row.get('loan_percent_income')) else None,
-                    str(row['cb_person_default_on_file']) if pd.notna(row.get('cb_person_default_on_file')) else None,
-                    int(row['cb_person_cred_hist_length']) if pd.notna(row.get('cb_person_cred_hist_length')) else None
-                ))
-                
-                records_inserted += 1
-                
-                # Commit in batches for better performance
-                if records_inserted % batch_size == 0:
-                    conn.commit()
-                    print(f'Inserted {records_inserted} records...')
-                    
-            except Exception as e:
-                print(f'Error inserting row {idx}: {e}')
-                continue
+        reader = pd.read_csv(
+            csv_path,
+            chunksize=chunk_size,
+            dtype={name: str for name, kind in SEED_COLUMNS if kind == 'str'},
+        )
+        for chunk in reader:
+            columns = convert_chunk(chunk)
+            customer_ids = range(first_customer_id + records_inserted,
+                                 first_customer_id + records_inserted + len(chunk))
+            conn.executemany(INSERT_SQL, zip(customer_ids, *columns))
+            records_inserted += len(chunk)
+            
+            elapsed = time.perf_counter() - start
+            print(f'Inserted {records_inserted} records ({records_inserted / elapsed:,.0f} rows/sec)...')
         
-        # Final commit
-        conn.commit()
-        conn.close()
+        conn.execute('COMMIT')
+        elapsed = time.perf_counter() - start
         
-        print(f'Successfully inserted {records_inserted} records into database')
-        print(f'Customer IDs range: {current_customer_id} to {current_customer_id + records_inserted - 1}')
+        print(f'Successfully inserted {records_inserted} records in {elapsed:.2f}s '
+              f'({records_inserted / elapsed if elapsed else 0:,.0f} rows/sec)')
+        if records_inserted:
+            print(f'Customer IDs range: {first_customer_id} to {first_customer_id + records_inserted - 1}')
         return True
         
     except Exception as e:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
         print(f'Error reading or inserting CSV data: {e}')
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        restore_pragmas(conn)
+        conn.close()
 
 if __name__ == '__main__':
     import argparse
@@ -158,6 +238,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Initialize database and optionally seed from CSV')
     parser.add_argument('--seed', action='store_true', help='Seed database from CSV file')
     parser.add_argument('--clear', action='store_true', help='Clear existing records before seeding')
+    parser.add_argument('--csv', help='CSV file to load (default: database/credit_risk_dataset.csv)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Rows read and inserted per chunk (default: {DEFAULT_CHUNK_SIZE})')
     
     args = parser.parse_args()
     
@@ -165,7 +248,7 @@ if __name__ == '__main__':
         initialize_database()
         
         if args.seed:
-            success = seed_from_csv(clear_existing=args.clear)
+            success = seed_from_csv(clear_existing=args.clear, csv_path=args.csv, chunk_size=args.chunk_size)
             if not success:
                 print('Warning: CSV seeding was not successful')
         else: